@@ -9,13 +9,17 @@ from sqlalchemy.future import select
 
 from ..core import security
 from ..core.settings import settings
-from ..db.database import get_db_async
+from ..db.database import get_db_async, release_connection
 from ..db import models
 from ..schemas import user as user_schemas
 from ..schemas import token as token_schemas
+from ..services import diary_service
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def _hasher_busy(e: security.PasswordHasherBusyError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+
 @router.post("/signup", response_model=user_schemas.User)
 async def signup(user_in: user_schemas.UserCreate, db: AsyncSession = Depends(get_db_async)):
     # Check if user exists
@@ -27,14 +31,20 @@ async def signup(user_in: user_schemas.UserCreate, db: AsyncSession = Depends(ge
             detail="User with this email or username already exists.",
         )
     
-    # Create new user
-    hashed_password = security.get_password_hash(user_in.password)
+    # Create new user (hashing runs on the bounded argon2 pool; no connection is held meanwhile)
+    await release_connection(db)
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except security.PasswordHasherBusyError as e:
+        raise _hasher_busy(e)
     db_user = models.User(
         email=user_in.email,
         username=user_in.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
+    # Provision the default diary in the same transaction, so the first recording doesn't have to
+    db.add(diary_service.new_default_diary(db_user))
     await db.commit()
     await db.refresh(db_user)
     return db_user
@@ -48,17 +58,30 @@ async def login(
     # Note: OAuth2PasswordRequestForm puts the email/username in the 'username' field
     result = await db.execute(select(models.User).filter((models.User.username == form_data.username) | (models.User.email == form_data.username)))
     user = result.scalars().first()
-    
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    await release_connection(db)
+
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await security.verify_and_update_password(form_data.password, user.hashed_password)
+        except security.PasswordHasherBusyError as e:
+            raise _hasher_busy(e)
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # The stored hash was made with older argon2 costs; upgrade it now that we know the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
         
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        subject=user.id, expires_delta=access_token_expires
+        subject=user.id, expires_delta=access_token_expires, claims={"usr": user.username}
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -7,8 +7,10 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from ..core.settings import settings
 from ..core import security
-from ..db.database import get_db_async
+from ..db.database import get_db_async, release_connection
 from ..db import models
+from ..services import principal_cache
+from ..services.principal_cache import Principal
 
 # Define the OAuth2 scheme
 # tokenUrl is the relative URL where the frontend sends the login credentials
@@ -17,9 +19,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/{settings.API_VERSION}/auth
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: AsyncSession = Depends(get_db_async)
-) -> models.User:
+) -> Principal:
     """
     Dependency that validates the JWT token and returns the current user.
+    Recently seen users are served from the per-worker principal cache, so most
+    requests don't touch the DB (or check out a connection) just to authenticate.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -35,12 +39,30 @@ async def get_current_user(
         user_id = int(user_id_str)
     except (JWTError, ValueError):
         raise credentials_exception
-        
-    user = await db.get(models.User, user_id)
-    if user is None:
-        raise credentials_exception
-        
-    if not user.is_active:
+
+    principal = principal_cache.cache.get(user_id) if settings.AUTH_PRINCIPAL_CACHE_ENABLED else None
+    if principal is not None:
+        principal_cache.LOOKUPS.inc(source="cache")
+    else:
+        if settings.AUTH_TRUST_TOKEN_CLAIMS and payload.get("usr"):
+            # Signed claims stand in for the DB row; deactivations are seen via mark_inactive
+            principal = Principal(id=user_id, username=payload["usr"])
+            principal_cache.LOOKUPS.inc(source="claims")
+        else:
+            user = await db.get(models.User, user_id)
+            if user is None:
+                raise credentials_exception
+            principal = Principal.from_user(user)
+            principal_cache.LOOKUPS.inc(source="db")
+
+            # Don't keep the connection checked out for the rest of the request;
+            # endpoints that need the DB again will start a new short unit of work.
+            await release_connection(db)
+
+        if settings.AUTH_PRINCIPAL_CACHE_ENABLED:
+            principal_cache.cache.set(principal)
+
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-        
-    return user
+
+    return principal
@@ -1,16 +1,22 @@
 # backend/app/api/endpoints.py
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import date
-from typing import List
+from datetime import date, datetime, timezone
+from typing import List, Optional, Union
+import hashlib
+import math
 
 # Import models, schemas, services, and database utilities
-from ..db.database import get_db_async
-from ..db import models
+from ..core.settings import settings
+from ..db.database import get_db_async, release_connection
 from ..schemas import entry as schemas
-from ..services import diary_service
-from .deps import get_current_user 
+from ..schemas import job as job_schemas
+from ..services import ai_service, audio_utils, diary_service, job_service
+from .deps import Principal, get_current_user
+from . import sse
 
 # Define the API router
 router = APIRouter(
@@ -19,14 +25,44 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def _ai_failure(e: Exception, detail: str) -> HTTPException:
+    """
+    Maps an AI call failure to 429 when rate limited, 503 while the provider's circuit
+    is open (both with Retry-After), else 500.
+    """
+    if isinstance(e, (ai_service.AIRateLimitError, ai_service.AIUnavailableError)):
+        return HTTPException(
+            status_code=(
+                status.HTTP_429_TOO_MANY_REQUESTS
+                if isinstance(e, ai_service.AIRateLimitError)
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+            detail=str(e),
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+        )
+    return HTTPException(status_code=500, detail=f"{detail}: {e}")
+
 @router.post("/refine", response_model=schemas.RefinementResponse)
 async def refine_entry(
     request: schemas.RefinementRequest,
-    current_user: models.User = Depends(get_current_user),
+    http_request: Request,
+    stream: bool = Query(False, description="Stream the refined entry as server-sent events"),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Refines a diary entry based on user instructions (comment on selected text).
+    With `?stream=true` (or `Accept: text/event-stream`) the text is streamed as SSE.
     """
+    if sse.wants_event_stream(http_request, stream):
+        tokens = diary_service.stream_refined_entry(
+            current_content=request.current_content,
+            selected_text=request.selected_text,
+            user_instruction=request.user_instruction
+        )
+        return sse.event_stream_response(
+            sse.relay_llm_tokens(tokens, lambda text: schemas.RefinementResponse(updated_content=text))
+        )
+
     try:
         updated_text = await diary_service.refine_entry(
             current_content=request.current_content,
@@ -35,69 +71,178 @@ async def refine_entry(
         )
         return schemas.RefinementResponse(updated_content=updated_text)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Refinement failed: {e}")
+        raise _ai_failure(e, "Refinement failed")
 
 # ====================================================================
 # 1. AUDIO PROCESSING & PREVIEW (Initial Flow)
 # ====================================================================
 
-@router.post("/process_audio", response_model=schemas.EntryUpdatePreview)
+@router.post(
+    "/process_audio",
+    response_model=schemas.EntryUpdatePreview,
+    responses={202: {"model": job_schemas.JobAccepted, "description": "Queued as a background job (?async=true)"}},
+)
 async def process_new_audio(
+    request: Request,
     audio_file: UploadFile = File(..., description="Audio recording of the day's events"),
-    current_user: models.User = Depends(get_current_user),
+    stream: bool = Query(False, description="Stream the generated preview as server-sent events"),
+    run_async: bool = Query(False, alias="async", description="Queue the pipeline as a job and return 202 with its id"),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
     Accepts an audio file, transcribes it, and generates/updates a diary entry preview.
+    With `?stream=true` (or `Accept: text/event-stream`) the preview is streamed as SSE:
+    a `preview` event with the metadata, `token` events, then a `done` event.
+    With `?async=true` the pipeline runs as a background job (see /entries/jobs/{job_id}).
+
+    No DB connection is held during the STT or LLM calls: the DB work is done in a
+    short unit between them and released before the LLM call starts.
     """
-    
-    # 1. Transcribe Audio (STT Service call)
+    # 0. Reject oversized/overlong recordings before any STT work
     try:
-        transcript = await diary_service.get_transcription(audio_file)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            detail=f"Transcription failed: {e}"
-        )
+        audio_utils.check_upload_limits(audio_file)
+    except audio_utils.AudioLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if run_async:
+        return await _submit_audio_job(request, audio_file, current_user.id)
     
-    # 2. Check for Existing Entry (We'll check for ANY entry for the day first)
+    # 1. Transcribe Audio (STT Service call), while the existing entry and the diary
+    #    are resolved concurrently (short DB unit, released before the LLM)
     today = date.today()
-    existing_entry = await diary_service.get_entry_by_date(db, user_id=current_user.id, entry_date=today)
-    
+    try:
+        transcript, existing_content, diary_id = await diary_service.transcribe_and_resolve_target(
+            db, current_user.id, today, audio_file
+        )
+    except audio_utils.AudioLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except SQLAlchemyError:
+        raise
+    except Exception as e:
+        raise _ai_failure(e, "Transcription failed")
+    original_content = existing_content or ""
+
     # 3. Use LLM to Process/Integrate Content
-    if existing_entry:
-        # Modification Flow: Integrate new content into the existing entry's content
-        original_content = existing_entry.content
-        updated_content = await diary_service.integrate_new_content(transcript, original_content)
-        diary_id = existing_entry.diary_id
-    else:
-        # Initial Flow: Generate a summary from the raw transcript
-        original_content = ""
-        updated_content = await diary_service.generate_initial_entry(transcript)
-        # Assuming the first diary found is the default one (ID 1), or we use a fallback
-        diaries = await diary_service.get_diaries_for_user(db, current_user.id)
-        if not diaries:
-             # Create a default diary if none exists (Auto-provisioning)
-             default_diary = models.Diary(
-                owner_id=current_user.id,
-                name="My Daily Reflections",
-                description="The primary diary for daily voice entries."
-             )
-             db.add(default_diary)
-             await db.commit()
-             await db.refresh(default_diary)
-             diary_id = default_diary.id
-        else:
-            diary_id = diaries[0].id 
+    streaming = sse.wants_event_stream(request, stream)
+    if streaming and settings.AI_DEGRADED_DRAFT_ENABLED and not ai_service.llm_available():
+        # LLM circuit is open: skip the stream and hand back the raw transcript as a draft
+        draft = schemas.EntryUpdatePreview(
+            original_content=original_content,
+            updated_preview_content=diary_service.draft_preview_content(transcript, existing_content),
+            entry_date=today,
+            diary_id=diary_id,
+            degraded=True
+        )
+        return sse.event_stream_response(sse.single_event("done", draft))
+
+    if streaming:
+        tokens = diary_service.stream_preview_content(transcript, existing_content)
+
+        def build_preview(text: str) -> schemas.EntryUpdatePreview:
+            return schemas.EntryUpdatePreview(
+                original_content=original_content,
+                updated_preview_content=text,
+                entry_date=today,
+                diary_id=diary_id
+            )
+
+        metadata = {"original_content": original_content, "entry_date": today.isoformat(), "diary_id": diary_id}
+        return sse.event_stream_response(
+            sse.relay_llm_tokens(tokens, build_preview, first_event=("preview", metadata))
+        )
+
+    try:
+        updated_content, degraded = await diary_service.generate_preview_or_draft(transcript, existing_content)
+    except ai_service.AIServiceError as e:
+        raise _ai_failure(e, "Preview generation failed")
         
     return schemas.EntryUpdatePreview(
         original_content=original_content,
         updated_preview_content=updated_content,
         entry_date=today,
-        diary_id=diary_id
+        diary_id=diary_id,
+        degraded=degraded
     )
 
 
+async def _submit_audio_job(request: Request, audio_file: UploadFile, user_id: int) -> JSONResponse:
+    """Queues the process_audio pipeline and answers 202 with the job's URLs."""
+    upload = await job_service.detach_upload(audio_file)
+
+    async def work(db: AsyncSession) -> dict:
+        preview = await diary_service.build_entry_preview(db, user_id, upload)
+        return preview.model_dump(mode="json")
+
+    try:
+        # The runner closes the upload however the job ends (including never running)
+        job = await job_service.runner.submit(user_id, "process_audio", work, cleanup=upload.close)
+    except job_service.JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "5"})
+
+    status_url = str(request.url_for("read_job_status", job_id=job.id))
+    accepted = job_schemas.JobAccepted(
+        job_id=job.id,
+        status=job.status.value,
+        status_url=status_url,
+        events_url=str(request.url_for("stream_job_events", job_id=job.id)),
+    )
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump(), headers={"Location": status_url})
+
+
+# ====================================================================
+# 1b. BACKGROUND JOBS (status / result of ?async=true uploads)
+# ====================================================================
+
+def _job_status_response(job: job_service.Job) -> job_schemas.JobStatusResponse:
+    return job_schemas.JobStatusResponse(
+        job_id=job.id,
+        status=job.status.value,
+        result=job.result,
+        error=job.error,
+        created_at=datetime.fromtimestamp(job.created_at, tz=timezone.utc),
+        finished_at=datetime.fromtimestamp(job.finished_at, tz=timezone.utc) if job.finished_at else None,
+    )
+
+async def _get_owned_job(job_id: str, user_id: int) -> job_service.Job:
+    job = await job_service.store.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=job_schemas.JobStatusResponse)
+async def read_job_status(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Returns the status of a background job, with the preview once it has succeeded.
+    """
+    return _job_status_response(await _get_owned_job(job_id, current_user.id))
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Streams `status` events as a background job progresses, ending with `done` or `error`.
+    """
+    await _get_owned_job(job_id, current_user.id)
+
+    async def events():
+        async for job in job_service.store.watch(job_id):
+            body = _job_status_response(job).model_dump(mode="json")
+            if job.status == job_service.JobStatus.SUCCEEDED:
+                yield sse.format_sse("done", body)
+            elif job.status == job_service.JobStatus.FAILED:
+                yield sse.format_sse("error", body)
+            else:
+                yield sse.format_sse("status", body)
+
+    return sse.event_stream_response(events())
+
+
 # ====================================================================
 # 2. COMMIT ENTRY (Final Flow)
 # ====================================================================
@@ -105,89 +250,153 @@ async def process_new_audio(
 @router.post("/commit", response_model=schemas.Entry)
 async def commit_diary_entry(
     entry_data: schemas.EntryCreate, # Contains final content and selected diary_id
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
     Commits the final, user-verified diary entry to the database.
-    Handles both creation and updating based on date/user/diary_id.
+    Creates it, or updates the existing entry for the same date/user/diary_id
+    (same-day modification), in one atomic upsert.
     """
-    
-    # Check if an entry already exists for the unique key (user_id, entry_date, diary_id)
-    entry = await diary_service.get_entry_by_key(
-        db, 
-        user_id=current_user.id, 
-        entry_date=entry_data.entry_date, 
-        diary_id=entry_data.diary_id
-    )
-
-    if entry:
-        # UPDATE existing entry (Same-day modification)
-        updated_entry = await diary_service.update_entry(
-            db=db, 
-            entry_id=entry.id, 
-            new_content=entry_data.content
-        )
-        if not updated_entry:
-            raise HTTPException(status_code=404, detail="Entry not found during update.")
-        return updated_entry
-    else:
-        # CREATE new entry (Initial save)
-        new_entry = await diary_service.create_entry(
-            db=db, 
-            user_id=current_user.id, 
-            entry_data=entry_data
-        )
-        return new_entry
+    return await diary_service.upsert_entry(db, user_id=current_user.id, entry_data=entry_data)
 
 
 # ====================================================================
 # 3. UTILITY ENDPOINTS
 # ====================================================================
 
-@router.get("/history", response_model=List[schemas.Entry])
+async def _not_modified(request: Request, response: Response, db: AsyncSession, user_id: int) -> Optional[Response]:
+    """
+    Sets the listing's ETag (user id + the user's data version + the exact URL) and
+    returns a 304 response if the client already has it. Reads only the version row,
+    never the entries; it is read before the listing so an ETag can't describe newer data.
+    """
+    version = await diary_service.get_data_version(db, user_id)
+    representation = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:12]
+    etag = f'W/"{user_id}.{version}.{representation}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}  # Cache, but revalidate every time
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+VIEW_QUERY = Query("full", description="`summary` returns an excerpt and the length instead of the full content")
+EntryListing = Union[List[schemas.Entry], List[schemas.EntrySummary]]
+
+@router.get("/history", response_model=EntryListing)
 async def read_entry_history(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 20,
-    current_user: models.User = Depends(get_current_user),
+    view: schemas.EntryView = VIEW_QUERY,
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
     Retrieves the user's recent diary entries (for the Book View).
+    Answers `If-None-Match` with 304 while nothing has changed.
     """
-    entries = await diary_service.get_recent_entries(db, user_id=current_user.id, limit=limit, offset=skip)
+    if (not_modified := await _not_modified(request, response, db, current_user.id)) is not None:
+        return not_modified
+    entries = await diary_service.get_recent_entries(db, user_id=current_user.id, limit=limit, offset=skip, view=view)
     return entries
 
-@router.get("/{entry_date}", response_model=List[schemas.Entry])
+@router.get("/history/page", response_model=schemas.EntryPage)
+async def read_entry_history_page(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    view: schemas.EntryView = VIEW_QUERY,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_async),
+):
+    """
+    Cursor-paginated history (newest first). Omit `cursor` for the first page, then
+    pass the returned `next_cursor` until it is null.
+    """
+    if (not_modified := await _not_modified(request, response, db, current_user.id)) is not None:
+        return not_modified
+    try:
+        entries, next_cursor = await diary_service.get_entries_page(
+            db, user_id=current_user.id, limit=limit, cursor=cursor, view=view
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return schemas.EntryPage(items=entries, next_cursor=next_cursor)
+
+@router.get("/search", response_model=schemas.EntrySearchPage)
+async def search_entries(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words or phrases; supports \"quotes\", or, -exclude"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_async),
+):
+    """
+    Full-text search over the user's entries, best match first, with highlighted
+    snippets. Pass the returned `next_cursor` for the next page.
+    """
+    if (not_modified := await _not_modified(request, response, db, current_user.id)) is not None:
+        return not_modified
+    try:
+        hits, next_cursor = await diary_service.search_entries(
+            db, user_id=current_user.id, query=q, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return schemas.EntrySearchPage(items=hits, next_cursor=next_cursor)
+
+@router.get("/{entry_date}", response_model=EntryListing)
 async def read_entries_by_date(
+    request: Request,
+    response: Response,
     entry_date: date,
-    current_user: models.User = Depends(get_current_user),
+    view: schemas.EntryView = VIEW_QUERY,
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
     Retrieves all diary entries for a specific date and user (across all diaries).
     """
-    entries = await diary_service.get_entries_by_date(db, user_id=current_user.id, entry_date=entry_date)
+    if (not_modified := await _not_modified(request, response, db, current_user.id)) is not None:
+        return not_modified
+    entries = await diary_service.get_entries_by_date(db, user_id=current_user.id, entry_date=entry_date, view=view)
     return entries
 
-@router.get("/history", response_model=List[schemas.Entry])
-async def read_entry_history(
-    skip: int = 0,
-    limit: int = 20,
-    current_user: models.User = Depends(get_current_user),
+@router.get("/{entry_date}/similar", response_model=List[schemas.SimilarEntry])
+async def read_similar_entries(
+    request: Request,
+    response: Response,
+    entry_date: date,
+    k: int = Query(5, ge=1, le=50),
+    diary_id: Optional[int] = Query(None, description="Which diary's entry to start from (default: the oldest diary)"),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
-    Retrieves the user's recent diary entries (for the Book View).
+    "Days like this one": the user's past entries most similar in content to the
+    entry on `entry_date`, most similar first.
     """
-    entries = await diary_service.get_recent_entries(db, user_id=current_user.id, limit=limit, offset=skip)
-    return entries
+    if (not_modified := await _not_modified(request, response, db, current_user.id)) is not None:
+        return not_modified
+    similar = await diary_service.similar_to_entry_date(
+        db, user_id=current_user.id, entry_date=entry_date, k=k, diary_id=diary_id
+    )
+    if similar is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No entry on this date.")
+    return similar
 
 # ====================================================================
 # 4. REFLECTION & INSIGHTS (New Feature)
 # ====================================================================
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class ReflectionResponse(BaseModel):
     mood_score: int
@@ -195,27 +404,58 @@ class ReflectionResponse(BaseModel):
     takeaways: List[str]
     action_item: str
 
+    model_config = ConfigDict(from_attributes=True)
+
+async def _get_owned_entry_with_reflection(db: AsyncSession, entry_id: int, user_id: int):
+    entry, reflection = await diary_service.get_entry_with_reflection(db, entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    
+    if entry.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this entry")
+    return entry, reflection
+
+@router.get("/reflect/{entry_id}", response_model=ReflectionResponse)
+async def read_reflection(
+    entry_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_async),
+):
+    """
+    Returns the stored insights for an entry (404 if none exist for its current content).
+    """
+    _, reflection = await _get_owned_entry_with_reflection(db, entry_id, current_user.id)
+    if reflection is None:
+        raise HTTPException(status_code=404, detail="No reflection stored for this entry")
+    return reflection
+
 @router.post("/reflect/{entry_id}", response_model=ReflectionResponse)
 async def generate_reflection(
     entry_id: int,
-    current_user: models.User = Depends(get_current_user),
+    regenerate: bool = Query(False, description="Ignore the stored reflection and generate a new one"),
+    current_user: Principal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_async),
 ):
     """
     Generates AI-powered insights for a specific journal entry.
+    The result is stored with the entry and reused until the entry's content changes.
     """
-    # 1. Fetch the entry
-    entry = await db.get(models.Entry, entry_id)
-    if not entry:
-        raise HTTPException(status_code=404, detail="Entry not found")
-    
-    if entry.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to access this entry")
+    # 1. Fetch the entry (and any reflection stored for its current content)
+    entry, reflection = await _get_owned_entry_with_reflection(db, entry_id, current_user.id)
+    if reflection is not None and not regenerate:
+        return reflection
+
+    entry_content = entry.content
+    await release_connection(db)
 
     # 2. Call AI Service
-    from ..services import ai_service
     try:
-        insights = await ai_service.generate_daily_reflection(entry.content)
-        return insights
+        insights = await ai_service.generate_daily_reflection(entry_content)
+        validated = ReflectionResponse(**insights)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate insights: {e}")
\ No newline at end of file
+        raise _ai_failure(e, "Failed to generate insights")
+
+    # 3. Store it for next time (the unparseable-output fallback is not worth keeping)
+    if insights != ai_service.FALLBACK_REFLECTION:
+        await diary_service.save_reflection(db, entry_id, entry_content, validated.model_dump())
+    return validated
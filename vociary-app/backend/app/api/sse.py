@@ -0,0 +1,67 @@
+# backend/app/api/sse.py
+
+import json
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+def wants_event_stream(request: Request, stream: bool) -> bool:
+    """
+    Clients opt in to streaming with `?stream=true` or an `Accept: text/event-stream` header.
+    Everyone else keeps getting the plain JSON response.
+    """
+    return stream or EVENT_STREAM_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Formats a single server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def relay_llm_tokens(
+    tokens: AsyncIterator[str],
+    build_final: Callable[[str], BaseModel],
+    first_event: Optional[Tuple[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Relays LLM deltas to the client as SSE:
+    - optional first event (e.g. the preview metadata),
+    - one `token` event per delta: {"delta": "..."},
+    - a final `done` event carrying the same body the JSON endpoint would return,
+    - or an `error` event if the upstream call fails mid-stream.
+    """
+    if first_event is not None:
+        yield format_sse(*first_event)
+
+    parts = []
+    try:
+        async for delta in tokens:
+            parts.append(delta)
+            yield format_sse("token", {"delta": delta})
+    except Exception as e:
+        error = {"detail": f"Generation failed: {e}"}
+        if getattr(e, "retry_after", None) is not None:
+            error["retry_after"] = e.retry_after  # Rate limited; the client may retry after this many seconds
+        yield format_sse("error", error)
+        return
+
+    yield format_sse("done", build_final("".join(parts)).model_dump(mode="json"))
+
+
+async def single_event(event: str, body: BaseModel) -> AsyncIterator[str]:
+    """An event stream that carries just one event (e.g. a `done` with a fallback result)."""
+    yield format_sse(event, body.model_dump(mode="json"))
+
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wraps an SSE generator in a response that proxies won't buffer."""
+    return StreamingResponse(
+        events,
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,41 @@
+# backend/app/core/log.py
+
+import json
+import logging
+import sys
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger and message, plus the fields passed
+    with `extra=` (e.g. logger.info("trace", extra={"trace": {...}})), so log
+    collectors can index them without parsing the message.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        body = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        body.update({key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRIBUTES})
+        if record.exc_info:
+            body["exception"] = self.formatException(record.exc_info)
+        return json.dumps(body, default=str)
+
+
+def configure(level: str) -> None:
+    """
+    Sends records from the app's loggers (everything under "app") to stderr as JSON
+    lines. Safe to call again; handlers added elsewhere (a logging config file) are kept.
+    """
+    logger = logging.getLogger("app")
+    logger.setLevel(level.upper())
+    if not any(isinstance(handler.formatter, JsonFormatter) for handler in logger.handlers):
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
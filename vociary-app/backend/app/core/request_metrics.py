@@ -0,0 +1,52 @@
+# backend/app/core/request_metrics.py
+
+import time
+
+from . import metrics
+
+REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response (or stream) has been sent",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0),
+)
+REQUESTS_IN_FLIGHT = metrics.Gauge("http_requests_in_flight", "Requests currently being served", ["method"])
+
+
+class RequestMetricsMiddleware:
+    """
+    Records per-route latency. Routes are labelled by their path template
+    (e.g. /entries/{entry_date}), so ids and dates don't create new series;
+    requests that match no route share the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500  # Unless a response starts, the request failed
+
+        async def recording_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(method=method)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
@@ -1,13 +1,32 @@
 # backend/app/core/security.py
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Any, Dict, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
+from . import metrics
 from .settings import settings
 
 # Password hashing context (Using argon2 for better compatibility/security)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Hashes made with other cost parameters still verify and are flagged for rehashing.
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+
+class PasswordHasherBusyError(Exception):
+    """More than PASSWORD_HASH_MAX_PENDING hash/verify calls are already waiting."""
+
+
+PASSWORD_HASH_SECONDS = metrics.Histogram(
+    "password_hash_seconds", "Time spent hashing or verifying a password, including queueing", ["operation"]
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against the hashed version."""
@@ -17,16 +36,63 @@ def get_password_hash(password: str) -> str:
     """Generates an argon2 hash for the password."""
     return pwd_context.hash(password)
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+
+# --- Async variants (argon2 takes tens to hundreds of ms; never run it on the event loop) ---
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+def _executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        # argon2-cffi releases the GIL while hashing, so threads run it in parallel
+        _hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+    return _hash_executor
+
+async def _run_hasher(operation: str, func, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusyError("Too many sign-ins in progress. Please retry shortly.")
+    _pending += 1
+    try:
+        with PASSWORD_HASH_SECONDS.time(operation=operation):
+            return await asyncio.get_running_loop().run_in_executor(_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bounded hashing pool."""
+    return await _run_hasher("hash", pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies on the bounded hashing pool. Returns (valid, new_hash); new_hash is set
+    when the stored hash uses outdated cost parameters and should be replaced.
+    """
+    return await _run_hasher("verify", pwd_context.verify_and_update, plain_password, hashed_password)
+
+def shutdown_password_hasher() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
+) -> str:
     """
     Creates a JWT access token.
-    Subject is usually the user ID or username.
+    Subject is usually the user ID or username. Extra signed `claims` (e.g. the
+    username) let get_current_user resolve the user without a DB lookup.
     """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -24,6 +24,17 @@ class Settings(BaseSettings):
     # --- AUTH ---
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_PRINCIPAL_CACHE_ENABLED: bool = True # Skip the per-request user lookup for recently seen users
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60 # Upper bound on how long another worker may miss a deactivation
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False # Build the principal from signed JWT claims on a cache miss (no DB)
+
+    # --- PASSWORD HASHING (argon2, off the event loop; changed costs rehash on next login) ---
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536 # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2 # Threads hashing at once per worker process
+    PASSWORD_HASH_MAX_PENDING: int = 64 # Queued hash/verify calls beyond this get 503
 
     # --- DATABASE ---
     DB_HOST: str
@@ -31,6 +42,16 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    DB_ECHO: bool = False # Log every SQL statement (independent of DEBUG)
+
+    # --- DATABASE POOL (per worker process; size x workers must fit Postgres max_connections) ---
+    DB_POOL_SIZE: int = 10 # Connections kept open
+    DB_MAX_OVERFLOW: int = 10 # Extra connections opened under bursts, closed when returned
+    DB_POOL_TIMEOUT: float = 10.0 # Max wait for a connection before the request fails
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Replace connections older than this (below server/LB idle timeouts)
+    DB_POOL_PRE_PING: bool = False # Liveness round trip on every checkout; recycling covers stale connections
+    DB_STATEMENT_CACHE_SIZE: int = 100 # asyncpg prepared statements cached per connection
+    DB_PGBOUNCER_MODE: bool = False # Transaction-pooling PgBouncer: no statement caches, unique statement names
 
     @property
     def SQLALCHEMY_DATABASE_URL(self) -> str:
@@ -45,7 +66,91 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str
     LLM_MODEL_NAME: str
     STT_MODEL_NAME: str # Groq-optimized Whisper model name
+    GROQ_API_BASE_URL: str = "https://api.groq.com/openai/v1" # Point at groq_stub.py to run offline with realistic latency
+
+    # --- AI HTTP CLIENT (shared, pooled client for all Groq calls) ---
+    GROQ_HTTP2: bool = False # Requires the 'h2' package (httpx[http2])
+    GROQ_MAX_CONNECTIONS: int = 100
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    GROQ_KEEPALIVE_EXPIRY: float = 30.0 # Seconds an idle connection is kept open
+    GROQ_CONNECT_TIMEOUT: float = 5.0
+    GROQ_READ_TIMEOUT: float = 60.0
+    GROQ_WRITE_TIMEOUT: float = 60.0
+    GROQ_POOL_TIMEOUT: float = 10.0 # Max wait for a free connection from the pool
+
+    # --- AI RATE LIMITS (per model, per worker; set to your Groq plan's limits) ---
+    AI_MAX_CONCURRENT_REQUESTS: int = 8 # In-flight Groq calls per model
+    AI_LLM_REQUESTS_PER_MINUTE: int = 30
+    AI_LLM_TOKENS_PER_MINUTE: int = 6000
+    AI_STT_REQUESTS_PER_MINUTE: int = 20
+    AI_ESTIMATED_COMPLETION_TOKENS: int = 600 # Reserved per LLM call until the real usage is known
+    AI_MAX_QUEUE_WAIT_SECONDS: float = 30.0 # Longer waits are answered with 429 + Retry-After
+
+    # --- AI RETRIES & HEDGING (idempotent STT/LLM calls) ---
+    AI_RETRY_MAX_ATTEMPTS: int = 3 # Including the first attempt
+    AI_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    AI_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    AI_ATTEMPT_TIMEOUT_SECONDS: float = 60.0
+    AI_TOTAL_DEADLINE_SECONDS: float = 150.0 # Across all attempts and backoff sleeps
+    AI_HEDGING_ENABLED: bool = False # Send a second request when the first is slower than p95
+    AI_HEDGE_PERCENTILE: float = 0.95
+    AI_HEDGE_MIN_DELAY_SECONDS: float = 2.0 # Never hedge earlier than this
+
+    # --- AI CIRCUIT BREAKER (fail fast with 503 during provider outages) ---
+    CIRCUIT_FAILURE_THRESHOLD: int = 5 # Consecutive failed calls (after retries) that open the circuit
+    CIRCUIT_RESET_TIMEOUT_SECONDS: float = 30.0 # How long it stays open before probing
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1 # Concurrent probe calls while half-open
+    AI_DEGRADED_DRAFT_ENABLED: bool = True # LLM down: preview the raw transcript so it can still be saved
+
+    # --- TRANSCRIPT CACHE (keyed by audio hash + STT model) ---
+    TRANSCRIPT_CACHE_ENABLED: bool = True
+    TRANSCRIPT_CACHE_MAX_ENTRIES: int = 512 # In-memory LRU size per worker
+    TRANSCRIPT_CACHE_DIR: str = ".cache/transcripts" # Durable tier, shared by workers on the host
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    TRANSCRIPT_CACHE_SWEEP_INTERVAL_SECONDS: int = 3600 # How often each worker removes expired files
+
+    # --- AUDIO UPLOAD LIMITS ---
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
+    MAX_AUDIO_DURATION_SECONDS: int = 3600 # Enforced for formats whose duration is readable (WAV)
+
+    # --- LONG-AUDIO TRANSCRIPTION (split, transcribe segments in parallel, stitch) ---
+    STT_LONG_AUDIO_ENABLED: bool = True
+    STT_LONG_AUDIO_THRESHOLD_SECONDS: int = 180 # Longer recordings are split into segments
+    STT_LONG_AUDIO_MIN_BYTES: int = 1024 * 1024 # Non-WAV uploads smaller than this are never probed or decoded
+    STT_SEGMENT_SECONDS: int = 60
+    STT_SEGMENT_OVERLAP_SECONDS: float = 1.0
+    STT_SILENCE_SEARCH_SECONDS: float = 5.0 # How far a cut may move to land on silence
+    STT_MAX_PARALLEL_SEGMENTS: int = 4
+
+    # --- BACKGROUND JOBS (opt-in async mode for /entries/process_audio) ---
+    JOB_WORKERS: int = 4 # Concurrent pipeline runs per worker process
+    JOB_QUEUE_SIZE: int = 100 # Queued jobs beyond this are rejected with 503
+    JOB_RESULT_TTL_SECONDS: int = 3600 # How long finished job results stay retrievable
     
+    # --- RESPONSES ---
+    ENTRY_SUMMARY_EXCERPT_CHARS: int = 160 # Length of `excerpt` in ?view=summary listings
+    GZIP_MIN_RESPONSE_BYTES: int = 1024 # Smaller responses aren't worth compressing
+    GZIP_COMPRESSION_LEVEL: int = 5 # 1-9; above ~6 costs much more CPU for little gain on JSON
+
+    # --- SEARCH ---
+    SEARCH_TEXT_CONFIG: str = "english" # Postgres text search configuration (changing it needs the column rebuilt)
+    SEARCH_SNIPPET_CHARS: int = 160 # Approximate snippet length in search results
+
+    # --- SIMILAR ENTRIES (local hashed TF-IDF vectors, no model or network needed) ---
+    SIMILARITY_EMBEDDING_DIM: int = 512 # Hash buckets per vector; stored vectors of another size are re-embedded
+    SIMILARITY_INDEX_CACHE_MAX_ROWS: int = 50000 # Vectors cached per worker across users (~2 KB each at 512 dims)
+
+    # --- LOGGING ---
+    LOG_LEVEL: str = "INFO" # For the app's own loggers, written to stderr as JSON lines
+
+    # --- TRACING (per-request stage timings: Server-Timing header, log records, OTLP) ---
+    TRACING_ENABLED: bool = True
+    TRACE_LOG_MIN_DURATION_MS: float = 5000.0 # Log a JSON stage breakdown for slower requests (0 = all, -1 = never)
+    OTLP_TRACES_ENDPOINT: str = "" # e.g. http://localhost:4318/v1/traces to export to an OpenTelemetry collector
+    OTLP_SERVICE_NAME: str = "vociary-backend"
+    OTLP_EXPORT_QUEUE_SIZE: int = 2000 # Finished traces waiting for export; more are dropped rather than buffered
+    OTLP_EXPORT_BATCH_SIZE: int = 100 # Traces per export request
+
     # --- CORS ---
     FRONTEND_URL: str
     
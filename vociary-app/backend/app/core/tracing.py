@@ -0,0 +1,328 @@
+# backend/app/core/tracing.py
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from . import metrics
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ====================================================================
+# 1. Spans and Traces
+# ====================================================================
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, object] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """The spans of one request (or background job), under a root span."""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.root = Span(name, _new_span_id(), parent_id, time.time_ns())
+        self.spans: List[Span] = []
+
+    def elapsed_ms(self) -> float:
+        return ((self.root.end_ns or time.time_ns()) - self.root.start_ns) / 1e6
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Milliseconds per stage name; a stage that ran several times is summed."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header value for the stages finished so far, plus the total."""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.stage_durations().items()]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Times one stage of the current request. A no-op outside a trace, so services can
+    be instrumented unconditionally.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = Span(name, _new_span_id(), _current_span_id.get(), time.time_ns(), attributes=attributes)
+    token = _current_span_id.set(current.span_id)
+    try:
+        yield current
+    except Exception as e:
+        current.error = repr(e)
+        raise
+    finally:
+        _current_span_id.reset(token)
+        current.end_ns = time.time_ns()
+        trace.spans.append(current)
+
+def record_span(name: str, start_ns: int, error: Optional[str] = None, **attributes) -> None:
+    """
+    Adds a finished stage with an explicit start time, for code that can't hold a
+    context manager open (async generators, ASGI receive wrappers).
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(Span(
+            name, _new_span_id(), _current_span_id.get(), start_ns, time.time_ns(),
+            attributes=attributes, error=error,
+        ))
+
+def _parse_traceparent(header: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(trace id, parent span id) from a W3C traceparent header, if it is well formed."""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, None
+    return parts[1], parts[2]
+
+@contextmanager
+def start_trace(name: str, traceparent: Optional[str] = None) -> Iterator[Trace]:
+    """Makes a new trace current for the enclosed work and reports it when done."""
+    trace = Trace(name, *_parse_traceparent(traceparent))
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span_id.set(trace.root.span_id)
+    try:
+        yield trace
+    except Exception as e:
+        trace.root.error = repr(e)
+        raise
+    finally:
+        _current_span_id.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.root.end_ns = time.time_ns()
+        _report(trace)
+
+
+# ====================================================================
+# 2. Reporting (structured log records + optional OTLP export)
+# ====================================================================
+
+EXPORTS_DROPPED = metrics.Counter(
+    "trace_exports_dropped_total", "Finished traces not exported to the collector", ["reason"]
+)
+
+def _report(trace: Trace) -> None:
+    threshold = settings.TRACE_LOG_MIN_DURATION_MS
+    if threshold >= 0 and trace.elapsed_ms() >= threshold:
+        logger.info("trace", extra={"trace": {
+            "trace_id": trace.trace_id,
+            "name": trace.root.name,
+            "duration_ms": round(trace.elapsed_ms(), 1),
+            "stages_ms": {name: round(ms, 1) for name, ms in trace.stage_durations().items()},
+            "attributes": trace.root.attributes,
+            "error": trace.root.error,
+        }})
+    if exporter is not None:
+        exporter.submit(trace)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_span(trace: Trace, span: Span, kind: int) -> dict:
+    body = {
+        "traceId": trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {},
+    }
+    if span.parent_id:
+        body["parentSpanId"] = span.parent_id
+    return body
+
+def otlp_payload(traces: List[Trace], service_name: str) -> dict:
+    """OTLP/HTTP JSON (ExportTraceServiceRequest) body for a batch of traces."""
+    spans = []
+    for trace in traces:
+        spans.append(_otlp_span(trace, trace.root, kind=2))  # SERVER
+        spans += [_otlp_span(trace, span, kind=1) for span in trace.spans]  # INTERNAL
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+        "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+    }]}
+
+
+class OTLPExporter:
+    """
+    Posts finished traces to an OpenTelemetry collector's OTLP/HTTP JSON endpoint
+    (e.g. http://localhost:4318/v1/traces). Requests only put traces on a bounded
+    queue; one background sender drains it in batches. When the collector can't keep
+    up, new traces are dropped (and counted) instead of piling up in memory. Export
+    failures are logged and dropped; they never affect the request.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_queue: int = 2000,
+        batch_size: int = 100,
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self._client = httpx.AsyncClient(timeout=5.0, transport=transport)
+        self._queue: Optional[asyncio.Queue] = None
+        self._sender: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def submit(self, trace: Trace) -> None:
+        if self._closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (e.g. a sync script); nothing to export with
+        if self._sender is None or self._sender.done() or self._sender.get_loop() is not loop:
+            # Started with the first trace, on the loop that serves requests
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._sender = loop.create_task(self._send_batches())
+        try:
+            self._queue.put_nowait(trace)
+        except asyncio.QueueFull:
+            EXPORTS_DROPPED.inc(reason="queue_full")
+
+    async def _send_batches(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            traces = [trace for trace in batch if trace is not None]
+            if traces:
+                await self._post(traces)
+            if None in batch:  # Sentinel from aclose(): everything before it has been sent
+                return
+
+    async def _post(self, traces: List[Trace]) -> None:
+        try:
+            response = await self._client.post(self.endpoint, json=otlp_payload(traces, self.service_name))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            EXPORTS_DROPPED.inc(len(traces), reason="export_failed")
+            logger.warning("Trace export to %s failed: %r", self.endpoint, e, extra={"traces": len(traces)})
+
+    async def aclose(self) -> None:
+        """Sends the traces still queued, then closes the client (on shutdown)."""
+        self._closed = True
+        if self._sender is not None and not self._sender.done():
+            await self._queue.put(None)
+            await self._sender
+        await self._client.aclose()
+
+
+exporter: Optional[OTLPExporter] = (
+    OTLPExporter(
+        settings.OTLP_TRACES_ENDPOINT,
+        settings.OTLP_SERVICE_NAME,
+        max_queue=settings.OTLP_EXPORT_QUEUE_SIZE,
+        batch_size=settings.OTLP_EXPORT_BATCH_SIZE,
+    ) if settings.OTLP_TRACES_ENDPOINT else None
+)
+
+
+# ====================================================================
+# 3. ASGI Middleware
+# ====================================================================
+
+class TracingMiddleware:
+    """
+    Traces each HTTP request: the request body upload is recorded as the "upload"
+    stage, services add their own stages with span(), and the breakdown goes out as
+    a Server-Timing header. For streamed responses the header only covers the stages
+    finished before the stream started; the log record and export cover all of them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        traceparent = dict(scope["headers"]).get(b"traceparent", b"").decode("latin-1") or None
+
+        with start_trace(f"{method} {scope['path']}", traceparent) as trace:
+            upload_started: Optional[int] = None
+            uploaded = 0
+
+            async def traced_receive():
+                nonlocal upload_started, uploaded
+                if upload_started is None:
+                    upload_started = time.time_ns()
+                message = await receive()
+                if message["type"] == "http.request":
+                    uploaded += len(message.get("body", b""))
+                    if uploaded and not message.get("more_body", False):
+                        record_span("upload", upload_started, bytes=uploaded)
+                return message
+
+            async def traced_send(message):
+                if message["type"] == "http.response.start":
+                    trace.root.attributes["http.status_code"] = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, traced_receive, traced_send)
+            finally:
+                route = scope.get("route")
+                trace.root.name = f"{method} {getattr(route, 'path', scope['path'])}"
+                trace.root.attributes["http.method"] = method
@@ -0,0 +1,49 @@
+# backend/app/core/upload_limits.py
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from .settings import settings
+
+# Allowance for multipart boundaries and form fields on top of the audio itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects request bodies larger than MAX_UPLOAD_BYTES (plus multipart overhead)
+    with 413 before they are spooled to disk:
+    - immediately, when the Content-Length header is already too large;
+    - as soon as the limit is crossed, for chunked bodies without a Content-Length.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+        detail = f"Request body exceeds the {settings.MAX_UPLOAD_BYTES} byte upload limit."
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
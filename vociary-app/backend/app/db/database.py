@@ -1,8 +1,16 @@
 # backend/app/db/database.py (ASYNC POSTGRES CONFIGURATION)
 
+import time
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from ..core import metrics
 from ..core.settings import settings  # Import settings for secure URL
+from . import models
 from .models import Base  # Import the Base class from our SQLAlchemy models
 
 # --- Database URL ---
@@ -12,14 +20,81 @@ SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL.replace(
     "postgresql://", "postgresql+asyncpg://"
 )
 
+# --- Pool Checkout Telemetry ---
+POOL_WAIT = metrics.Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+POOL_TIMEOUTS = metrics.Counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT")
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """The default async queue pool, timing each checkout (including any wait for a free connection)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+def _connect_args() -> dict:
+    """asyncpg options for the prepared-statement caches."""
+    if settings.DB_PGBOUNCER_MODE:
+        # Transaction pooling may hand each statement a different server connection,
+        # so cached/named prepared statements would collide or go missing.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
 # --- Async Engine Configuration ---
-# pool_pre_ping=True helps maintain connection reliability
 async_engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL, 
-    echo=settings.DEBUG, # Log SQL queries if in debug mode
-    pool_pre_ping=True
+    echo=settings.DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args=_connect_args(),
 )
 
+# --- Query Timing (exported on /metrics) ---
+QUERY_SECONDS = metrics.Histogram(
+    "db_query_seconds", "Time per SQL statement by kind (select, insert, ...)", ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+QUERY_OPERATIONS = {"select", "insert", "update", "delete", "with"}
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    operation = keyword if keyword in QUERY_OPERATIONS else "other"
+    QUERY_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+def instrument_queries(engine) -> None:
+    """Times every statement `engine` executes (call with the AsyncEngine or its sync_engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+instrument_queries(async_engine)
+
 # --- Async Session Local ---
 # This binds the session to the async engine. 
 AsyncSessionLocal = sessionmaker(
@@ -28,6 +103,26 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False  # Good practice to allow objects to be used after commit
 )
 
+# --- Pool Occupancy (exported on /metrics) ---
+def _pool_stats() -> dict:
+    pool = async_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}  # Pools without a fixed size (e.g. NullPool, SQLite's StaticPool)
+    return {
+        ("checked_out",): pool.checkedout(),
+        ("size",): pool.size(),
+        ("capacity",): pool.size() + max(0, getattr(pool, "_max_overflow", 0)),
+    }
+
+def _pool_utilization() -> dict:
+    stats = _pool_stats()
+    if not stats or not stats[("capacity",)]:
+        return {}
+    return {(): stats[("checked_out",)] / stats[("capacity",)]}
+
+metrics.Gauge("db_pool_connections", "Connections in the DB pool by state", ["state"], callback=_pool_stats)
+metrics.Gauge("db_pool_utilization", "Checked-out connections as a fraction of pool capacity", callback=_pool_utilization)
+
 # --- Async Dependency Function for FastAPI ---
 async def get_db_async() -> AsyncSession:
     """
@@ -37,7 +132,24 @@ async def get_db_async() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
 
+# --- Connection Release Helper ---
+async def release_connection(db: AsyncSession) -> None:
+    """
+    Ends the session's current unit of work so its pooled connection is returned.
+    Call this before any slow external call (STT/LLM) so no connection is held across it.
+    Loaded objects stay readable (expire_on_commit=False); the next query checks out a
+    connection again.
+    """
+    if db.in_transaction():
+        await db.commit()
+
 # --- Initialization Function ---
+def _create_missing_indexes(connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 async def init_db_async():
     """
     Creates the database tables defined by the Base metadata asynchronously.
@@ -50,6 +162,11 @@ async def init_db_async():
             
             # Create all tables defined in Base
             await conn.run_sync(Base.metadata.create_all)
+            # create_all skips indexes on tables that already exist; add any new ones
+            await conn.run_sync(_create_missing_indexes)
+            if conn.dialect.name == "postgresql":
+                for statement in models.postgres_search_ddl(settings.SEARCH_TEXT_CONFIG):
+                    await conn.execute(text(statement))
         print("PostgreSQL tables created successfully.")
     except Exception as e:
         print(f"ERROR: Could not connect to PostgreSQL or create tables. Error: {e}")
@@ -1,6 +1,7 @@
 # backend/app/db/models.py
 
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, UniqueConstraint
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Float, ForeignKey, UniqueConstraint, Index, JSON, LargeBinary
 # from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import declarative_base
@@ -36,7 +37,7 @@ class Diary(Base):
     description = Column(String, nullable=True)
 
     # Foreign Key
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True) # Diaries are looked up per owner
 
     # Relationships
     owner = relationship("User", back_populates="diaries")
@@ -60,9 +61,72 @@ class Entry(Base):
     # Relationships
     user = relationship("User", back_populates="entries")
     diary = relationship("Diary", back_populates="entries")
+    reflection = relationship("EntryReflection", back_populates="entry", uselist=False, cascade="all, delete-orphan")
+    embedding = relationship("EntryEmbedding", back_populates="entry", uselist=False, cascade="all, delete-orphan")
 
     # Constraint to enforce the core logic: 
     # A user can only have ONE entry for a specific date in a specific diary.
     __table_args__ = (
         UniqueConstraint('user_id', 'entry_date', 'diary_id', name='_user_date_diary_uc'),
-    )
\ No newline at end of file
+        # Serves the history listing (user's entries newest first) and its keyset cursor
+        Index('ix_entries_user_date_id', 'user_id', 'entry_date', 'id'),
+    )
+
+
+def postgres_search_ddl(text_config: str) -> list:
+    """
+    Full-text search support for entries on PostgreSQL: a generated tsvector column
+    kept in sync with `content` by the database, and a GIN index over it. Applied by
+    init_db (idempotent); not mapped on Entry, so other databases (SQLite in tests)
+    don't need tsvector support.
+    """
+    return [
+        "ALTER TABLE entries ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{text_config}', coalesce(content, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_entries_content_tsv ON entries USING GIN (content_tsv)",
+    ]
+
+
+# --- 4. Entry Reflection Model ---
+
+class EntryReflection(Base):
+    """Stores the AI-generated insights for an entry, tied to the content they were generated from"""
+    __tablename__ = "entry_reflections"
+
+    # One stored reflection per entry (the primary key doubles as the lookup index)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), primary_key=True)
+    content_hash = Column(String(64), nullable=False) # SHA-256 of Entry.content at generation time
+
+    mood_score = Column(Integer, nullable=False)
+    mood_emoji = Column(String, nullable=False)
+    takeaways = Column(JSON, nullable=False)
+    action_item = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    entry = relationship("Entry", back_populates="reflection")
+
+
+# --- 5. Per-User Data Version ---
+
+class UserDataVersion(Base):
+    """Change counter for a user's entries and diaries, bumped with every write (drives listing ETags)"""
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# --- 6. Entry Embedding Model ---
+
+class EntryEmbedding(Base):
+    """Hashed TF vector of an entry's content for similar-entry lookup, stored as int8 plus a scale"""
+    __tablename__ = "entry_embeddings"
+
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False) # Indexes load per user
+    vector = Column(LargeBinary, nullable=False) # int8 bucket values, SIMILARITY_EMBEDDING_DIM bytes
+    scale = Column(Float, nullable=False) # float32 value = int8 value * scale
+
+    # Relationships
+    entry = relationship("Entry", back_populates="embedding")
@@ -2,17 +2,30 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 import uvicorn
 from contextlib import asynccontextmanager
 
 # Import configuration and setup files
 from .core.settings import settings
+from .core import log
+from .core.upload_limits import RequestSizeLimitMiddleware
+from .core.metrics import render_prometheus
+from .core.request_metrics import RequestMetricsMiddleware
+from .core import tracing
+from .core.tracing import TracingMiddleware
+from .core import security
 from .db.database import init_db_async
 from .api import endpoints, auth # Import the API router module
+from .services import ai_service, transcript_cache, job_service
 
+import asyncio
 from dotenv import load_dotenv
 load_dotenv()
 
+log.configure(settings.LOG_LEVEL)
+
 # --- 1. Database and Application Context Manager ---
 
 @asynccontextmanager
@@ -28,11 +41,30 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"FATAL ERROR during DB startup: {e}")
         # In a production environment, you might log this and exit
+
+    # 2. Open the shared, pooled HTTP client used for all Groq calls
+    ai_service.get_http_client()
+
+    # 3. Drop expired transcripts from the durable cache tier, now and then periodically
+    removed = await transcript_cache.cache.evict_expired()
+    if removed:
+        print(f"Transcript cache: evicted {removed} expired entries.")
+    cache_sweeper = asyncio.create_task(
+        transcript_cache.cache.sweep_periodically(settings.TRANSCRIPT_CACHE_SWEEP_INTERVAL_SECONDS)
+    )
+
+    # 4. Start the background job workers
+    await job_service.runner.start()
         
     yield # Application continues running here
 
     print("Application Shutdown: Cleaning up...")
-    # Add any shutdown code here (e.g., closing resource pools)
+    cache_sweeper.cancel()
+    await job_service.runner.stop()
+    await ai_service.close_http_client()
+    security.shutdown_password_hasher()
+    if tracing.exporter is not None:
+        await tracing.exporter.aclose()
 
 
 # --- 2. Application Initialization ---
@@ -46,6 +78,10 @@ app = FastAPI(
 
 # --- 3. CORS Middleware Configuration ---
 
+# Reject oversized uploads before they are read and spooled to disk. Added before
+# CORSMiddleware so it runs inside it and its 413 responses still carry CORS headers.
+app.add_middleware(RequestSizeLimitMiddleware)
+
 # This allows your frontend (e.g., React on localhost:3000) to communicate with this backend.
 app.add_middleware(
     CORSMiddleware,
@@ -54,8 +90,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allow all HTTP methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"], # Allow all headers
+    expose_headers=["Server-Timing"], # Stage breakdown readable by the frontend
+)
+
+# Compress larger responses (entry listings) for clients that accept gzip; SSE streams are left alone
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MIN_RESPONSE_BYTES,
+    compresslevel=settings.GZIP_COMPRESSION_LEVEL,
 )
 
+# Per-request stage breakdown (Server-Timing header, slow-request log records, optional OTLP export)
+app.add_middleware(TracingMiddleware)
+
+# Per-route latency for /metrics (added last = outermost, so it covers the other middleware too)
+app.add_middleware(RequestMetricsMiddleware)
+
 # --- 4. Include API Routers ---
 
 # Auth Routes: /api/v1/auth
@@ -72,6 +122,12 @@ async def read_root():
     return {"message": "AuraJournal Backend is running."}
 
 
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+async def read_metrics():
+    """Prometheus scrape endpoint (per worker process)."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 # --- 6. Uvicorn Runner (Only for direct script execution) ---
 if __name__ == "__main__":
     uvicorn.run(
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from pydantic import ConfigDict
 
 # --- 1. User Schemas ---
@@ -58,6 +58,47 @@ class Entry(EntryBase):
     #     from_attributes = True
     model_config = ConfigDict(from_attributes=True)
 
+class EntrySummary(BaseModel):
+    """Compact listing row (?view=summary): an excerpt and the length instead of the full content"""
+    id: int
+    user_id: int
+    diary_id: int
+    entry_date: date
+    excerpt: str
+    length: int  # Characters in the full content
+
+    model_config = ConfigDict(from_attributes=True)
+
+EntryView = Literal["full", "summary"]
+
+class EntrySearchHit(BaseModel):
+    """One search result: where the entry is, how well it matched and a highlighted snippet"""
+    id: int
+    diary_id: int
+    entry_date: date
+    rank: float
+    snippet: str  # HTML-escaped entry text with matched terms wrapped in <mark>...</mark>
+
+    model_config = ConfigDict(from_attributes=True)
+
+class EntrySearchPage(BaseModel):
+    """One page of search results, best match first"""
+    items: List[EntrySearchHit]
+    next_cursor: Optional[str] = None  # None on the last page
+
+class SimilarEntry(BaseModel):
+    """An entry found by content similarity, with an excerpt to show it by"""
+    id: int
+    diary_id: int
+    entry_date: date
+    score: float  # Cosine similarity of the IDF-weighted term vectors, 0..1
+    excerpt: str
+
+class EntryPage(BaseModel):
+    """One page of the entry history; pass next_cursor back to get the following page"""
+    items: Union[List[Entry], List[EntrySummary]]
+    next_cursor: Optional[str] = None  # None on the last page
+
 # --- 4. Special Schema for Audio Processing Request ---
 
 class AudioProcessRequest(BaseModel):
@@ -77,6 +118,7 @@ class EntryUpdatePreview(BaseModel):
     updated_preview_content: str
     entry_date: date
     diary_id: int
+    degraded: bool = False  # True when the AI was unavailable and the preview is the raw transcript
 
 # --- 6. Refinement Schemas ---
 
@@ -0,0 +1,23 @@
+# backend/app/schemas/job.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+from .entry import EntryUpdatePreview
+
+class JobAccepted(BaseModel):
+    """Returned with 202 when work is queued as a background job"""
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+class JobStatusResponse(BaseModel):
+    """Current state of a background job; `result` is set once it has succeeded"""
+    job_id: str
+    status: str
+    result: Optional[EntryUpdatePreview] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,248 @@
+# backend/app/services/ai_scheduler.py
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from ..core import metrics
+from ..core.settings import settings
+
+
+class Priority(IntEnum):
+    """Lower value is served first."""
+    INTERACTIVE = 0  # A user is waiting on the response (refine, process_audio)
+    BACKGROUND = 1   # Nobody is blocked on it right now (reflections, async jobs)
+
+
+class SchedulerTimeoutError(Exception):
+    """Raised when a request waited longer than AI_MAX_QUEUE_WAIT_SECONDS for a slot."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Too many AI requests queued for {model}. Please retry shortly.")
+        self.retry_after = retry_after
+
+
+# --- Metrics ---
+QUEUE_DEPTH = metrics.Gauge(
+    "ai_scheduler_queue_depth", "Requests waiting for an outbound AI slot", ["model", "priority"]
+)
+QUEUE_WAIT = metrics.Histogram(
+    "ai_scheduler_wait_seconds", "Time spent waiting for an outbound AI slot", ["model", "priority"]
+)
+IN_FLIGHT = metrics.Gauge("ai_scheduler_in_flight", "Outbound AI requests currently running", ["model"])
+RATE_LIMITED = metrics.Counter(
+    "ai_provider_rate_limited_total", "429 responses received from the AI provider", ["model"]
+)
+
+
+# ====================================================================
+# 1. Token Bucket
+# ====================================================================
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` units per second, up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests wait for a full bucket
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Takes units out; may go negative when correcting an underestimate."""
+        self._refill()
+        self.available -= amount
+
+
+# ====================================================================
+# 2. Per-Model Limiter + Priority Queue
+# ====================================================================
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: Priority, sequence: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class _ModelLimiter:
+    def __init__(self, model: str, requests_per_minute: int, tokens_per_minute: Optional[int]):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0  # Set from the provider's Retry-After
+        self.in_flight = 0
+        self.waiters: List[_Waiter] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def wait_time(self, tokens: int) -> float:
+        wait = max(0.0, self.blocked_until - time.monotonic(), self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+
+class Slot:
+    """Handed to the caller while it holds a scheduler slot."""
+
+    def __init__(self, scheduler: "AIScheduler", limiter: _ModelLimiter, reserved_tokens: int):
+        self._scheduler = scheduler
+        self._limiter = limiter
+        self._reserved_tokens = reserved_tokens
+
+    def record_usage(self, total_tokens: int) -> None:
+        """Corrects the token bucket with the usage reported by the provider."""
+        if self._limiter.tokens is not None:
+            self._limiter.tokens.consume(total_tokens - self._reserved_tokens)
+            self._reserved_tokens = total_tokens
+
+    def rate_limited(self, retry_after: float) -> None:
+        """Pauses all requests for this model until the provider's Retry-After has passed."""
+        self._scheduler.penalize(self._limiter.model, retry_after)
+
+
+class AIScheduler:
+    """
+    Central gate for outbound Groq requests. Each model has its own requests-per-minute
+    and tokens-per-minute buckets and a concurrency cap; waiting requests are served in
+    priority order (then FIFO), and a 429's Retry-After pauses the whole model.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, _ModelLimiter] = {}
+        self._sequence = itertools.count()
+
+    def _limiter(self, model: str, requests_per_minute: int, tokens_per_minute: Optional[int]) -> _ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limiter = self._limiters[model] = _ModelLimiter(model, requests_per_minute, tokens_per_minute)
+        return limiter
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        requests_per_minute: int,
+        tokens_per_minute: Optional[int] = None,
+        estimated_tokens: int = 0,
+        priority: Optional[Priority] = None,
+    ) -> AsyncIterator[Slot]:
+        """Waits for capacity, then holds one of the model's concurrent slots for the block."""
+        priority = current_priority() if priority is None else priority
+        limiter = self._limiter(model, requests_per_minute, tokens_per_minute)
+        waiter = _Waiter(priority, next(self._sequence), estimated_tokens, asyncio.get_running_loop().create_future())
+
+        heapq.heappush(limiter.waiters, waiter)
+        QUEUE_DEPTH.inc(model=model, priority=priority.name.lower())
+        self._dispatch(limiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=settings.AI_MAX_QUEUE_WAIT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(limiter)  # Granted at the last moment; give it back
+            else:
+                waiter.future.cancel()
+                QUEUE_DEPTH.dec(model=model, priority=priority.name.lower())
+            if isinstance(e, asyncio.TimeoutError):
+                raise SchedulerTimeoutError(model, retry_after=max(1.0, limiter.wait_time(estimated_tokens)))
+            raise
+
+        QUEUE_WAIT.observe(time.monotonic() - waiter.enqueued_at, model=model, priority=priority.name.lower())
+        try:
+            yield Slot(self, limiter, estimated_tokens)
+        finally:
+            self._release(limiter)
+
+    def penalize(self, model: str, retry_after: float) -> None:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            return
+        RATE_LIMITED.inc(model=model)
+        limiter.blocked_until = max(limiter.blocked_until, time.monotonic() + retry_after)
+
+    def _release(self, limiter: _ModelLimiter) -> None:
+        limiter.in_flight -= 1
+        IN_FLIGHT.set(limiter.in_flight, model=limiter.model)
+        self._dispatch(limiter)
+
+    def _dispatch(self, limiter: _ModelLimiter) -> None:
+        """Grants slots to waiters in priority order while capacity and budget allow."""
+        while limiter.waiters:
+            head = limiter.waiters[0]
+            if head.future.done():  # Cancelled or timed out while queued
+                heapq.heappop(limiter.waiters)
+                continue
+            if limiter.in_flight >= settings.AI_MAX_CONCURRENT_REQUESTS:
+                return  # _release will dispatch again
+
+            wait = limiter.wait_time(head.tokens)
+            if wait > 0:
+                self._schedule_dispatch(limiter, wait)
+                return
+
+            heapq.heappop(limiter.waiters)
+            limiter.requests.consume(1)
+            if limiter.tokens is not None:
+                limiter.tokens.consume(head.tokens)
+            limiter.in_flight += 1
+            IN_FLIGHT.set(limiter.in_flight, model=limiter.model)
+            QUEUE_DEPTH.dec(model=limiter.model, priority=head.priority.name.lower())
+            head.future.set_result(None)
+
+    def _schedule_dispatch(self, limiter: _ModelLimiter, delay: float) -> None:
+        if limiter.timer is not None and not limiter.timer.cancelled():
+            limiter.timer.cancel()
+
+        def fire():
+            limiter.timer = None
+            self._dispatch(limiter)
+
+        limiter.timer = asyncio.get_running_loop().call_later(delay, fire)
+
+
+# ====================================================================
+# 3. Priority Context
+# ====================================================================
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar("ai_priority", default=Priority.INTERACTIVE)
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+@contextmanager
+def use_priority(priority: Priority) -> Iterator[None]:
+    """Runs AI calls made inside the block with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# Shared per-worker instance
+scheduler = AIScheduler()
@@ -2,16 +2,170 @@
 
 from fastapi import UploadFile
 import httpx 
-from typing import Optional
+import asyncio
+import json
+import os
+import re
+import time
+from typing import AsyncIterable, AsyncIterator, List, Optional, Tuple
+from ..core import metrics, tracing
 from ..core.settings import settings # <-- Securely import settings
-import io
+from . import audio_utils, resilience
+from .audio_utils import AudioLimitError, LimitedUploadStream
+from .ai_scheduler import Priority, SchedulerTimeoutError, scheduler, use_priority
 
 # --- Configuration is now loaded from settings ---
 GROQ_API_KEY = settings.GROQ_API_KEY
+GROQ_API_BASE_URL = settings.GROQ_API_BASE_URL
 LLM_TRANSCRIPTION_MODEL = settings.STT_MODEL_NAME
 LLM_GENERATION_MODEL = settings.LLM_MODEL_NAME
 
 
+# ====================================================================
+# 0. Shared HTTP Client (one pooled, keep-alive client per worker)
+# ====================================================================
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _build_http_client() -> httpx.AsyncClient:
+    """
+    Builds the pooled client used for every Groq call, so connections (and their
+    TCP/TLS handshakes) are reused across transcriptions and LLM calls.
+    """
+    use_http2 = settings.GROQ_HTTP2
+    if use_http2:
+        try:
+            import h2  # noqa: F401 - only needed to check that HTTP/2 support is installed
+        except ImportError:
+            print("WARNING: GROQ_HTTP2 is enabled but 'h2' is not installed. Falling back to HTTP/1.1.")
+            use_http2 = False
+
+    return httpx.AsyncClient(
+        base_url=GROQ_API_BASE_URL,
+        http2=use_http2,
+        timeout=httpx.Timeout(
+            connect=settings.GROQ_CONNECT_TIMEOUT,
+            read=settings.GROQ_READ_TIMEOUT,
+            write=settings.GROQ_WRITE_TIMEOUT,
+            pool=settings.GROQ_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY,
+        ),
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+    )
+
+async def close_http_client() -> None:
+    """Closes the shared client and its pooled connections on shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client, creating it on first use (the application lifespan
+    calls this at startup; scripts and tests that don't run it get it lazily).
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+
+class AIServiceError(Exception):
+    """Base class for Groq failures the API layer maps to a specific HTTP status."""
+
+
+class AIRateLimitError(AIServiceError):
+    """Groq answered 429, or no request slot freed up within AI_MAX_QUEUE_WAIT_SECONDS."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AIUnavailableError(AIServiceError):
+    """The circuit for this AI dependency is open; the call was not attempted."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# --- Metrics ---
+AI_CALL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 180.0)
+STT_SECONDS = metrics.Histogram(
+    "ai_stt_seconds",
+    "Groq transcription time: upload (sending the audio), response (waiting for the transcript), total (whole call)",
+    ["stage"],
+    buckets=AI_CALL_BUCKETS,
+)
+LLM_SECONDS = metrics.Histogram(
+    "ai_llm_seconds", "Successful LLM calls by task, including retries and queueing", ["task"], buckets=AI_CALL_BUCKETS
+)
+AI_TOKENS = metrics.Counter("ai_tokens_total", "Tokens reported by Groq per task", ["task", "kind"])
+
+def _stt_stage_trace():
+    """
+    httpcore trace hook for one transcription request: splits it into the time spent
+    sending the body and the time until Groq's response headers arrive.
+    """
+    marks = {}
+
+    def trace(event_name: str, info: dict) -> None:
+        _, _, event = event_name.partition(".")  # Drop the "http11."/"http2." prefix
+        marks[event] = time.perf_counter()
+        if event == "receive_response_headers.complete" and "send_request_body.complete" in marks:
+            sent = marks["send_request_body.complete"]
+            STT_SECONDS.observe(sent - marks["send_request_body.started"], stage="upload")
+            STT_SECONDS.observe(marks[event] - sent, stage="response")
+
+    return trace
+
+def _record_usage(slot, task: str, usage: dict) -> None:
+    slot.record_usage(usage.get("total_tokens", 0))
+    AI_TOKENS.inc(usage.get("prompt_tokens", 0), task=task, kind="prompt")
+    AI_TOKENS.inc(usage.get("completion_tokens", 0), task=task, kind="completion")
+
+
+def _retry_after(response: httpx.Response, default: float = 1.0) -> float:
+    """Seconds to wait according to a 429's Retry-After header."""
+    try:
+        return max(0.0, float(response.headers.get("retry-after", default)))
+    except ValueError:
+        return default
+
+def _estimate_tokens(system_prompt: str, user_prompt: str) -> int:
+    """Rough prompt size (~4 characters per token) plus the expected completion."""
+    return (len(system_prompt) + len(user_prompt)) // 4 + settings.AI_ESTIMATED_COMPLETION_TOKENS
+
+def _llm_slot(system_prompt: str, user_prompt: str):
+    return scheduler.slot(
+        LLM_GENERATION_MODEL,
+        requests_per_minute=settings.AI_LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.AI_LLM_TOKENS_PER_MINUTE,
+        estimated_tokens=_estimate_tokens(system_prompt, user_prompt),
+    )
+
+def _raise_if_rate_limited(response: httpx.Response, slot) -> None:
+    if response.status_code == 429:
+        retry_after = _retry_after(response)
+        slot.rate_limited(retry_after)
+        raise AIRateLimitError("The AI provider is rate limiting requests. Please retry shortly.", retry_after)
+
+
+def is_configured() -> bool:
+    """False when no real Groq key is set; the AI functions then return placeholder output."""
+    return bool(GROQ_API_KEY) and GROQ_API_KEY != "your_groq_api_key_here"
+
+def llm_available() -> bool:
+    """False while the LLM circuit is open (generation calls would fail fast)."""
+    return not is_configured() or resilience.breakers["llm"].is_available()
+
+
 # ====================================================================
 # 1. Speech-to-Text (STT) Function (USING GROQ API)
 # ====================================================================
@@ -20,103 +174,276 @@ async def get_transcription(audio_file: UploadFile) -> str:
     """
     Sends the audio file to the Groq ASR service and returns the raw text transcript.
     """
-    if not GROQ_API_KEY or GROQ_API_KEY == "your_groq_api_key_here":
+    if not is_configured():
         # Placeholder for development without API key
         return "Today was a really long day. I had a big presentation, and it went much better than I expected. I felt a lot of relief afterwards, and I celebrated with a nice cup of tea."
 
     try:
-        audio_data = await audio_file.read()
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
-            audio_io = io.BytesIO(audio_data)
-            
-            files = {
-                'file': (audio_file.filename, audio_io, audio_file.content_type)
-            }
-            data = {"model": LLM_TRANSCRIPTION_MODEL}
-            
-            response = await client.post(
-                "https://api.groq.com/openai/v1/audio/transcriptions", 
-                headers=headers,
-                files=files,
-                data=data
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get("text", "Error: No text returned.")
+        with tracing.span("stt", bytes=audio_file.size or 0), STT_SECONDS.time(stage="total"), \
+                resilience.breakers["stt"].guard():
+            # Long recordings: transcribe overlapping segments concurrently, then stitch
+            if settings.STT_LONG_AUDIO_ENABLED:
+                recording = await audio_utils.split_long_audio(audio_file)
+                if recording is not None:
+                    try:
+                        return await _transcribe_segments(recording)
+                    finally:
+                        recording.close()
+
+            # Stream the upload's spooled file into the request body chunk by chunk,
+            # enforcing the size limit as it goes (no full in-memory copy)
+            audio_stream = LimitedUploadStream(audio_file, settings.MAX_UPLOAD_BYTES)
+            size = audio_file.size if audio_file.size is not None else audio_utils.upload_size(audio_file.file)
 
+            async def send_upload() -> str:
+                # Every attempt iterates the stream again, from the start of the file
+                return await _post_transcription(audio_file.filename, audio_stream, size, audio_file.content_type)
+
+            # One shared file handle, so this call is retried but never hedged
+            return await resilience.call_with_retries("stt", send_upload)
+
+    except (AudioLimitError, AIServiceError):
+        raise
+    except resilience.CircuitOpenError as e:
+        raise AIUnavailableError(str(e), e.retry_after)
+    except SchedulerTimeoutError as e:
+        raise AIRateLimitError(str(e), e.retry_after)
     except httpx.HTTPStatusError as e:
         raise Exception(f"Groq STT call failed with status {e.response.status_code}: {e.response.text}")
     except Exception as e:
         raise Exception(f"An unexpected error occurred during transcription: {e}")
 
+UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+MIME_TYPE = re.compile(r"[\w.+-]+/[\w.+-]+")
+
+def _part_filename(filename: Optional[str]) -> str:
+    """
+    The client's filename reduced to letters, digits, dots, dashes and underscores, so
+    it can't break out of the part header (quotes, CR/LF); the extension is kept since
+    the STT API uses it to detect the format.
+    """
+    stem, extension = os.path.splitext(os.path.basename(filename or ""))
+    stem = UNSAFE_FILENAME_CHARS.sub("_", stem).strip("._")[:64] or "audio"
+    extension = UNSAFE_FILENAME_CHARS.sub("", extension)[:10]
+    return stem + (extension if len(extension) > 1 else "")
+
+def _multipart_upload(
+    fields: dict, filename: str, content_type: Optional[str], chunks: AsyncIterable[bytes], size: int
+) -> Tuple[AsyncIterator[bytes], dict]:
+    """
+    multipart/form-data body with `fields` and one streamed file part, plus its headers.
+    (httpx's own `files=` encoder reads file objects synchronously, on the event loop.)
+    """
+    boundary = os.urandom(16).hex()
+    head = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ) + (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{_part_filename(filename)}"\r\n'
+        f"Content-Type: {content_type if content_type and MIME_TYPE.fullmatch(content_type) else 'application/octet-stream'}\r\n\r\n"
+    ).encode("utf-8")
+    tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        async for chunk in chunks:
+            yield chunk
+        yield tail
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "Content-Length": str(len(head) + size + len(tail)),
+    }
+    return body(), headers
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+async def _post_transcription(filename: str, chunks: AsyncIterable[bytes], size: int, content_type: Optional[str]) -> str:
+    """Sends one audio file (streamed from `chunks`, `size` bytes) to the Groq transcription endpoint."""
+    content, headers = _multipart_upload({"model": LLM_TRANSCRIPTION_MODEL}, filename, content_type, chunks, size)
+
+    client = get_http_client()
+    async with scheduler.slot(LLM_TRANSCRIPTION_MODEL, requests_per_minute=settings.AI_STT_REQUESTS_PER_MINUTE) as slot:
+        response = await client.post(
+            "/audio/transcriptions",
+            content=content,
+            headers=headers,
+            extensions={"trace": _stt_stage_trace()},
+        )
+        _raise_if_rate_limited(response, slot)
+        response.raise_for_status()
+
+    data = response.json()
+    return data.get("text", "Error: No text returned.")
+
+async def _transcribe_segments(recording: "audio_utils.PcmRecording") -> str:
+    """
+    Transcribes a split recording's segments concurrently (at most
+    STT_MAX_PARALLEL_SEGMENTS at once) and stitches the partial transcripts back
+    together in order. A segment is only encoded once it gets a slot, so at most that
+    many are in memory.
+    """
+    semaphore = asyncio.Semaphore(settings.STT_MAX_PARALLEL_SEGMENTS)
+
+    async def transcribe(index: int) -> str:
+        async with semaphore:
+            segment = await recording.segment_wav(index)
+            return await resilience.call_with_retries(
+                "stt",
+                lambda: _post_transcription(f"segment-{index:03d}.wav", _single_chunk(segment), len(segment), "audio/wav"),
+                hedge=True,
+            )
+
+    parts = await asyncio.gather(*(transcribe(i) for i in range(len(recording))))
+    return audio_utils.merge_transcripts(parts)
+
 
 # ====================================================================
 # 2. LLM Core Function (Generic Call - GROQ)
 # ====================================================================
 
-async def _call_llm(system_prompt: str, user_prompt: str) -> str:
+async def _call_llm(system_prompt: str, user_prompt: str, task: str = "llm") -> str:
     """
     Handles the asynchronous API call to the Groq LLM for text generation/integration.
+    `task` labels its latency and token metrics.
     """
-    if not GROQ_API_KEY or GROQ_API_KEY == "your_groq_api_key_here":
+    if not is_configured():
         # Placeholder response for development
         return f"[[GROQ MOCK OUTPUT]]: The refined entry should be:\n\n{user_prompt[:200]}..."
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            headers = {
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "model": LLM_GENERATION_MODEL, 
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.7,
-            }
-            
+    payload = _chat_payload(system_prompt, user_prompt)
+
+    async def complete() -> str:
+        client = get_http_client()
+        async with _llm_slot(system_prompt, user_prompt) as slot:
             response = await client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
+                "/chat/completions",
                 json=payload
             )
+            _raise_if_rate_limited(response, slot)
             response.raise_for_status()
-            
+
             data = response.json()
-            return data['choices'][0]['message']['content']
+            if "usage" in data:
+                _record_usage(slot, task, data["usage"])
+        return data['choices'][0]['message']['content']
+
+    started = time.monotonic()
+    try:
+        with tracing.span("llm", task=task), resilience.breakers["llm"].guard():
+            content = await resilience.call_with_retries("llm", complete, hedge=True)
+        LLM_SECONDS.observe(time.monotonic() - started, task=task)
+        return content
 
+    except AIServiceError:
+        raise
+    except resilience.CircuitOpenError as e:
+        raise AIUnavailableError(str(e), e.retry_after)
+    except SchedulerTimeoutError as e:
+        raise AIRateLimitError(str(e), e.retry_after)
     except httpx.HTTPStatusError as e:
         raise Exception(f"Groq LLM call failed: {e.response.text}")
     except Exception as e:
         raise Exception(f"An unexpected error occurred during LLM call: {e}")
 
+async def _stream_llm(system_prompt: str, user_prompt: str, task: str = "llm") -> AsyncIterator[str]:
+    """
+    Streaming variant of _call_llm: requests `stream: true` and yields content deltas
+    as soon as Groq sends them (OpenAI-compatible SSE chunks).
+    """
+    if not is_configured():
+        # Placeholder response for development, delivered word by word
+        mock_output = f"[[GROQ MOCK OUTPUT]]: The refined entry should be:\n\n{user_prompt[:200]}..."
+        for piece in re.findall(r"\S+\s*", mock_output):
+            yield piece
+        return
+
+    payload = _chat_payload(system_prompt, user_prompt, stream=True)
+    started = time.monotonic()
+    started_ns = time.time_ns()  # Recorded as an "llm" span once the stream ends
+    retry = 0
+    try:
+        with resilience.breakers["llm"].guard():
+            while True:
+                received_any = False
+                try:
+                    async for delta in _stream_completion(system_prompt, user_prompt, payload, task):
+                        received_any = True
+                        yield delta
+                    LLM_SECONDS.observe(time.monotonic() - started, task=task)
+                    tracing.record_span("llm", started_ns, task=task, streamed=True)
+                    return
+                except Exception as e:
+                    # Only retried before the first delta; sent text can't be taken back
+                    if received_any or not await resilience.sleep_before_retry("llm_stream", retry, e, started):
+                        raise
+                    retry += 1
+
+    except AIServiceError:
+        raise
+    except resilience.CircuitOpenError as e:
+        raise AIUnavailableError(str(e), e.retry_after)
+    except SchedulerTimeoutError as e:
+        raise AIRateLimitError(str(e), e.retry_after)
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Groq LLM call failed: {e.response.text}")
+    except Exception as e:
+        raise Exception(f"An unexpected error occurred during LLM streaming: {e}")
+
+async def _stream_completion(system_prompt: str, user_prompt: str, payload: dict, task: str) -> AsyncIterator[str]:
+    """A single streaming chat completions request (one attempt of _stream_llm)."""
+    client = get_http_client()
+    async with _llm_slot(system_prompt, user_prompt) as slot:
+        async with client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                _raise_if_rate_limited(response, slot)
+                response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage")
+                if usage:
+                    _record_usage(slot, task, usage)
+                delta = chunk['choices'][0].get('delta', {}).get('content') if chunk.get('choices') else None
+                if delta:
+                    yield delta
+
+def _chat_payload(system_prompt: str, user_prompt: str, stream: bool = False) -> dict:
+    """Builds the chat completions request body shared by _call_llm and _stream_llm."""
+    payload = {
+        "model": LLM_GENERATION_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.7,
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
 
 # ====================================================================
 # 3. LLM Task-Specific Functions
 # ====================================================================
 
-async def generate_initial_entry(transcript: str) -> str:
-    """
-    Analyzes a raw transcript and generates a coherent, reflective diary entry.
-    """
+def _initial_entry_prompts(transcript: str) -> Tuple[str, str]:
     system_prompt = (
         "You are an empathetic, reflective journal AI. Your task is to analyze the user's raw transcript "
         "of their day and synthesize it into a coherent, personal, first-person diary entry. "
         "Focus on emotions, key events, and future tasks. Maintain a warm, thoughtful tone."
     )
     user_prompt = f"Raw Transcript to be transformed into a diary entry:\n\n{transcript}"
-    
-    return await _call_llm(system_prompt, user_prompt)
+    return system_prompt, user_prompt
 
-async def integrate_new_content(new_transcript: str, existing_entry: str) -> str:
-    """
-    Integrates a new audio transcript into an existing diary entry for the same day.
-    """
+def _integration_prompts(new_transcript: str, existing_entry: str) -> Tuple[str, str]:
     system_prompt = (
         "The user has added new reflections to an existing diary entry for today. "
         "Your task is to seamlessly integrate the 'New Content' into the 'Existing Entry' "
@@ -127,13 +454,9 @@ async def integrate_new_content(new_transcript: str, existing_entry: str) -> str
         f"Existing Entry:\n---\n{existing_entry}\n---\n\n"
         f"New Content to Integrate:\n---\n{new_transcript}\n---"
     )
+    return system_prompt, user_prompt
 
-    return await _call_llm(system_prompt, user_prompt)
-
-async def refine_entry(current_content: str, selected_text: str, user_instruction: str) -> str:
-    """
-    Refines the diary entry based on specific user instructions applied to a selected segment.
-    """
+def _refinement_prompts(current_content: str, selected_text: str, user_instruction: str) -> Tuple[str, str]:
     system_prompt = (
         "You are an expert editor for a personal diary. Your goal is to modify the 'Current Entry' "
         "based on the user's specific instruction. "
@@ -142,15 +465,51 @@ async def refine_entry(current_content: str, selected_text: str, user_instructio
         "You must rewrite the entry to incorporate this change naturally. "
         "Maintain the original voice and context. Return ONLY the fully updated entry text."
     )
-    
     user_prompt = (
         f"Current Entry:\n---\n{current_content}\n---\n\n"
         f"Selected Text (to be changed): \"{selected_text}\"\n"
         f"User Instruction/Comment: \"{user_instruction}\"\n\n"
         f"Please provide the updated full entry:"
     )
+    return system_prompt, user_prompt
 
-    return await _call_llm(system_prompt, user_prompt)
+async def generate_initial_entry(transcript: str) -> str:
+    """
+    Analyzes a raw transcript and generates a coherent, reflective diary entry.
+    """
+    return await _call_llm(*_initial_entry_prompts(transcript), task="generate_initial_entry")
+
+async def integrate_new_content(new_transcript: str, existing_entry: str) -> str:
+    """
+    Integrates a new audio transcript into an existing diary entry for the same day.
+    """
+    return await _call_llm(*_integration_prompts(new_transcript, existing_entry), task="integrate_new_content")
+
+async def refine_entry(current_content: str, selected_text: str, user_instruction: str) -> str:
+    """
+    Refines the diary entry based on specific user instructions applied to a selected segment.
+    """
+    return await _call_llm(*_refinement_prompts(current_content, selected_text, user_instruction), task="refine_entry")
+
+def stream_initial_entry(transcript: str) -> AsyncIterator[str]:
+    """Streaming variant of generate_initial_entry (yields text deltas)."""
+    return _stream_llm(*_initial_entry_prompts(transcript), task="generate_initial_entry")
+
+def stream_integrated_content(new_transcript: str, existing_entry: str) -> AsyncIterator[str]:
+    """Streaming variant of integrate_new_content (yields text deltas)."""
+    return _stream_llm(*_integration_prompts(new_transcript, existing_entry), task="integrate_new_content")
+
+def stream_refined_entry(current_content: str, selected_text: str, user_instruction: str) -> AsyncIterator[str]:
+    """Streaming variant of refine_entry (yields text deltas)."""
+    return _stream_llm(*_refinement_prompts(current_content, selected_text, user_instruction), task="refine_entry")
+
+# Returned when the model's reply can't be parsed (never persisted as a stored reflection)
+FALLBACK_REFLECTION = {
+    "mood_score": 5,
+    "mood_emoji": "😐",
+    "takeaways": ["Could not parse insights.", "Please try again later.", "Keep journaling!"],
+    "action_item": "Reflect on your day manually."
+}
 
 async def generate_daily_reflection(entry_text: str) -> dict:
     """
@@ -159,8 +518,6 @@ async def generate_daily_reflection(entry_text: str) -> dict:
     - Key Takeaways (List)
     - Action Item (Single actionable step)
     """
-    import json
-    
     system_prompt = (
         "You are an insightful personal growth assistant. Analyze the user's diary entry and "
         "extract structured insights. You must return ONLY a valid JSON object with the following keys:\n"
@@ -172,7 +529,9 @@ async def generate_daily_reflection(entry_text: str) -> dict:
     )
     user_prompt = f"Diary Entry to Analyze:\n\n{entry_text}"
 
-    response_text = await _call_llm(system_prompt, user_prompt)
+    # Nobody is blocked on a reflection, so interactive requests go first
+    with use_priority(Priority.BACKGROUND):
+        response_text = await _call_llm(system_prompt, user_prompt, task="generate_daily_reflection")
     
     # Clean up POTENTIAL markdown backticks if the model ignores instruction
     cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
@@ -181,9 +540,4 @@ async def generate_daily_reflection(entry_text: str) -> dict:
         return json.loads(cleaned_text)
     except json.JSONDecodeError:
         # Fallback if JSON parsing fails
-        return {
-            "mood_score": 5,
-            "mood_emoji": "😐",
-            "takeaways": ["Could not parse insights.", "Please try again later.", "Keep journaling!"],
-            "action_item": "Reflect on your day manually."
-        }
\ No newline at end of file
+        return dict(FALLBACK_REFLECTION)
\ No newline at end of file
@@ -0,0 +1,423 @@
+# backend/app/services/audio_utils.py
+
+import asyncio
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import wave
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+
+import numpy as np
+from fastapi import UploadFile
+
+from ..core.settings import settings
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes per read when streaming an upload to STT
+
+
+class AudioLimitError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES or MAX_AUDIO_DURATION_SECONDS."""
+
+
+# ====================================================================
+# 1. Streaming Upload Body
+# ====================================================================
+
+class LimitedUploadStream:
+    """
+    Async iterator over an upload's bytes, handed to httpx as the multipart file part
+    so the body is streamed in chunks instead of being read into memory. Reads go
+    through UploadFile.read, which runs in a worker thread once the spool has rolled
+    over to disk, so the event loop never blocks on file I/O. Each iteration (retry)
+    starts from the beginning. Raises AudioLimitError as soon as more than `max_bytes`
+    have been read.
+    """
+
+    def __init__(self, upload: UploadFile, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE):
+        self._upload = upload
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        await self._upload.seek(0)
+        self.bytes_read = 0
+        while chunk := await self._upload.read(self.chunk_size):
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise AudioLimitError(f"Audio upload exceeds the {self.max_bytes} byte limit.")
+            yield chunk
+
+
+# ====================================================================
+# 2. Upload Limits
+# ====================================================================
+
+def upload_size(fileobj: BinaryIO) -> int:
+    """Size of a seekable file without reading it; the position is restored."""
+    position = fileobj.tell()
+    size = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(position)
+    return size
+
+def probe_wav_duration(fileobj: BinaryIO) -> Optional[float]:
+    """
+    Duration in seconds read from a WAV header, or None for other formats
+    (compressed formats can't be measured without decoding them).
+    """
+    position = fileobj.tell()
+    try:
+        fileobj.seek(0)
+        with wave.open(fileobj, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+    finally:
+        fileobj.seek(position)
+
+def check_upload_limits(audio_file: UploadFile) -> None:
+    """
+    Rejects oversized or overlong uploads before any STT work starts.
+    Raises AudioLimitError.
+    """
+    size = audio_file.size if audio_file.size is not None else upload_size(audio_file.file)
+    if size > settings.MAX_UPLOAD_BYTES:
+        raise AudioLimitError(
+            f"Audio upload is {size} bytes; the limit is {settings.MAX_UPLOAD_BYTES} bytes."
+        )
+
+    duration = probe_wav_duration(audio_file.file)
+    if duration is not None and duration > settings.MAX_AUDIO_DURATION_SECONDS:
+        raise AudioLimitError(
+            f"Audio is {duration:.0f} seconds long; the limit is {settings.MAX_AUDIO_DURATION_SECONDS} seconds."
+        )
+
+
+# ====================================================================
+# 3. Long-Audio Mode (decode -> split on silence -> stitch transcripts)
+# ====================================================================
+
+DECODE_SAMPLE_RATE = 16000  # What ffmpeg resamples to; Whisper works at 16 kHz internally
+ENERGY_WINDOW_SECONDS = 0.02
+PROBE_BYTES = 2 * 1024 * 1024  # Container headers are near the start; ffprobe never needs the whole upload
+PCM_CHUNK_SECONDS = 10  # Decoded audio is handled this much at a time; memory doesn't grow with length
+
+
+class PcmRecording:
+    """
+    A decoded recording as mono int16 PCM in an on-disk temp file, with the energy of
+    every ENERGY_WINDOW_SECONDS window (computed while decoding) and, once split, the
+    segment bounds. Segments are read and encoded one at a time, on demand. Close it
+    when done.
+    """
+
+    def __init__(self, file: BinaryIO, rate: int, samples: int, energy: np.ndarray):
+        self.file = file
+        self.rate = rate
+        self.samples = samples
+        self.energy = energy
+        self.bounds: List[Tuple[int, int]] = []
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.rate
+
+    def __len__(self) -> int:
+        return len(self.bounds)
+
+    async def segment_wav(self, index: int) -> bytes:
+        """Segment `index` as a WAV file (read with pread, so concurrent segments don't race on the position)."""
+        start, end = self.bounds[index]
+        data = await asyncio.to_thread(os.pread, self.file.fileno(), (end - start) * 2, start * 2)
+        return encode_wav(np.frombuffer(data, dtype=np.int16), self.rate)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _PcmWriter:
+    """Appends mono PCM chunks to a temp file, tracking window energy and the duration cap."""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.window = max(1, int(rate * ENERGY_WINDOW_SECONDS))
+        self.max_samples = settings.MAX_AUDIO_DURATION_SECONDS * rate
+        self.file = tempfile.TemporaryFile()
+        self.samples = 0
+        self._energy: List[np.ndarray] = []
+        self._carry = np.empty(0, dtype=np.int16)
+
+    def write(self, chunk: np.ndarray) -> None:
+        self.samples += len(chunk)
+        if self.samples > self.max_samples:
+            raise AudioLimitError(
+                f"Audio is longer than the limit of {settings.MAX_AUDIO_DURATION_SECONDS} seconds."
+            )
+        self.file.write(chunk.tobytes())
+        pending = np.concatenate((self._carry, chunk))
+        whole = len(pending) // self.window * self.window
+        self._energy.append(window_energy(pending[:whole], self.window))
+        self._carry = pending[whole:]
+
+    def finish(self) -> Optional[PcmRecording]:
+        if not self.samples:
+            self.file.close()
+            return None
+        energy = np.concatenate(self._energy) if self._energy else np.empty(0, dtype=np.float32)
+        return PcmRecording(self.file, self.rate, self.samples, energy)
+
+    def abort(self) -> None:
+        self.file.close()
+
+
+async def split_long_audio(audio_file: UploadFile) -> Optional[PcmRecording]:
+    """
+    Returns the recording, decoded and split into overlapping segments (read them with
+    segment_wav, then close it), when it is longer than STT_LONG_AUDIO_THRESHOLD_SECONDS;
+    or None when it should be sent as a single file (short recordings, or formats that
+    can't be decoded in this environment). Raises AudioLimitError for recordings over
+    MAX_AUDIO_DURATION_SECONDS.
+    """
+    duration = await asyncio.to_thread(probe_wav_duration, audio_file.file)  # The spool may be on disk
+    if duration is None:
+        if upload_size(audio_file.file) < settings.STT_LONG_AUDIO_MIN_BYTES:
+            return None  # Too small to be long; not worth probing
+        duration = await probe_duration(audio_file)
+    if duration is not None and duration > settings.MAX_AUDIO_DURATION_SECONDS:
+        raise AudioLimitError(
+            f"Audio is {duration:.0f} seconds long; the limit is {settings.MAX_AUDIO_DURATION_SECONDS} seconds."
+        )
+    # Only recordings known (or, without duration metadata, possibly) to be long are decoded
+    if duration is not None and duration <= settings.STT_LONG_AUDIO_THRESHOLD_SECONDS:
+        return None
+
+    recording = await decode_to_pcm(audio_file)
+    await audio_file.seek(0)
+    if recording is None:
+        return None
+    if recording.duration <= settings.STT_LONG_AUDIO_THRESHOLD_SECONDS:
+        recording.close()
+        return None
+
+    recording.bounds = silence_cuts(
+        recording.energy,
+        recording.samples,
+        recording.rate,
+        segment_seconds=settings.STT_SEGMENT_SECONDS,
+        overlap_seconds=settings.STT_SEGMENT_OVERLAP_SECONDS,
+        search_seconds=settings.STT_SILENCE_SEARCH_SECONDS,
+    )
+    return recording
+
+async def probe_duration(audio_file: UploadFile) -> Optional[float]:
+    """
+    Duration in seconds of a compressed upload from its container header, via ffprobe
+    on the first PROBE_BYTES. When the header has no duration (piped mp3, streamed
+    webm) it is estimated from the bitrate and the upload size. None if ffprobe isn't
+    installed or reports neither.
+    """
+    format_info = await _ffprobe_format(audio_file)
+    if not format_info:
+        return None
+    try:
+        return float(format_info["duration"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    try:
+        bit_rate = float(format_info["bit_rate"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return upload_size(audio_file.file) * 8 / bit_rate if bit_rate > 0 else None
+
+async def _ffprobe_format(audio_file: UploadFile) -> Optional[dict]:
+    """ffprobe's `format` section (duration, bit_rate) for the start of the upload."""
+    if shutil.which("ffprobe") is None:
+        return None
+
+    await audio_file.seek(0)
+    head = await audio_file.read(PROBE_BYTES)
+    await audio_file.seek(0)
+    process = await asyncio.create_subprocess_exec(
+        "ffprobe", "-v", "error", "-show_entries", "format=duration,bit_rate", "-of", "json", "pipe:0",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    output, _ = await process.communicate(head)  # Tolerates ffprobe closing stdin once it has the header
+    try:
+        return json.loads(output or b"{}").get("format")
+    except ValueError:
+        return None
+
+async def decode_to_pcm(audio_file: UploadFile) -> Optional[PcmRecording]:
+    """
+    Decodes an upload to mono int16 PCM in a temp file, PCM_CHUNK_SECONDS at a time.
+    WAV (16-bit) is read with the stdlib; other formats (webm/ogg/mp3) are piped
+    through ffmpeg when it is installed. Returns None if the audio can't be decoded;
+    raises AudioLimitError once more than MAX_AUDIO_DURATION_SECONDS have been decoded.
+    """
+    await audio_file.seek(0)
+    recording = await asyncio.to_thread(_read_wav_pcm, audio_file.file)
+    if recording is not None:
+        return recording
+
+    if shutil.which("ffmpeg") is None:
+        return None
+
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+        "-t", str(settings.MAX_AUDIO_DURATION_SECONDS + 1),  # Enough to tell it is over the limit
+        "-f", "s16le", "-ac", "1", "-ar", str(DECODE_SAMPLE_RATE), "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def feed_upload():
+        await audio_file.seek(0)
+        try:
+            while chunk := await audio_file.read(1024 * 1024):
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg gave up on the input (or hit -t); its exit code tells us
+        finally:
+            process.stdin.close()
+
+    writer = _PcmWriter(DECODE_SAMPLE_RATE)
+    feeder = asyncio.create_task(feed_upload())
+    chunk_bytes = DECODE_SAMPLE_RATE * PCM_CHUNK_SECONDS * 2
+    carry = b""
+    try:
+        while data := await process.stdout.read(chunk_bytes):
+            data = carry + data
+            whole = len(data) - len(data) % 2  # Never split a sample across reads
+            carry = data[whole:]
+            await asyncio.to_thread(writer.write, np.frombuffer(data[:whole], dtype=np.int16))
+    except BaseException:
+        writer.abort()
+        if process.returncode is None:
+            process.kill()
+        raise
+    finally:
+        await feeder
+        await process.wait()
+
+    if process.returncode != 0:
+        writer.abort()
+        return None
+    return writer.finish()
+
+def _read_wav_pcm(fileobj: BinaryIO) -> Optional[PcmRecording]:
+    writer = None
+    try:
+        fileobj.seek(0)
+        with wave.open(fileobj, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                return None
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            writer = _PcmWriter(rate)
+            while frames := wav.readframes(rate * PCM_CHUNK_SECONDS):
+                samples = np.frombuffer(frames, dtype=np.int16)
+                if channels > 1:
+                    # Downmix one chunk at a time (float32, not a float64 copy of the whole file)
+                    samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32).astype(np.int16)
+                writer.write(samples)
+    except (wave.Error, EOFError):
+        if writer is not None:
+            writer.abort()
+        return None
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        fileobj.seek(0)
+    return writer.finish()
+
+def window_energy(samples: np.ndarray, window: int) -> np.ndarray:
+    """Mean energy of each whole `window`-sample window (a trailing partial window is dropped)."""
+    windows = len(samples) // window
+    block = samples[: windows * window].astype(np.float32)
+    np.square(block, out=block)
+    return block.reshape(windows, window).mean(axis=1)
+
+def split_on_silence(
+    samples: np.ndarray,
+    rate: int,
+    segment_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float,
+) -> List[Tuple[int, int]]:
+    """silence_cuts() for samples held in memory."""
+    window = max(1, int(rate * ENERGY_WINDOW_SECONDS))
+    return silence_cuts(
+        window_energy(samples, window), len(samples), rate, segment_seconds, overlap_seconds, search_seconds
+    )
+
+def silence_cuts(
+    energy: np.ndarray,
+    total: int,
+    rate: int,
+    segment_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float,
+) -> List[Tuple[int, int]]:
+    """
+    Splits a recording of `total` samples, given the energy of each 20 ms window, into
+    [start, end) sample ranges of about `segment_seconds`. Each cut is moved to the
+    quietest window within `search_seconds` of the target, and neighbouring segments
+    share `overlap_seconds` of audio around the cut so no word is lost at a boundary.
+    """
+    window = max(1, int(rate * ENERGY_WINDOW_SECONDS))
+    segment = int(segment_seconds * rate)
+    search = int(search_seconds * rate)
+    half_overlap = int(overlap_seconds * rate / 2)
+
+    bounds = []
+    start = 0
+    while total - start > segment + search:
+        target = start + segment
+        low = max(start + segment // 2, target - search) // window
+        high = min(total, target + search) // window
+        cut = (low + int(np.argmin(energy[low:high]))) * window + window // 2
+
+        bounds.append((start, min(total, cut + half_overlap)))
+        start = max(0, cut - half_overlap)
+
+    bounds.append((start, total))
+    return bounds
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    """Encodes mono int16 PCM as an in-memory WAV file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+def merge_transcripts(parts: List[str], max_overlap_words: int = 15) -> str:
+    """
+    Joins segment transcripts in order. Words transcribed twice because of the segment
+    overlap are dropped: the longest run (2+ words) that ends one part and starts the
+    next is kept once.
+    """
+    def normalize(word: str) -> str:
+        return re.sub(r"[^\w']", "", word.lower())
+
+    merged: List[str] = []
+    for part in parts:
+        words = part.split()
+        overlap = 0
+        for size in range(min(max_overlap_words, len(merged), len(words)), 1, -1):
+            if [normalize(w) for w in merged[-size:]] == [normalize(w) for w in words[:size]]:
+                overlap = size
+                break
+        merged.extend(words[overlap:])
+    return " ".join(merged)
@@ -1,33 +1,34 @@
 # backend/app/services/diary_service.py (ASYNC VERSION)
 
-from sqlalchemy import select, update
+from sqlalchemy import select, func, literal, literal_column, or_, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession # Use AsyncSession
 from datetime import date
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import base64
+import hashlib
+import html
+import json
+import re
 
 # Import SQLAlchemy Models and Pydantic Schemas
+from ..core import tracing
 from ..db import models
 from ..schemas import entry as schemas 
+from ..core.settings import settings
+from ..db.database import release_connection
 from . import ai_service # Import the AI Service to orchestrate the flow
+from . import transcript_cache
+from . import vector_index
 
 
 # ====================================================================
 # A. CORE ENTRY CRUD OPERATIONS (ASYNC)
 # ====================================================================
 
-async def get_entry_by_key(db: AsyncSession, user_id: int, entry_date: date, diary_id: int) -> Optional[models.Entry]:
-    """
-    Retrieves a single entry based on the unique combination of user, date, and diary.
-    """
-    stmt = select(models.Entry).filter(
-        models.Entry.user_id == user_id,
-        models.Entry.entry_date == entry_date,
-        models.Entry.diary_id == diary_id
-    )
-    result = await db.execute(stmt)
-    return result.scalars().first()
-
 async def get_entry_by_date(db: AsyncSession, user_id: int, entry_date: date) -> Optional[models.Entry]:
     """
     Retrieves the first entry for a given user on a given date (used to check if any entry exists).
@@ -39,45 +40,136 @@ async def get_entry_by_date(db: AsyncSession, user_id: int, entry_date: date) ->
     result = await db.execute(stmt)
     return result.scalars().first()
 
-async def create_entry(db: AsyncSession, user_id: int, entry_data: schemas.EntryCreate) -> models.Entry:
+async def upsert_entry(db: AsyncSession, user_id: int, entry_data: schemas.EntryCreate) -> models.Entry:
     """
-    Creates a new diary entry in the database.
+    Creates the entry or replaces the content of the existing one for the same
+    (user, date, diary) in a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING,
+    so concurrent commits for the same key can't race into the unique constraint.
+    A stored reflection for the old content is ignored via its content hash.
     """
-    db_entry = models.Entry(
+    stmt = _dialect_insert(db, models.Entry).values(
         user_id=user_id,
         content=entry_data.content,
         entry_date=entry_data.entry_date,
-        diary_id=entry_data.diary_id
+        diary_id=entry_data.diary_id,
     )
-    db.add(db_entry)
-    await db.commit() # Await commit
-    await db.refresh(db_entry) # Await refresh
-    return db_entry
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Entry.user_id, models.Entry.entry_date, models.Entry.diary_id],
+        set_={"content": stmt.excluded.content},
+    ).returning(models.Entry).execution_options(populate_existing=True)
+
+    result = await db.execute(stmt)
+    entry = result.scalars().one()
+    version = await bump_data_version(db, user_id)
+    vector = await store_embedding(db, user_id, entry.id, entry.content)
+    await db.commit()
+    vector_index.indexes.apply(user_id, version, entry.id, vector)
+    return entry
 
-async def update_entry(db: AsyncSession, entry_id: int, new_content: str) -> Optional[models.Entry]:
+def _listing_select(view: str = "full"):
     """
-    Updates the content of an existing diary entry (used for same-day modification).
+    SELECT for entry listings. The summary view only reads an excerpt and the length
+    of `content` (computed in the database), never the full text.
     """
-    stmt = update(models.Entry).where(models.Entry.id == entry_id).values(content=new_content).returning(models.Entry)
-    
+    if view != "summary":
+        return select(models.Entry)
+    return select(
+        models.Entry.id,
+        models.Entry.user_id,
+        models.Entry.diary_id,
+        models.Entry.entry_date,
+        func.substr(models.Entry.content, 1, settings.ENTRY_SUMMARY_EXCERPT_CHARS).label("excerpt"),
+        func.length(models.Entry.content).label("length"),
+    )
+
+async def _fetch_listing(db: AsyncSession, stmt, view: str) -> list:
     result = await db.execute(stmt)
-    await db.commit()
-    
-    # We must fetch the updated object for the return value
-    updated_entry = result.scalars().first() 
-    return updated_entry
+    return result.all() if view == "summary" else result.scalars().all()
 
-async def get_entries_by_date(db: AsyncSession, user_id: int, entry_date: date) -> List[models.Entry]:
+async def get_entries_by_date(db: AsyncSession, user_id: int, entry_date: date, view: str = "full") -> list:
     """
     Retrieves all entries for a specific user on a specific date (across all diaries).
     """
-    stmt = select(models.Entry).filter(
+    stmt = _listing_select(view).filter(
         models.Entry.user_id == user_id,
         models.Entry.entry_date == entry_date
     ).order_by(models.Entry.id) # Simple ordering
     
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return await _fetch_listing(db, stmt, view)
+
+
+# ====================================================================
+# A1. PER-USER DATA VERSION (validators for listing ETags)
+# ====================================================================
+
+def _dialect_insert(db: AsyncSession, table):
+    """INSERT with ON CONFLICT support for the session's dialect (SQLite in tests)."""
+    dialect = db.get_bind().dialect.name
+    return (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table)
+
+async def bump_data_version(db: AsyncSession, user_id: int) -> int:
+    """
+    Increments the user's data version inside the caller's transaction and returns the
+    new version. Call it from every write that changes what the entry/diary listings return.
+    """
+    stmt = _dialect_insert(db, models.UserDataVersion).values(user_id=user_id, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.UserDataVersion.user_id],
+        set_={"version": models.UserDataVersion.version + 1},
+    ).returning(models.UserDataVersion.version)
+    return (await db.execute(stmt)).scalar_one()
+
+async def get_data_version(db: AsyncSession, user_id: int) -> int:
+    """The user's current data version (0 before their first write); one primary-key read."""
+    stmt = select(models.UserDataVersion.version).filter(models.UserDataVersion.user_id == user_id)
+    return (await db.execute(stmt)).scalar() or 0
+
+
+# ====================================================================
+# A2. STORED REFLECTIONS (ASYNC)
+# ====================================================================
+
+def content_hash(content: str) -> str:
+    """SHA-256 of an entry's content; a stored reflection is only valid for the same hash."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+async def get_entry_with_reflection(db: AsyncSession, entry_id: int) -> Tuple[Optional[models.Entry], Optional[models.EntryReflection]]:
+    """
+    Fetches an entry and its stored reflection in one indexed read.
+    The reflection is returned only if it was generated from the entry's current content.
+    """
+    stmt = select(models.Entry, models.EntryReflection).outerjoin(
+        models.EntryReflection, models.EntryReflection.entry_id == models.Entry.id
+    ).filter(models.Entry.id == entry_id)
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        return None, None
+
+    entry, reflection = row
+    if reflection is not None and reflection.content_hash != content_hash(entry.content):
+        reflection = None
+    return entry, reflection
+
+async def save_reflection(db: AsyncSession, entry_id: int, content: str, insights: dict) -> models.EntryReflection:
+    """
+    Stores (or replaces) the reflection for an entry, keyed by the content it describes.
+    """
+    reflection = await db.get(models.EntryReflection, entry_id)
+    if reflection is None:
+        reflection = models.EntryReflection(entry_id=entry_id)
+        db.add(reflection)
+
+    reflection.content_hash = content_hash(content)
+    reflection.mood_score = insights["mood_score"]
+    reflection.mood_emoji = insights["mood_emoji"]
+    reflection.takeaways = insights["takeaways"]
+    reflection.action_item = insights["action_item"]
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request stored one first; it describes the same content
+        await db.rollback()
+    return reflection
 
 
 # ====================================================================
@@ -85,8 +177,26 @@ async def get_entries_by_date(db: AsyncSession, user_id: int, entry_date: date)
 # ====================================================================
 
 async def get_transcription(audio_file) -> str:
-    """Wrapper for the STT function in ai_service."""
-    return await ai_service.get_transcription(audio_file)
+    """
+    Wrapper for the STT function in ai_service.
+    Consults the transcript cache first, so retries of the same recording skip STT.
+    """
+    if not settings.TRANSCRIPT_CACHE_ENABLED or not ai_service.is_configured():
+        # Placeholder transcripts from the mock mode are never cached
+        return await ai_service.get_transcription(audio_file)
+
+    key = await transcript_cache.audio_cache_key(audio_file, settings.STT_MODEL_NAME)
+    cached = await transcript_cache.cache.get(key)
+    if cached is not None:
+        return cached
+
+    transcript = await ai_service.get_transcription(audio_file)
+    try:
+        await transcript_cache.cache.set(key, transcript)
+    except OSError as e:
+        # The durable tier is best-effort; STT succeeded, so the request must not fail over it
+        print(f"Transcript cache write failed: {e!r}")
+    return transcript
 
 async def integrate_new_content(new_transcript: str, existing_content: str) -> str:
     """Wrapper for the LLM integration function."""
@@ -100,15 +210,161 @@ async def refine_entry(current_content: str, selected_text: str, user_instructio
     """Wrapper for the LLM refinement function."""
     return await ai_service.refine_entry(current_content, selected_text, user_instruction)
 
-async def get_recent_entries(db: AsyncSession, user_id: int, limit: int = 10, offset: int = 0) -> List[models.Entry]:
+def stream_initial_entry(transcript: str) -> AsyncIterator[str]:
+    """Wrapper for the streaming LLM initial generation function."""
+    return ai_service.stream_initial_entry(transcript)
+
+def stream_integrated_content(new_transcript: str, existing_content: str) -> AsyncIterator[str]:
+    """Wrapper for the streaming LLM integration function."""
+    return ai_service.stream_integrated_content(new_transcript, existing_content)
+
+def stream_refined_entry(current_content: str, selected_text: str, user_instruction: str) -> AsyncIterator[str]:
+    """Wrapper for the streaming LLM refinement function."""
+    return ai_service.stream_refined_entry(current_content, selected_text, user_instruction)
+
+# ====================================================================
+# B2. ENTRY PREVIEW PIPELINE (Audio -> Transcript -> LLM preview)
+# ====================================================================
+
+async def resolve_preview_target(db: AsyncSession, user_id: int, entry_date: date) -> Tuple[Optional[str], int]:
+    """
+    Short DB unit of work before the LLM call. Returns the content of the existing entry
+    for the day (None if there is none) and the diary the preview belongs to, then
+    releases the connection.
+    """
+    with tracing.span("db.lookup"):
+        existing_entry = await get_entry_by_date(db, user_id=user_id, entry_date=entry_date)
+    if existing_entry:
+        # Modification Flow: new content gets integrated into the existing entry
+        existing_content, diary_id = existing_entry.content, existing_entry.diary_id
+    else:
+        # Initial Flow: use the user's default diary (provisioned at signup, or on first use)
+        with tracing.span("db.provision"):
+            diary_id = await get_default_diary_id(db, user_id)
+        existing_content = None
+
+    await release_connection(db)
+    return existing_content, diary_id
+
+async def transcribe_and_resolve_target(
+    db: AsyncSession, user_id: int, entry_date: date, audio_file
+) -> Tuple[str, Optional[str], int]:
+    """
+    Runs STT and resolve_preview_target concurrently (the DB lookups don't need the
+    transcript), so the lookups are off the critical path. Returns
+    (transcript, existing content, diary id). An STT error is raised only after the
+    lookup has finished, so the session is never left mid-query.
+    """
+    lookup = asyncio.create_task(resolve_preview_target(db, user_id, entry_date))
+    try:
+        transcript = await get_transcription(audio_file)
+    except BaseException:
+        await asyncio.gather(lookup, return_exceptions=True)
+        raise
+    existing_content, diary_id = await lookup
+    return transcript, existing_content, diary_id
+
+async def generate_preview_content(transcript: str, existing_content: Optional[str]) -> str:
+    """Integrates into the existing entry if there is one, otherwise generates a new entry."""
+    if existing_content is not None:
+        return await integrate_new_content(transcript, existing_content)
+    return await generate_initial_entry(transcript)
+
+def draft_preview_content(transcript: str, existing_content: Optional[str]) -> str:
+    """Degraded-mode preview: the raw transcript appended to the existing entry, no LLM involved."""
+    if existing_content:
+        return f"{existing_content}\n\n{transcript}"
+    return transcript
+
+async def generate_preview_or_draft(transcript: str, existing_content: Optional[str]) -> Tuple[str, bool]:
+    """
+    generate_preview_content, falling back to the raw-transcript draft while the LLM
+    circuit is open (AI_DEGRADED_DRAFT_ENABLED), so the recording can still be saved.
+    Returns (content, degraded).
+    """
+    try:
+        return await generate_preview_content(transcript, existing_content), False
+    except ai_service.AIUnavailableError:
+        if not settings.AI_DEGRADED_DRAFT_ENABLED:
+            raise
+        return draft_preview_content(transcript, existing_content), True
+
+def stream_preview_content(transcript: str, existing_content: Optional[str]) -> AsyncIterator[str]:
+    """Streaming variant of generate_preview_content."""
+    if existing_content is not None:
+        return stream_integrated_content(transcript, existing_content)
+    return stream_initial_entry(transcript)
+
+async def build_entry_preview(db: AsyncSession, user_id: int, audio_file) -> schemas.EntryUpdatePreview:
+    """
+    Runs the whole process_audio pipeline (STT, DB lookups, LLM) and returns the preview.
+    Used by background jobs; no DB connection is held across the AI calls.
+    """
+    today = date.today()
+    transcript, existing_content, diary_id = await transcribe_and_resolve_target(db, user_id, today, audio_file)
+    updated_content, degraded = await generate_preview_or_draft(transcript, existing_content)
+
+    return schemas.EntryUpdatePreview(
+        original_content=existing_content or "",
+        updated_preview_content=updated_content,
+        entry_date=today,
+        diary_id=diary_id,
+        degraded=degraded
+    )
+
+async def get_recent_entries(
+    db: AsyncSession, user_id: int, limit: int = 10, offset: int = 0, view: str = "full"
+) -> list:
     """Retrieves recent diary entries for a user, ordered by date descending."""
-    stmt = select(models.Entry).filter(
+    stmt = _listing_select(view).filter(
         models.Entry.user_id == user_id
-    ).order_by(models.Entry.entry_date.desc()).offset(offset).limit(limit)
+    ).order_by(models.Entry.entry_date.desc(), models.Entry.id.desc()).offset(offset).limit(limit)
     
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return await _fetch_listing(db, stmt, view)
+
+def _encode_cursor(values: list) -> str:
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> list:
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    values = json.loads(raw)
+    if not isinstance(values, list):
+        raise ValueError("Cursor must encode a list.")
+    return values
 
+def encode_history_cursor(entry) -> str:
+    """Opaque cursor pointing just past `entry` in the history order."""
+    return _encode_cursor([entry.entry_date.isoformat(), entry.id])
+
+def decode_history_cursor(cursor: str) -> Tuple[date, int]:
+    """Inverse of encode_history_cursor; raises ValueError for anything malformed."""
+    try:
+        entry_date, entry_id = _decode_cursor(cursor)
+        return date.fromisoformat(entry_date), int(entry_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid history cursor.") from e
+
+async def get_entries_page(
+    db: AsyncSession, user_id: int, limit: int = 20, cursor: Optional[str] = None, view: str = "full"
+) -> Tuple[list, Optional[str]]:
+    """
+    Keyset-paginated history, newest first (entry_date DESC, id DESC). Unlike
+    OFFSET, each page is a range scan on ix_entries_user_date_id that starts at the
+    cursor, so deep pages cost the same as the first one. Returns the page and the
+    cursor for the next one (None on the last page).
+    """
+    stmt = _listing_select(view).filter(models.Entry.user_id == user_id)
+    if cursor is not None:
+        after_date, after_id = decode_history_cursor(cursor)
+        stmt = stmt.filter(tuple_(models.Entry.entry_date, models.Entry.id) < tuple_(after_date, after_id))
+    stmt = stmt.order_by(models.Entry.entry_date.desc(), models.Entry.id.desc()).limit(limit + 1)
+
+    entries = await _fetch_listing(db, stmt, view)
+    if len(entries) <= limit:
+        return entries, None
+    entries = entries[:limit]
+    return entries, encode_history_cursor(entries[-1])
 
 
 # ====================================================================
@@ -121,6 +377,54 @@ async def get_diaries_for_user(db: AsyncSession, user_id: int) -> List[models.Di
     result = await db.execute(stmt)
     return result.scalars().all()
 
+def new_default_diary(owner: Union[models.User, int]) -> models.Diary:
+    """
+    A user's default diary row: for a new User at signup (added to the session with
+    them), or for an existing user's id when it is created lazily.
+    """
+    if isinstance(owner, models.User):
+        owner_fields = {"owner": owner}
+    elif isinstance(owner, int) and not isinstance(owner, bool):
+        owner_fields = {"owner_id": owner}
+    else:
+        raise TypeError(f"A default diary needs an owning User or user id, got {owner!r}")
+    return models.Diary(
+        **owner_fields,
+        name="My Daily Reflections",
+        description="The primary diary for daily voice entries."
+    )
+
+async def get_or_create_default_diary(db: AsyncSession, user_id: int) -> models.Diary:
+    """
+    Returns the user's default diary (their oldest one), creating it if none exists
+    (auto-provisioning for users who signed up before diaries were created at signup).
+    """
+    stmt = select(models.Diary).filter(models.Diary.owner_id == user_id).order_by(models.Diary.id).limit(1)
+    default_diary = (await db.execute(stmt)).scalars().first()
+    if default_diary:
+        return default_diary
+
+    default_diary = new_default_diary(user_id)
+    db.add(default_diary)
+    await bump_data_version(db, user_id)
+    await db.commit()
+    await db.refresh(default_diary)
+    return default_diary
+
+# Default diary id per user (per worker). Diaries are never deleted, so entries don't go stale.
+DEFAULT_DIARY_CACHE_MAX_ENTRIES = 10000
+default_diary_ids: Dict[int, int] = {}
+
+async def get_default_diary_id(db: AsyncSession, user_id: int) -> int:
+    """get_or_create_default_diary's id, served from default_diary_ids after the first lookup."""
+    diary_id = default_diary_ids.get(user_id)
+    if diary_id is None:
+        diary_id = (await get_or_create_default_diary(db, user_id)).id
+        if len(default_diary_ids) >= DEFAULT_DIARY_CACHE_MAX_ENTRIES:
+            default_diary_ids.pop(next(iter(default_diary_ids)))  # Oldest first
+        default_diary_ids[user_id] = diary_id
+    return diary_id
+
 async def create_diary(db: AsyncSession, user_id: int, diary_data: schemas.DiaryBase) -> models.Diary:
     """Creates a new diary."""
     db_diary = models.Diary(
@@ -129,6 +433,244 @@ async def create_diary(db: AsyncSession, user_id: int, diary_data: schemas.Diary
         description=diary_data.description
     )
     db.add(db_diary)
+    await bump_data_version(db, user_id)
     await db.commit()
     await db.refresh(db_diary)
-    return db_diary
\ No newline at end of file
+    return db_diary
+
+
+# ====================================================================
+# D. FULL-TEXT SEARCH (ASYNC)
+# ====================================================================
+
+MARK_START, MARK_END = "<mark>", "</mark>"
+# ts_headline delimiters from the Unicode private use area, swapped for the marks once the text is escaped
+HEADLINE_START, HEADLINE_END = "\ue000", "\ue001"
+
+def search_terms(query: str) -> List[str]:
+    """Lower-cased words of a search query (punctuation and operators dropped)."""
+    return re.findall(r"\w+", query.lower())
+
+def highlight_snippet(content: str, terms: List[str], max_chars: int) -> str:
+    """
+    ts_headline-like snippet for the portable search path: about `max_chars` around
+    the first matched term, HTML-escaped, with every term occurrence wrapped in <mark>.
+    """
+    lowered = content.lower()
+    hits = [lowered.find(term) for term in terms if term in lowered]
+    first = min(hits) if hits else 0
+    start = max(0, first - max_chars // 3)
+    window = content[start:start + max_chars]
+    marked, end = [], 0
+    if terms:
+        # Matched on the raw text, so a term can't match inside an escape like &amp;
+        pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+        for match in pattern.finditer(window):
+            marked += [html.escape(window[end:match.start()]), MARK_START, html.escape(match.group(0)), MARK_END]
+            end = match.end()
+    marked.append(html.escape(window[end:]))
+    return ("..." if start > 0 else "") + "".join(marked) + ("..." if start + max_chars < len(content) else "")
+
+def escape_headline(headline: str) -> str:
+    """HTML-escapes a ts_headline result and turns its private delimiters into <mark> tags."""
+    return html.escape(headline).replace(HEADLINE_START, MARK_START).replace(HEADLINE_END, MARK_END)
+
+def _ranked_matches(user_id: int, query: str, postgres: bool):
+    """
+    SELECT of the user's matching entries with a `rank` column. PostgreSQL uses the
+    GIN-indexed tsvector (websearch syntax, ts_rank_cd); other databases fall back to
+    one LIKE per term, ranked by how often the terms occur.
+    """
+    columns = (models.Entry.id, models.Entry.diary_id, models.Entry.entry_date, models.Entry.content)
+    if postgres:
+        tsquery = func.websearch_to_tsquery(settings.SEARCH_TEXT_CONFIG, query)
+        tsvector = literal_column("entries.content_tsv")
+        return select(*columns, func.ts_rank_cd(tsvector, tsquery).label("rank")).filter(
+            models.Entry.user_id == user_id, tsvector.op("@@")(tsquery)
+        )
+
+    terms = search_terms(query)
+    content = func.lower(models.Entry.content)
+    occurrences = [
+        (func.length(content) - func.length(func.replace(content, term, ""))) / float(len(term)) for term in terms
+    ]
+    rank = sum(occurrences[1:], occurrences[0]) if occurrences else literal(0.0)
+    return select(*columns, rank.label("rank")).filter(
+        models.Entry.user_id == user_id,
+        *(content.contains(term, autoescape=True) for term in terms),
+    )
+
+async def search_entries(
+    db: AsyncSession, user_id: int, query: str, limit: int = 20, cursor: Optional[str] = None
+) -> Tuple[List[schemas.EntrySearchHit], Optional[str]]:
+    """
+    The user's entries matching `query`, best match first (rank DESC, id DESC), with
+    highlighted snippets and a keyset cursor over (rank, id) for the next page.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+
+    postgres = db.get_bind().dialect.name == "postgresql"
+    ranked = _ranked_matches(user_id, query, postgres).subquery()
+    stmt = select(ranked)
+    if cursor is not None:
+        try:
+            after_rank, after_id = _decode_cursor(cursor)
+            after_rank, after_id = float(after_rank), int(after_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid search cursor.") from e
+        stmt = stmt.filter(tuple_(ranked.c.rank, ranked.c.id) < tuple_(after_rank, after_id))
+    page = stmt.order_by(ranked.c.rank.desc(), ranked.c.id.desc()).limit(limit + 1).subquery()
+
+    if postgres:
+        # Headlines only for the rows on this page. Delimiter characters already in the
+        # text are dropped first, so every one left after ts_headline is a match boundary.
+        snippet = func.ts_headline(
+            settings.SEARCH_TEXT_CONFIG,
+            func.translate(page.c.content, HEADLINE_START + HEADLINE_END, ""),
+            func.websearch_to_tsquery(settings.SEARCH_TEXT_CONFIG, query),
+            f'StartSel="{HEADLINE_START}", StopSel="{HEADLINE_END}", MaxFragments=2, '
+            f"MaxWords={max(10, settings.SEARCH_SNIPPET_CHARS // 6)}, MinWords=5",
+        )
+    else:
+        snippet = page.c.content  # Highlighted below
+    rows = (await db.execute(
+        select(page.c.id, page.c.diary_id, page.c.entry_date, page.c.rank, snippet.label("snippet"))
+        .order_by(page.c.rank.desc(), page.c.id.desc())
+    )).all()
+
+    hits = [
+        schemas.EntrySearchHit(
+            id=row.id,
+            diary_id=row.diary_id,
+            entry_date=row.entry_date,
+            rank=row.rank,
+            snippet=escape_headline(row.snippet) if postgres
+            else highlight_snippet(row.snippet, terms, settings.SEARCH_SNIPPET_CHARS),
+        )
+        for row in rows
+    ]
+    if len(hits) <= limit:
+        return hits, None
+    hits = hits[:limit]
+    return hits, _encode_cursor([hits[-1].rank, hits[-1].id])
+
+
+# ====================================================================
+# E. SIMILAR ENTRIES (LOCAL VECTOR INDEX)
+# ====================================================================
+
+EMBEDDING_WRITE_BATCH_SIZE = 500  # Rows per multi-row upsert when backfilling
+
+def _upsert_embeddings(db: AsyncSession, rows: List[dict]):
+    stmt = _dialect_insert(db, models.EntryEmbedding).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.EntryEmbedding.entry_id],
+        set_={"vector": stmt.excluded.vector, "scale": stmt.excluded.scale},
+    )
+
+async def store_embedding(db: AsyncSession, user_id: int, entry_id: int, content: str):
+    """
+    Embeds the entry's content and stores the vector inside the caller's transaction.
+    Returns the vector so the caller can update a cached index once it has committed.
+    """
+    vector = vector_index.embed(content)
+    data, scale = vector_index.quantize(vector)
+    await db.execute(_upsert_embeddings(db, [{"entry_id": entry_id, "user_id": user_id, "vector": data, "scale": scale}]))
+    return vector
+
+async def _backfill_embeddings(db: AsyncSession, user_id: int, dim: int) -> int:
+    """
+    Embeds the user's entries that have no stored vector yet (written before vectors
+    existed) or one of another size (SIMILARITY_EMBEDDING_DIM changed). Returns the count.
+    """
+    stmt = select(models.Entry.id, models.Entry.content).outerjoin(
+        models.EntryEmbedding, models.EntryEmbedding.entry_id == models.Entry.id
+    ).filter(
+        models.Entry.user_id == user_id,
+        or_(models.EntryEmbedding.entry_id.is_(None), func.length(models.EntryEmbedding.vector) != dim),
+    )
+    missing = (await db.execute(stmt)).all()
+    if not missing:
+        return 0
+
+    def embed_all() -> List[dict]:
+        rows = []
+        for entry_id, content in missing:
+            data, scale = vector_index.quantize(vector_index.embed(content, dim))
+            rows.append({"entry_id": entry_id, "user_id": user_id, "vector": data, "scale": scale})
+        return rows
+
+    rows = await asyncio.to_thread(embed_all)  # Can be thousands of entries; keep the event loop free
+    for start in range(0, len(rows), EMBEDDING_WRITE_BATCH_SIZE):
+        await db.execute(_upsert_embeddings(db, rows[start:start + EMBEDDING_WRITE_BATCH_SIZE]))
+    await db.commit()
+    return len(rows)
+
+async def get_vector_index(db: AsyncSession, user_id: int) -> vector_index.UserVectorIndex:
+    """
+    The user's vector index, from the worker's cache while it matches the user's data
+    version, otherwise (re)built from the stored vectors in one query.
+    """
+    dim = settings.SIMILARITY_EMBEDDING_DIM
+    version = await get_data_version(db, user_id)
+    index = vector_index.indexes.get(user_id)
+    if index is not None and index.version == version and index.dim == dim:
+        return index
+
+    with tracing.span("vectors.load"):
+        await _backfill_embeddings(db, user_id, dim)
+        stmt = select(
+            models.EntryEmbedding.entry_id, models.EntryEmbedding.vector, models.EntryEmbedding.scale
+        ).filter(models.EntryEmbedding.user_id == user_id)
+        rows = (await db.execute(stmt)).all()
+        index = vector_index.UserVectorIndex.from_rows(dim, version, rows)
+    vector_index.indexes.put(user_id, index)
+    return index
+
+async def similar_entries(
+    db: AsyncSession, user_id: int, text: str, k: int = 5, exclude: Tuple[int, ...] = ()
+) -> List[schemas.SimilarEntry]:
+    """
+    The user's k entries most similar to `text`, best first. Usable for "days like
+    this one" and for picking past entries to give the LLM as context.
+    """
+    index = await get_vector_index(db, user_id)
+    with tracing.span("vectors.search", rows=index.size):
+        matches = index.search(vector_index.embed(text, index.dim), k, exclude)
+    if not matches:
+        return []
+
+    stmt = select(
+        models.Entry.id,
+        models.Entry.diary_id,
+        models.Entry.entry_date,
+        func.substr(models.Entry.content, 1, settings.ENTRY_SUMMARY_EXCERPT_CHARS).label("excerpt"),
+    ).filter(models.Entry.id.in_([entry_id for entry_id, _ in matches]))
+    rows = {row.id: row for row in (await db.execute(stmt)).all()}
+    return [
+        schemas.SimilarEntry(
+            id=entry_id, diary_id=rows[entry_id].diary_id, entry_date=rows[entry_id].entry_date,
+            score=score, excerpt=rows[entry_id].excerpt,
+        )
+        for entry_id, score in matches if entry_id in rows
+    ]
+
+async def similar_to_entry_date(
+    db: AsyncSession, user_id: int, entry_date: date, k: int = 5, diary_id: Optional[int] = None
+) -> Optional[List[schemas.SimilarEntry]]:
+    """
+    Entries from other days similar to the user's entry on `entry_date`; None if there
+    is none. With entries in several diaries that day, `diary_id` picks one; without
+    it, the entry in the oldest diary (the default one) is used.
+    """
+    day = (await db.execute(
+        select(models.Entry.id, models.Entry.diary_id, models.Entry.content)
+        .filter(models.Entry.user_id == user_id, models.Entry.entry_date == entry_date)
+        .order_by(models.Entry.diary_id, models.Entry.id)
+    )).all()
+    entry = next((row for row in day if diary_id is None or row.diary_id == diary_id), None)
+    if entry is None:
+        return None
+    return await similar_entries(db, user_id, entry.content, k, exclude=[row.id for row in day])
@@ -0,0 +1,249 @@
+# backend/app/services/job_service.py
+
+import asyncio
+import shutil
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core import tracing
+from ..core.settings import settings
+from ..db.database import AsyncSessionLocal
+from .ai_scheduler import Priority, use_priority
+
+
+# ====================================================================
+# 1. Job Model
+# ====================================================================
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    @property
+    def is_finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+@dataclass
+class Job:
+    """A unit of background work (e.g. one process_audio pipeline run) owned by a user."""
+    id: str
+    user_id: int
+    kind: str
+    status: JobStatus = JobStatus.QUEUED
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class JobQueueFullError(Exception):
+    """Raised when the bounded job queue cannot take more work."""
+
+
+# ====================================================================
+# 2. Job Stores (pluggable; in-memory by default)
+# ====================================================================
+
+class JobStore(ABC):
+    """Persists job state so the status/result endpoints can read it."""
+
+    @abstractmethod
+    async def save(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    async def watch(self, job_id: str, poll_interval: float = 0.5) -> AsyncIterator[Job]:
+        """
+        Yields the job every time its status changes and stops once it is finished.
+        This default polls; stores that can push changes should override it.
+        """
+        last_status = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield job
+            if job.status.is_finished:
+                return
+            await asyncio.sleep(poll_interval)
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Per-worker job store. Finished jobs are dropped after `ttl_seconds`.
+    Status/result requests must reach the worker that accepted the job.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._changed = asyncio.Condition()
+
+    async def save(self, job: Job) -> None:
+        self._purge_expired()
+        self._jobs[job.id] = job
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def watch(self, job_id: str, poll_interval: float = 0.5) -> AsyncIterator[Job]:
+        last_status = None
+        while True:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield job
+            if job.status.is_finished:
+                return
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: job_id not in self._jobs or self._jobs[job_id].status != last_status
+                )
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# ====================================================================
+# 3. Job Runner (bounded queue + asyncio worker pool)
+# ====================================================================
+
+# A job's work gets its own DB session (the request's session is gone by then)
+JobWork = Callable[[AsyncSession], Awaitable[dict]]
+# Releases what a job holds (e.g. its detached upload) whether it ran or not
+JobCleanup = Callable[[], Awaitable[None]]
+
+SHUTDOWN_ERROR = "Job was cancelled because the server is shutting down."
+
+
+class JobRunner:
+    """
+    Runs submitted jobs on a fixed number of asyncio workers fed by a bounded queue,
+    so request concurrency is decoupled from AI latency.
+    """
+
+    def __init__(self, store: JobStore, workers: int, queue_size: int, session_factory=AsyncSessionLocal):
+        self.store = store
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.session_factory = session_factory
+        self._queue: Optional["asyncio.Queue[Tuple[Job, JobWork, Optional[JobCleanup]]]"] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Starts the worker pool (no-op if already running)."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self) -> None:
+        """Cancels the workers, then fails the jobs still queued and runs their cleanup."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        while self._queue is not None and not self._queue.empty():
+            job, _, cleanup = self._queue.get_nowait()
+            await self._finish_unrun(job, SHUTDOWN_ERROR, cleanup)
+        self._queue = None
+
+    async def submit(self, user_id: int, kind: str, work: JobWork, cleanup: Optional[JobCleanup] = None) -> Job:
+        """
+        Queues work and returns its job immediately. Raises JobQueueFullError when saturated.
+        From here on the runner owns `cleanup`: it runs once the job has finished, failed,
+        been rejected or been dropped at shutdown.
+        """
+        await self.start()
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, kind=kind)
+        await self.store.save(job)
+
+        try:
+            self._queue.put_nowait((job, work, cleanup))
+        except asyncio.QueueFull:
+            await self._finish_unrun(job, "Job queue is full.", cleanup)
+            raise JobQueueFullError("Too many audio jobs are queued. Please try again shortly.")
+        return job
+
+    async def _finish_unrun(self, job: Job, error: str, cleanup: Optional[JobCleanup]) -> None:
+        job.status = JobStatus.FAILED
+        job.error = error
+        job.finished_at = time.time()
+        await self.store.save(job)
+        if cleanup is not None:
+            await cleanup()
+
+    async def _worker(self) -> None:
+        while True:
+            job, work, cleanup = await self._queue.get()
+            try:
+                job.status = JobStatus.RUNNING
+                job.started_at = time.time()
+                await self.store.save(job)
+
+                # Nobody is waiting on the response, so interactive AI calls go first
+                with use_priority(Priority.BACKGROUND), tracing.start_trace(f"job {job.kind}"):
+                    async with self.session_factory() as db:
+                        job.result = await work(db)
+                job.status = JobStatus.SUCCEEDED
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = SHUTDOWN_ERROR
+                raise
+            except Exception as e:
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                await self.store.save(job)
+                if cleanup is not None:
+                    await cleanup()
+                self._queue.task_done()
+
+
+# ====================================================================
+# 4. Helpers
+# ====================================================================
+
+async def detach_upload(audio_file: UploadFile) -> UploadFile:
+    """
+    Copies an upload into a spooled temp file owned by the job, since the request's
+    UploadFile is closed once the 202 response has been sent. Pass its close() to
+    JobRunner.submit as the job's cleanup.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    await audio_file.seek(0)
+    await asyncio.to_thread(shutil.copyfileobj, audio_file.file, spooled)
+    size = audio_file.size if audio_file.size is not None else spooled.tell()
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=size, filename=audio_file.filename, headers=audio_file.headers)
+
+
+# Shared per-worker instances (started/stopped by the application lifespan)
+store = InMemoryJobStore(ttl_seconds=settings.JOB_RESULT_TTL_SECONDS)
+runner = JobRunner(store, workers=settings.JOB_WORKERS, queue_size=settings.JOB_QUEUE_SIZE)
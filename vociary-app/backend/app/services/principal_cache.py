@@ -0,0 +1,114 @@
+# backend/app/services/principal_cache.py
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.settings import settings
+from ..db import models
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by the endpoints (no DB session attached)."""
+    id: int
+    username: str
+    is_active: bool = True
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(id=user.id, username=user.username, is_active=bool(user.is_active))
+
+
+LOOKUPS = metrics.Counter(
+    "auth_principal_lookups_total", "Authenticated-user resolutions by source", ["source"]
+)
+
+
+class PrincipalCache:
+    """
+    Per-worker TTL + LRU cache of active-user principals, keyed by user id, so
+    get_current_user doesn't need a DB round trip on every request. Staleness is
+    bounded by `ttl_seconds` on workers that didn't see an invalidation.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[Principal, float]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        item = self._entries.get(user_id)
+        if item is None:
+            return None
+        principal, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def set(self, principal: Principal, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[principal.id] = (principal, time.monotonic() + ttl)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drops the entry; the next request re-reads the user from the DB."""
+        self._entries.pop(user_id, None)
+
+    def mark_inactive(self, user_id: int, username: str = "") -> None:
+        """
+        Remembers a deactivated user for the lifetime of an access token, so requests
+        are rejected even when signed token claims would otherwise skip the DB.
+        """
+        self.set(Principal(id=user_id, username=username, is_active=False),
+                 ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Shared per-worker instance
+cache = PrincipalCache(
+    max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+PENDING_KEY = "principal_cache_pending"  # Session.info slot for user changes awaiting commit
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_updates(session: Session, flush_context) -> None:
+    """
+    Records ORM updates of users (e.g. deactivation) flushed in this transaction.
+    The cache is only touched once they commit, so a concurrent request can't
+    re-cache the old row in between and a rollback leaves the cache alone. Bulk
+    `update()` statements bypass this; call cache.invalidate/mark_inactive there.
+    """
+    pending = session.info.setdefault(PENDING_KEY, {})
+    for target in session.dirty:
+        if isinstance(target, models.User) and session.is_modified(target, include_collections=False):
+            pending[target.id] = (target.username, bool(target.is_active))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_updates(session: Session) -> None:
+    for user_id, (username, is_active) in session.info.pop(PENDING_KEY, {}).items():
+        if is_active:
+            cache.invalidate(user_id)
+        else:
+            cache.mark_inactive(user_id, username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_updates(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
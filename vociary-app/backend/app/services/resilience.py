@@ -0,0 +1,283 @@
+# backend/app/services/resilience.py
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from ..core import metrics
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+class AttemptTimeoutError(Exception):
+    """A single attempt ran past AI_ATTEMPT_TIMEOUT_SECONDS (or the overall deadline)."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while its circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"The AI service ({name}) is temporarily unavailable. Please retry shortly.")
+        self.retry_after = retry_after
+
+
+# --- Metrics ---
+RETRIES = metrics.Counter("ai_retries_total", "AI calls retried after a transient failure", ["operation", "reason"])
+HEDGES = metrics.Counter("ai_hedged_requests_total", "Hedged second attempts sent for slow AI calls", ["operation"])
+HEDGE_WINS = metrics.Counter("ai_hedge_wins_total", "Hedged attempts that finished first", ["operation"])
+CIRCUIT_REJECTIONS = metrics.Counter(
+    "ai_circuit_rejections_total", "AI calls rejected because the circuit was open", ["circuit"]
+)
+
+
+# ====================================================================
+# 1. Retry Policy
+# ====================================================================
+
+def failure_reason(exc: BaseException) -> Optional[str]:
+    """Why `exc` is worth retrying, or None if it is not (4xx, 429, bad input, ...)."""
+    if isinstance(exc, (AttemptTimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return "status_5xx" if exc.response.status_code in RETRYABLE_STATUS_CODES else None
+    if isinstance(exc, httpx.TransportError):
+        return "transport"
+    return None
+
+def backoff_delay(retry: int) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(max_delay, base * 2**retry))."""
+    ceiling = min(settings.AI_RETRY_MAX_DELAY_SECONDS, settings.AI_RETRY_BASE_DELAY_SECONDS * (2 ** retry))
+    return random.uniform(0, ceiling)
+
+async def sleep_before_retry(operation: str, retry: int, exc: BaseException, started: float) -> bool:
+    """
+    Sleeps before retry number `retry` (0-based) and records it. Returns False, without
+    sleeping, when `exc` is not retryable or the attempt/deadline budget is used up.
+    """
+    reason = failure_reason(exc)
+    if reason is None or retry + 1 >= settings.AI_RETRY_MAX_ATTEMPTS:
+        return False
+
+    delay = backoff_delay(retry)
+    if time.monotonic() - started + delay >= settings.AI_TOTAL_DEADLINE_SECONDS:
+        return False
+
+    RETRIES.inc(operation=operation, reason=reason)
+    logger.warning(
+        "AI %s: retrying after %s (%r) in %.2fs", operation, reason, exc, delay,
+        extra={"operation": operation, "reason": reason, "retry": retry + 1, "delay_s": round(delay, 3)},
+    )
+    await asyncio.sleep(delay)
+    return True
+
+
+# ====================================================================
+# 2. Hedging (second request once the first is slower than p95)
+# ====================================================================
+
+class LatencyTracker:
+    """Recent successful attempt latencies per operation, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._window = window
+
+    def record(self, operation: str, seconds: float) -> None:
+        self._samples.setdefault(operation, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, operation: str, fraction: float) -> Optional[float]:
+        samples = self._samples.get(operation)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def hedge_delay(self, operation: str) -> float:
+        """p95 latency, but never earlier than AI_HEDGE_MIN_DELAY_SECONDS."""
+        p95 = self.percentile(operation, settings.AI_HEDGE_PERCENTILE)
+        return max(settings.AI_HEDGE_MIN_DELAY_SECONDS, p95 or 0.0)
+
+
+latencies = LatencyTracker()
+
+async def _timed_attempt(operation: str, attempt: Callable[[], Awaitable[T]], timeout: float) -> T:
+    started = time.monotonic()
+    try:
+        result = await asyncio.wait_for(attempt(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise AttemptTimeoutError(f"{operation} attempt timed out after {timeout:.1f}s")
+    latencies.record(operation, time.monotonic() - started)
+    return result
+
+async def _hedged_attempt(operation: str, attempt: Callable[[], Awaitable[T]], timeout: float) -> T:
+    """
+    Runs one attempt; if it hasn't finished after the hedge delay, starts an identical
+    second one and returns whichever succeeds first (the other is cancelled).
+    """
+    primary = asyncio.create_task(_timed_attempt(operation, attempt, timeout))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=latencies.hedge_delay(operation))
+        if done:
+            return primary.result()
+
+        HEDGES.inc(operation=operation)
+        hedge = asyncio.create_task(_timed_attempt(operation, attempt, timeout))
+        pending.add(hedge)
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        HEDGE_WINS.inc(operation=operation)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# ====================================================================
+# 3. Entry Point
+# ====================================================================
+
+async def call_with_retries(
+    operation: str,
+    attempt: Callable[[], Awaitable[T]],
+    hedge: bool = False,
+) -> T:
+    """
+    Runs `attempt` (which must be safe to repeat and build a fresh request each time)
+    with per-attempt timeouts, jittered exponential backoff on transient failures
+    (timeouts, connection errors, 5xx) and an overall deadline. With `hedge=True`
+    and AI_HEDGING_ENABLED, a slow attempt is hedged with a parallel duplicate.
+    """
+    started = time.monotonic()
+    retry = 0
+    while True:
+        remaining = settings.AI_TOTAL_DEADLINE_SECONDS - (time.monotonic() - started)
+        timeout = max(0.0, min(settings.AI_ATTEMPT_TIMEOUT_SECONDS, remaining))
+        try:
+            if hedge and settings.AI_HEDGING_ENABLED:
+                return await _hedged_attempt(operation, attempt, timeout)
+            return await _timed_attempt(operation, attempt, timeout)
+        except Exception as e:
+            if not await sleep_before_retry(operation, retry, e, started):
+                raise
+            retry += 1
+
+
+# ====================================================================
+# 4. Circuit Breaker (fail fast during provider outages)
+# ====================================================================
+
+class CircuitState(int, Enum):
+    CLOSED = 0     # Calls go through; consecutive provider failures are counted
+    OPEN = 1       # Calls fail immediately until the reset timeout has passed
+    HALF_OPEN = 2  # A limited number of probe calls decide whether to close again
+
+
+class CircuitBreaker:
+    """
+    Opens after CIRCUIT_FAILURE_THRESHOLD consecutive provider failures (the kind
+    failure_reason() considers transient: timeouts, connection errors, 5xx), so
+    requests fail fast instead of each waiting out the timeouts. After
+    CIRCUIT_RESET_TIMEOUT_SECONDS, CIRCUIT_HALF_OPEN_MAX_CALLS probes are let through:
+    a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.opened_at + settings.CIRCUIT_RESET_TIMEOUT_SECONDS - time.monotonic())
+
+    def is_available(self) -> bool:
+        """False while calls would be rejected (open, or half-open with every probe taken)."""
+        if self.state == CircuitState.OPEN:
+            return self._retry_after() == 0
+        if self.state == CircuitState.HALF_OPEN:
+            return self.probes < settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+        return True
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError if the call must not go out; returns True for a probe."""
+        if self.state == CircuitState.OPEN and self._retry_after() == 0:
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state == CircuitState.CLOSED:
+            return False
+        if self.state == CircuitState.HALF_OPEN and self.probes < settings.CIRCUIT_HALF_OPEN_MAX_CALLS:
+            self.probes += 1
+            return True
+
+        CIRCUIT_REJECTIONS.inc(circuit=self.name)
+        raise CircuitOpenError(self.name, retry_after=max(1.0, self._retry_after()))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self, exc: BaseException) -> None:
+        if failure_reason(exc) is None:
+            return  # Our own request was bad (4xx, limits); the provider is fine
+        self.failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.failures >= settings.CIRCUIT_FAILURE_THRESHOLD:
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+        self.state = state
+        self.probes = 0
+        logger.log(
+            logging.WARNING if state == CircuitState.OPEN else logging.INFO,
+            "Circuit '%s' is now %s.", self.name, state.name,
+            extra={"circuit": self.name, "state": state.name},
+        )
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Wraps one logical AI call (including its retries)."""
+        probe = self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        else:
+            self.record_success()
+        finally:
+            if probe and self.state == CircuitState.HALF_OPEN:
+                self.probes -= 1  # Ended without a verdict (e.g. client went away)
+
+
+# One breaker per upstream dependency, shared per worker
+breakers: Dict[str, CircuitBreaker] = {"stt": CircuitBreaker("stt"), "llm": CircuitBreaker("llm")}
+
+metrics.Gauge(
+    "ai_circuit_state",
+    "Circuit state per AI dependency (0 closed, 1 open, 2 half-open)",
+    ["circuit"],
+    callback=lambda: {(name,): float(breaker.state) for name, breaker in breakers.items()},
+)
@@ -0,0 +1,177 @@
+# backend/app/services/transcript_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import UploadFile
+
+from ..core.settings import settings
+
+HASH_CHUNK_SIZE = 1024 * 1024  # Hash uploads 1 MB at a time instead of loading them whole
+TMP_SUFFIX = ".tmp"
+
+
+# ====================================================================
+# 1. Cache Key (content address of the recording + STT model)
+# ====================================================================
+
+async def audio_cache_key(audio_file: UploadFile, model_name: str) -> str:
+    """
+    Returns a SHA-256 over the STT model name and the uploaded audio bytes.
+    The upload is read in chunks and rewound afterwards so it can still be sent to STT.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8") + b"\0")
+    await audio_file.seek(0)
+    while chunk := await audio_file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    await audio_file.seek(0)
+    return digest.hexdigest()
+
+
+# ====================================================================
+# 2. Two-Tier Cache (bounded in-memory LRU + durable on-disk store)
+# ====================================================================
+
+class TranscriptCache:
+    """
+    Transcript cache keyed by audio hash.
+    - Tier 1: per-worker LRU, bounded to `max_entries`.
+    - Tier 2: one JSON file per key under `directory`, shared by all workers on the host.
+    Entries older than `ttl_seconds` are treated as misses and removed.
+    """
+
+    def __init__(self, directory: str, max_entries: int, ttl_seconds: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Returns the cached transcript, checking memory first and then disk."""
+        hit = self._memory.get(key)
+        if hit is not None:
+            transcript, stored_at = hit
+            if not self._is_expired(stored_at):
+                self._memory.move_to_end(key)
+                return transcript
+            del self._memory[key]
+
+        record = await asyncio.to_thread(self._read_file, key)
+        if record is None:
+            return None
+        transcript, stored_at = record
+        self._remember(key, transcript, stored_at)
+        return transcript
+
+    async def set(self, key: str, transcript: str) -> None:
+        """Stores a transcript in both tiers."""
+        stored_at = time.time()
+        self._remember(key, transcript, stored_at)
+        await asyncio.to_thread(self._write_file, key, transcript, stored_at)
+
+    async def evict_expired(self) -> int:
+        """Removes expired entries from both tiers. Returns the number of files deleted."""
+        for key in [k for k, (_, stored_at) in self._memory.items() if self._is_expired(stored_at)]:
+            del self._memory[key]
+        return await asyncio.to_thread(self._sweep_files)
+
+    async def sweep_periodically(self, interval_seconds: float) -> None:
+        """Runs evict_expired() every `interval_seconds` until cancelled (started in the app lifespan)."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self.evict_expired()
+            except OSError as e:
+                print(f"Transcript cache sweep failed: {e!r}")
+                continue
+            if removed:
+                print(f"Transcript cache: evicted {removed} expired entries.")
+
+    # --- Internal helpers ---
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, transcript: str, stored_at: float) -> None:
+        self._memory[key] = (transcript, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        # Fan out into sub-directories so no single directory grows huge
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_file(self, key: str) -> Optional[Tuple[str, float]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if self._is_expired(record["stored_at"]):
+            self._remove(path)
+            return None
+        return record["transcript"], record["stored_at"]
+
+    def _write_file(self, key: str, transcript: str, stored_at: float) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A temp file per writer: concurrent sets of the same key (retried uploads) must not share one
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"transcript": transcript, "stored_at": stored_at}, f)
+            os.replace(tmp_path, path)  # Atomic, so concurrent readers never see a partial file
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def _sweep_files(self) -> int:
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(TMP_SUFFIX):
+                    # Only temp files left behind by a crashed writer; others are still being written
+                    try:
+                        stored_at = os.path.getmtime(path)
+                    except OSError:
+                        continue
+                    if self._is_expired(stored_at):
+                        self._remove(path)
+                        removed += 1
+                    continue
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        stored_at = json.load(f)["stored_at"]
+                except (OSError, ValueError, KeyError):
+                    stored_at = 0  # Unreadable or partial files are swept too
+                if self._is_expired(stored_at):
+                    self._remove(path)
+                    removed += 1
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Shared per-worker instance
+cache = TranscriptCache(
+    directory=settings.TRANSCRIPT_CACHE_DIR,
+    max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+)
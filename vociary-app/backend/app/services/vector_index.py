@@ -0,0 +1,200 @@
+# backend/app/services/vector_index.py
+
+import re
+import zlib
+from collections import Counter, OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.settings import settings
+
+MIN_INDEX_CAPACITY = 64
+
+
+# ====================================================================
+# 1. Hashed Term-Frequency Vectors (model-free, CPU only)
+# ====================================================================
+
+def _features(text: str) -> List[str]:
+    """Lower-cased words and adjacent word pairs; pairs keep some phrase context ("not happy")."""
+    words = re.findall(r"\w+", text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+def embed(text: str, dim: Optional[int] = None) -> np.ndarray:
+    """
+    Sublinear term frequencies hashed into `dim` signed buckets (the hashing trick),
+    L2-normalised. CRC32 keeps bucket assignment stable across processes and releases,
+    which stored vectors depend on. IDF weights are applied at query time by the index,
+    since they depend on the user's whole corpus and would go stale in stored vectors.
+    """
+    dim = dim or settings.SIMILARITY_EMBEDDING_DIM
+    counts = Counter(_features(text))
+    if not counts:
+        return np.zeros(dim, dtype=np.float32)
+
+    hashes = np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in counts), dtype=np.int64, count=len(counts))
+    weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    signs = np.where(hashes & (1 << 31), -1.0, 1.0).astype(np.float32)  # Colliding features tend to cancel out
+    vector = np.bincount(hashes % dim, weights=weights * signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ====================================================================
+# 2. Compact Storage (int8 + one float32 scale per vector)
+# ====================================================================
+
+def quantize(vector: np.ndarray) -> Tuple[bytes, float]:
+    """int8 bytes (a quarter of float32) and the scale that maps them back."""
+    peak = float(np.abs(vector).max()) if vector.size else 0.0
+    scale = peak / 127.0 if peak else 1.0
+    return np.round(vector / scale).astype(np.int8).tobytes(), scale
+
+def dequantize(data: bytes, scale: float) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.int8).astype(np.float32) * np.float32(scale)
+
+
+# ====================================================================
+# 3. Per-User Index (vectorised top-k over one matrix)
+# ====================================================================
+
+class UserVectorIndex:
+    """
+    One user's entry vectors as rows of a float32 matrix, for brute-force cosine top-k
+    with IDF weighting: a single matrix-vector product per query. Rows are updated in
+    place (growing by doubling), and the IDF weights and weighted row norms are only
+    recomputed on the first query after a change. `version` is the user's data version
+    the rows correspond to.
+    """
+
+    def __init__(self, dim: int, version: int = 0):
+        self.dim = dim
+        self.version = version
+        self.size = 0
+        self._matrix = np.zeros((MIN_INDEX_CAPACITY, dim), dtype=np.float32)
+        self._ids = np.zeros(MIN_INDEX_CAPACITY, dtype=np.int64)
+        self._rows = {}  # entry id -> row
+        self._weights: Optional[np.ndarray] = None
+        self._row_norms: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_rows(cls, dim: int, version: int, rows: Iterable[Tuple[int, bytes, float]]) -> "UserVectorIndex":
+        """Builds the index from stored (entry id, int8 bytes, scale) rows in one pass."""
+        rows = list(rows)
+        index = cls(dim, version)
+        index._reserve(len(rows))
+        if rows:
+            quantized = np.frombuffer(b"".join(data for _, data, _ in rows), dtype=np.int8).reshape(len(rows), dim)
+            scales = np.fromiter((scale for _, _, scale in rows), dtype=np.float32, count=len(rows))
+            index._matrix[:len(rows)] = quantized * scales[:, None]
+            index._ids[:len(rows)] = [entry_id for entry_id, _, _ in rows]
+            index._rows = {entry_id: row for row, (entry_id, _, _) in enumerate(rows)}
+            index.size = len(rows)
+        return index
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._ids)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self._matrix[:self.size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.size] = self._ids[:self.size]
+        self._matrix, self._ids = matrix, ids
+
+    def upsert(self, entry_id: int, vector: np.ndarray) -> None:
+        """Adds the entry's vector, or replaces it if the entry is already indexed."""
+        row = self._rows.get(entry_id)
+        if row is None:
+            self._reserve(self.size + 1)
+            row = self._rows[entry_id] = self.size
+            self._ids[row] = entry_id
+            self.size += 1
+        self._matrix[row] = vector
+        self._weights = self._row_norms = None
+
+    def _prepare(self) -> None:
+        """Smoothed IDF per bucket and each row's norm under those weights."""
+        if self._weights is not None:
+            return
+        matrix = self._matrix[:self.size]
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        self._weights = (np.log((1.0 + self.size) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        self._row_norms = np.sqrt(np.square(matrix) @ np.square(self._weights))
+
+    def search(self, vector: np.ndarray, k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """The k most similar entries as (entry id, cosine similarity), best first."""
+        if self.size == 0 or k <= 0:
+            return []
+        self._prepare()
+        weighted = vector * self._weights
+        query_norm = np.linalg.norm(weighted)
+        if not query_norm:
+            return []
+
+        # cos(d*w, q*w) = d . (q*w^2) / (|d*w| |q*w|)
+        scores = (self._matrix[:self.size] @ (weighted * self._weights)) / (np.maximum(self._row_norms, 1e-12) * query_norm)
+        for entry_id in exclude:
+            row = self._rows.get(entry_id)
+            if row is not None:
+                scores[row] = -np.inf
+
+        k = min(k, self.size)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(self._ids[row]), float(scores[row])) for row in top if np.isfinite(scores[row]) and scores[row] > 0]
+
+
+# ====================================================================
+# 4. Index Cache (per worker, bounded by the total number of vectors)
+# ====================================================================
+
+class VectorIndexCache:
+    """
+    LRU of per-user indexes. Bounded by rows rather than users, since one user with
+    10k entries holds as many vectors as a hundred light users.
+    """
+
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._indexes: "OrderedDict[int, UserVectorIndex]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[UserVectorIndex]:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+        return index
+
+    def put(self, user_id: int, index: UserVectorIndex) -> None:
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        self._evict()
+
+    def apply(self, user_id: int, version: int, entry_id: int, vector: np.ndarray) -> None:
+        """
+        Applies one committed write (which moved the user's data to `version`) to a
+        cached index. If the index missed a write in between (another worker), it is
+        dropped instead and rebuilt from the database on the next search.
+        """
+        index = self._indexes.get(user_id)
+        if index is None:
+            return
+        if index.version != version - 1 or index.dim != len(vector):
+            del self._indexes[user_id]
+            return
+        index.upsert(entry_id, vector)
+        index.version = version
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._indexes) > 1 and sum(index.size for index in self._indexes.values()) > self.max_rows:
+            self._indexes.popitem(last=False)  # Least recently used first
+
+    def clear(self) -> None:
+        self._indexes.clear()
+
+
+indexes = VectorIndexCache(settings.SIMILARITY_INDEX_CACHE_MAX_ROWS)
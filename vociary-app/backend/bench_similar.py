@@ -0,0 +1,207 @@
+# backend/bench_similar.py
+"""
+Benchmark for the similar-entries vector index.
+
+Fills an in-memory SQLite database with synthetic users that have many entries
+each (Zipf-distributed words, like real diary text), then times the stages the
+app goes through, using the real service functions:
+- embedding throughput
+- cold index build (backfilling vectors for entries that have none) and rebuild
+  from stored int8 vectors
+- top-k search on a warm index, alone and with the excerpt query
+- a commit (vector stored + cached index updated in place) and the first search after it
+
+Settings are read at import, so run it from the backend directory with its .env.
+Typical run:
+    python bench_similar.py --entries 10000 --queries 200
+    python bench_similar.py --entries 10000 --dim 256 --save bench_results/dim256.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.settings import settings
+from app.db import models
+from app.schemas import entry as schemas
+from app.services import diary_service, vector_index
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "de", "pa", "shi", "an", "or", "el", "tu", "be"]
+
+
+# ====================================================================
+# 1. Synthetic Corpus
+# ====================================================================
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+def make_entries(count: int, vocabulary: List[str], rng: random.Random) -> List[str]:
+    """Entries of 80-300 words; word frequencies follow Zipf's law, as in natural text."""
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+    return [" ".join(rng.choices(vocabulary, weights, k=rng.randint(80, 300))) + "." for _ in range(count)]
+
+
+# ====================================================================
+# 2. Timing
+# ====================================================================
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of `values` (milliseconds)."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+async def timed(samples: List[float], work):
+    started = time.perf_counter()
+    result = await work
+    samples.append((time.perf_counter() - started) * 1000)
+    return result
+
+
+# ====================================================================
+# 3. Benchmark
+# ====================================================================
+
+async def seed_user(session: AsyncSession, user_index: int, texts: List[str]) -> int:
+    """Inserts a user with one diary and the given entries (no vectors yet, as after an upgrade)."""
+    user = models.User(email=f"bench{user_index}@example.com", username=f"bench{user_index}", hashed_password="x")
+    session.add(user)
+    await session.flush()
+    diary = models.Diary(name="Bench", owner_id=user.id)
+    session.add(diary)
+    await session.flush()
+    first_day = date(2000, 1, 1)
+    rows = [
+        {"user_id": user.id, "diary_id": diary.id, "entry_date": first_day + timedelta(days=day), "content": text}
+        for day, text in enumerate(texts)
+    ]
+    for start in range(0, len(rows), 1000):
+        await session.execute(insert(models.Entry), rows[start:start + 1000])
+    await session.commit()
+    return user.id
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    settings.SIMILARITY_EMBEDDING_DIM = args.dim
+    vector_index.indexes = vector_index.VectorIndexCache(max_rows=max(args.entries * args.users, 1))
+
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    texts = make_entries(args.entries, vocabulary, rng)
+
+    started = time.perf_counter()
+    for text in texts:
+        vector_index.embed(text)
+    embed_seconds = time.perf_counter() - started
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    cold, rebuild, search, search_with_rows, commit, first_search = [], [], [], [], [], []
+    index_bytes = 0
+    try:
+        for user_index in range(args.users):
+            async with sessions() as session:
+                user_id = await seed_user(session, user_index, texts)
+
+                index = await timed(cold, diary_service.get_vector_index(session, user_id))
+                vector_index.indexes.clear()
+                index = await timed(rebuild, diary_service.get_vector_index(session, user_id))
+                index_bytes = index._matrix[:index.size].nbytes
+
+                for _ in range(args.queries):
+                    query = vector_index.embed(rng.choice(texts))
+                    started = time.perf_counter()
+                    index.search(query, args.k)
+                    search.append((time.perf_counter() - started) * 1000)
+                    await timed(search_with_rows, diary_service.similar_entries(session, user_id, rng.choice(texts), args.k))
+
+                diary_id = (await session.get(models.Entry, int(index._ids[0]))).diary_id
+                for offset in range(args.commits):
+                    entry = schemas.EntryCreate(
+                        content=rng.choice(texts), entry_date=date(2100, 1, 1) + timedelta(days=offset), diary_id=diary_id
+                    )
+                    await timed(commit, diary_service.upsert_entry(session, user_id, entry))
+                    await timed(first_search, diary_service.similar_entries(session, user_id, rng.choice(texts), args.k))
+                assert vector_index.indexes.get(user_id) is index, "commits should update the cached index in place"
+    finally:
+        await engine.dispose()
+
+    return {
+        "entries_per_user": args.entries,
+        "users": args.users,
+        "dim": args.dim,
+        "k": args.k,
+        "embed_entries_per_second": round(args.entries / embed_seconds),
+        "stored_bytes_per_vector": args.dim + 8,  # int8 values + the float scale
+        "index_megabytes_per_user": round(index_bytes / 1e6, 1),
+        "stages": {
+            "cold_build_with_backfill": summarize(cold),
+            "rebuild_from_stored_vectors": summarize(rebuild),
+            "index_search": summarize(search),
+            "similar_entries": summarize(search_with_rows),
+            "commit": summarize(commit),
+            "first_search_after_commit": summarize(first_search),
+        },
+    }
+
+def print_report(results: dict) -> None:
+    print(
+        f"{results['users']} user(s) x {results['entries_per_user']} entries, dim {results['dim']}, k {results['k']}: "
+        f"embedding {results['embed_entries_per_second']} entries/s, "
+        f"{results['stored_bytes_per_vector']} B stored per vector, {results['index_megabytes_per_user']} MB index per user"
+    )
+    print(f"{'stage':<30}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for name, stats in results["stages"].items():
+        print(f"{name:<30}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+
+# ====================================================================
+# 4. CLI
+# ====================================================================
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=10000, help="Entries per user")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=200, help="Searches per user on a warm index")
+    parser.add_argument("--commits", type=int, default=20, help="Commits per user, each followed by a search")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=settings.SIMILARITY_EMBEDDING_DIM)
+    parser.add_argument("--vocabulary", type=int, default=8000, help="Distinct words in the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="Write the results JSON here")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save}")
@@ -1,7 +1,72 @@
-from gtts import gTTS
+import argparse
 import os
+import wave
 
-text = "Hello, this is a test entry for the Voicary application. I am feeling productive and happy today. I hope to complete the database integration successfully."
-tts = gTTS(text=text, lang='en')
-tts.save("test_audio.mp3")
-print("test_audio.mp3 created successfully.")
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def generate_tts_sample():
+    """Spoken test entry via Google TTS (needs network access and the gTTS package)."""
+    from gtts import gTTS
+
+    text = "Hello, this is a test entry for the Voicary application. I am feeling productive and happy today. I hope to complete the database integration successfully."
+    tts = gTTS(text=text, lang='en')
+    tts.save("test_audio.mp3")
+    print("test_audio.mp3 created successfully.")
+
+
+def synth_speech(seconds, rng, rate=SAMPLE_RATE):
+    """
+    Offline speech-like audio: voiced "syllables" (a pitch with harmonics under an
+    envelope) grouped into words and sentences, with pauses between them so the
+    long-audio splitter finds silences like it would in a real recording.
+    """
+    total = int(seconds * rate)
+    out = np.zeros(total + 30 * rate, dtype=np.float32)  # Room for the last sentence; trimmed below
+    position = 0
+    while position < total:
+        for _ in range(rng.integers(4, 14)):           # words per sentence
+            for _ in range(rng.integers(1, 4)):        # syllables per word
+                length = int(rng.uniform(0.12, 0.3) * rate)
+                t = np.arange(length) / rate
+                pitch = rng.uniform(100, 240)
+                tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in (1, 2, 3))
+                out[position:position + length] = tone * np.hanning(length) * rng.uniform(0.2, 0.5)
+                position += length + int(rng.uniform(0.01, 0.04) * rate)
+            position += int(rng.uniform(0.05, 0.15) * rate)   # gap between words
+        position += int(rng.uniform(0.4, 1.2) * rate)         # pause between sentences
+
+    out = out[:total] + rng.normal(0, 0.003, total).astype(np.float32)  # room noise
+    return (np.clip(out, -1, 1) * 32767).astype(np.int16)
+
+
+def generate_corpus(directory, count, min_seconds, max_seconds, seed):
+    """Writes `count` WAV files with lengths spread log-uniformly between min and max seconds."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    lengths = np.exp(np.linspace(np.log(min_seconds), np.log(max_seconds), count))
+    for index, seconds in enumerate(lengths):
+        path = os.path.join(directory, f"entry_{index:03d}_{int(seconds)}s.wav")
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(synth_speech(seconds, rng).tobytes())
+        print(f"{path} created ({seconds:.0f}s).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate test audio for the Voicary backend")
+    parser.add_argument("--corpus", metavar="DIR", help="Write a synthetic WAV corpus (for loadtest.py) instead of the TTS sample")
+    parser.add_argument("--count", type=int, default=12)
+    parser.add_argument("--min-seconds", type=float, default=5)
+    parser.add_argument("--max-seconds", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.corpus:
+        generate_corpus(args.corpus, args.count, args.min_seconds, args.max_seconds, args.seed)
+    else:
+        generate_tts_sample()
@@ -0,0 +1,201 @@
+# backend/groq_stub.py
+"""
+Local Groq-compatible stub server for offline capacity and timeout testing.
+
+Speaks the two OpenAI-style routes the backend uses, over real HTTP:
+    POST /openai/v1/audio/transcriptions   (multipart: file, model)
+    POST /openai/v1/chat/completions       (JSON; `stream: true` for SSE chunks)
+
+Usage:
+    python groq_stub.py --port 8090 --latency-ms 400 --tokens-per-second 250 --error-rate 0.02
+and point the backend at it:
+    GROQ_API_BASE_URL=http://127.0.0.1:8090/openai/v1 GROQ_API_KEY=stub uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass, fields
+from typing import AsyncIterator, Optional
+
+import uvicorn
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "today I felt calm after the long meeting and then walked home through the park "
+    "thinking about my family the presentation went well and I am grateful for friends "
+    "tomorrow I want to rest read a book cook dinner and call my sister about the weekend"
+).split()
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 300.0         # Median base latency per request (log-normal)
+    latency_sigma: float = 0.5        # Spread of the log-normal; 0 = fixed latency
+    stt_ms_per_mb: float = 400.0      # Extra STT time per MB of uploaded audio
+    stt_bytes_per_word: int = 2000    # Transcript length scales with upload size
+    prefill_ms_per_1k_tokens: float = 50.0  # Extra LLM time per 1k prompt tokens
+    ttft_ms: float = 150.0            # Time to first token for streamed completions
+    tokens_per_second: float = 250.0  # Completion token rate
+    completion_tokens: int = 200      # Completion length when the request sets no max_tokens
+    rate_limit_rate: float = 0.0      # Fraction of requests answered with 429
+    retry_after: float = 2.0          # Retry-After sent with injected 429s
+    error_rate: float = 0.0           # Fraction of requests answered with a 5xx
+    seed: Optional[int] = None
+
+
+# ====================================================================
+# 1. Simulated Behaviour
+# ====================================================================
+
+class Simulator:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+
+    def base_latency(self) -> float:
+        """Seconds, log-normally distributed around latency_ms (heavy right tail like real APIs)."""
+        median = self.config.latency_ms / 1000.0
+        if self.config.latency_sigma <= 0:
+            return median
+        return median * math.exp(self.random.gauss(0, self.config.latency_sigma))
+
+    def injected_failure(self) -> Optional[JSONResponse]:
+        roll = self.random.random()
+        if roll < self.config.rate_limit_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached (injected by groq_stub)", "type": "tokens"}},
+                headers={"retry-after": str(self.config.retry_after)},
+            )
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            status_code = self.random.choice((500, 502, 503))
+            return JSONResponse(status_code=status_code, content={"error": {"message": "Injected upstream failure"}})
+        return None
+
+    def text(self, words: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(max(1, words))).capitalize() + "."
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def reflection_json(sim: Simulator) -> str:
+    return json.dumps({
+        "mood_score": sim.random.randint(3, 9),
+        "mood_emoji": sim.random.choice(["🙂", "😌", "😊", "😐"]),
+        "takeaways": [sim.text(6), sim.text(6), sim.text(6)],
+        "action_item": sim.text(8),
+    })
+
+
+# ====================================================================
+# 2. App
+# ====================================================================
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    sim = Simulator(config or StubConfig())
+    app = FastAPI(title="Groq stub")
+    app.state.simulator = sim
+
+    @app.post("/openai/v1/audio/transcriptions")
+    async def transcriptions(file: UploadFile = File(...), model: str = Form(...)):
+        size = file.size if file.size is not None else len(await file.read())
+        await asyncio.sleep(sim.base_latency() + size / (1024 * 1024) * sim.config.stt_ms_per_mb / 1000.0)
+
+        failure = sim.injected_failure()
+        if failure is not None:
+            return failure
+        return {"text": sim.text(size // sim.config.stt_bytes_per_word)}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+        prompt_tokens = estimate_tokens(prompt)
+        completion_tokens = body.get("max_tokens") or sim.config.completion_tokens
+        prefill = prompt_tokens / 1000.0 * sim.config.prefill_ms_per_1k_tokens / 1000.0
+
+        wants_json = "JSON" in prompt
+        content = reflection_json(sim) if wants_json else sim.text(completion_tokens)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if body.get("stream"):
+            await asyncio.sleep(sim.base_latency() * 0.2 + prefill + sim.config.ttft_ms / 1000.0)
+            failure = sim.injected_failure()
+            if failure is not None:
+                return failure
+            return StreamingResponse(
+                stream_chunks(sim, completion_id, body.get("model", ""), content, usage),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(sim.base_latency() + prefill + completion_tokens / sim.config.tokens_per_second)
+        failure = sim.injected_failure()
+        if failure is not None:
+            return failure
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", ""),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    return app
+
+
+async def stream_chunks(sim: Simulator, completion_id: str, model: str, content: str, usage: dict) -> AsyncIterator[str]:
+    """OpenAI-style SSE chunks, one word per chunk, paced at tokens_per_second."""
+    def chunk(delta: dict, finish_reason=None, extra=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        payload.update(extra or {})
+        return f"data: {json.dumps(payload)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    pieces = content.split(" ")
+    seconds_per_piece = usage["completion_tokens"] / sim.config.tokens_per_second / max(1, len(pieces))
+    for index, piece in enumerate(pieces):
+        await asyncio.sleep(seconds_per_piece)
+        yield chunk({"content": piece if index == 0 else " " + piece})
+    # Groq reports usage on the final chunk under `x_groq`
+    yield chunk({}, finish_reason="stop", extra={"x_groq": {"usage": usage}})
+    yield "data: [DONE]\n\n"
+
+
+# ====================================================================
+# 3. CLI
+# ====================================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Groq-compatible stub server with latency and failure injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    for field in fields(StubConfig):
+        flag = "--" + field.name.replace("_", "-")
+        parser.add_argument(flag, type=int if field.name == "seed" else type(field.default), default=field.default)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = StubConfig(**{field.name: getattr(args, field.name) for field in fields(StubConfig)})
+    print(f"Groq stub listening on http://{args.host}:{args.port}/openai/v1 with {config}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,348 @@
+# backend/loadtest.py
+"""
+End-to-end load test for the voice diary flow.
+
+Each virtual user signs up, logs in, walks the journey once in order, then loops
+over a weighted mix of process_audio / commit / history / reflect calls with
+exponential think times (reproducible with --seed),
+using WAV files from a synthetic corpus. Reports per-endpoint p50/p95/p99 and
+error rates, plus DB pool saturation scraped from /metrics, and saves the results
+as JSON so runs can be compared between releases.
+
+Typical offline run (three terminals):
+    python groq_stub.py --port 8090
+    GROQ_API_BASE_URL=http://127.0.0.1:8090/openai/v1 GROQ_API_KEY=stub DEBUG=false uvicorn app.main:app --workers 1
+    python generate_audio.py --corpus loadtest_audio
+    python loadtest.py --users 20 --duration 120 --save loadtest_results/$(git rev-parse --short HEAD).json
+
+Compare with an earlier run (exit code 1 if p95 or error rate regressed):
+    python loadtest.py ... --compare loadtest_results/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+RESULTS_FORMAT_VERSION = 1
+ACTIONS = ("process_audio", "commit", "history", "reflect")
+
+
+# ====================================================================
+# 1. Recording
+# ====================================================================
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, name: str, request) -> Optional[httpx.Response]:
+        """Times one request; non-2xx responses and transport errors count as errors."""
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.errors[name][type(e).__name__] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name][str(response.status_code)] += 1
+            return None
+        return response
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+# ====================================================================
+# 2. Virtual User
+# ====================================================================
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, corpus: List[str], args: argparse.Namespace,
+                 rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.corpus = corpus
+        self.args = args
+        self.headers: Dict[str, str] = {}
+        self.pending_preview: Optional[dict] = None
+        self.entry_ids: List[int] = []
+        self.rng = rng
+        self.journey = list(ACTIONS)  # Walked once in order before the weighted mix
+
+    async def login(self) -> bool:
+        name = f"load_{uuid.uuid4().hex[:10]}"
+        password = "load-test-password"
+        signup = self.client.post(
+            "/api/v1/auth/signup", json={"email": f"{name}@example.com", "username": name, "password": password}
+        )
+        if await self.recorder.call("signup", signup) is None:
+            return False
+
+        login = self.client.post("/api/v1/auth/login", data={"username": name, "password": password})
+        response = await self.recorder.call("login", login)
+        if response is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    def next_action(self, weights: Dict[str, float]) -> str:
+        available = {name: weight for name, weight in weights.items() if weight > 0}
+        if self.pending_preview is None:
+            available.pop("commit", None)
+        if not self.entry_ids:
+            available.pop("reflect", None)
+        while self.journey:  # Steps that can't run yet (e.g. commit after a failed upload) are skipped
+            name = self.journey.pop(0)
+            if name in available:
+                return name
+        if not available:
+            return "process_audio"
+        return self.rng.choices(list(available), weights=list(available.values()))[0]
+
+    async def run(self, weights: Dict[str, float], deadline: float) -> None:
+        if not await self.login():
+            return
+        while True:  # Every user completes the journey once, however short the run
+            await getattr(self, self.next_action(weights))()
+            if time.monotonic() >= deadline and not self.journey:
+                return
+            await asyncio.sleep(self.rng.expovariate(1.0 / self.args.think_time) if self.args.think_time > 0 else 0)
+
+    async def process_audio(self) -> None:
+        path = self.rng.choice(self.corpus)
+        with open(path, "rb") as audio:
+            files = {"audio_file": (os.path.basename(path), audio.read(), "audio/wav")}
+        request = self.client.post("/api/v1/entries/process_audio", files=files, headers=self.headers)
+        response = await self.recorder.call("process_audio", request)
+        if response is not None:
+            self.pending_preview = response.json()
+
+    async def commit(self) -> None:
+        preview, self.pending_preview = self.pending_preview, None
+        body = {
+            "content": preview["updated_preview_content"],
+            "diary_id": preview["diary_id"],
+            "entry_date": preview["entry_date"],
+        }
+        response = await self.recorder.call(
+            "commit", self.client.post("/api/v1/entries/commit", json=body, headers=self.headers)
+        )
+        if response is not None and response.json()["id"] not in self.entry_ids:
+            self.entry_ids.append(response.json()["id"])
+
+    async def history(self) -> None:
+        await self.recorder.call("history", self.client.get("/api/v1/entries/history", headers=self.headers))
+
+    async def reflect(self) -> None:
+        entry_id = self.rng.choice(self.entry_ids)
+        await self.recorder.call(
+            "reflect", self.client.post(f"/api/v1/entries/reflect/{entry_id}", headers=self.headers)
+        )
+
+
+# ====================================================================
+# 3. DB Pool Sampling
+# ====================================================================
+
+POOL_SAMPLE = re.compile(r'^db_pool_connections\{state="(\w+)"\} ([0-9.eE+-]+)$', re.MULTILINE)
+
+async def sample_pool(client: httpx.AsyncClient, samples: List[Dict[str, float]], stop: asyncio.Event) -> None:
+    """Scrapes the pool gauges from /metrics every 0.5 s while the test runs."""
+    while not stop.is_set():
+        try:
+            text = (await client.get("/metrics")).text
+            values = {state: float(value) for state, value in POOL_SAMPLE.findall(text)}
+            if values:
+                samples.append(values)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+def summarize_pool(samples: List[Dict[str, float]]) -> Optional[dict]:
+    if not samples:
+        return None
+    checked_out = [sample.get("checked_out", 0) for sample in samples]
+    capacity = max(sample.get("capacity", 0) for sample in samples)
+    return {
+        "capacity": capacity,
+        "max_checked_out": max(checked_out),
+        "mean_checked_out": round(sum(checked_out) / len(checked_out), 2),
+        # Share of samples where every connection was in use (new requests would queue)
+        "saturated_fraction": round(sum(1 for value in checked_out if capacity and value >= capacity) / len(samples), 3),
+        "samples": len(samples),
+    }
+
+
+# ====================================================================
+# 4. Run, Report, Compare
+# ====================================================================
+
+def parse_mix(text: str) -> Dict[str, float]:
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ACTIONS:
+            raise SystemExit(f"Unknown action in --mix: {name!r} (expected one of {', '.join(ACTIONS)})")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args: argparse.Namespace, transport: Optional[httpx.AsyncBaseTransport] = None) -> dict:
+    corpus = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith(".wav")
+    ) if os.path.isdir(args.corpus) else []
+    if not corpus:
+        raise SystemExit(f"No WAV files in {args.corpus!r}. Create them with: python generate_audio.py --corpus {args.corpus}")
+
+    weights = parse_mix(args.mix)
+    recorder = Recorder()
+    pool_samples: List[Dict[str, float]] = []
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=args.users + 5, max_keepalive_connections=args.users + 5)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits, transport=transport) as client:
+        sampler = asyncio.create_task(sample_pool(client, pool_samples, stop))
+        started = time.monotonic()
+        deadline = started + args.duration
+
+        async def start_user(index: int):
+            await asyncio.sleep(args.ramp_up * index / max(1, args.users))
+            rng = random.Random(None if args.seed is None else args.seed + index)  # Per user, so concurrency doesn't reorder draws
+            await VirtualUser(client, recorder, corpus, args, rng).run(weights, deadline)
+
+        await asyncio.gather(*(start_user(i) for i in range(args.users)))
+        elapsed = time.monotonic() - started
+        stop.set()
+        await sampler
+
+    endpoints = {}
+    for name, latencies in sorted(recorder.latencies.items()):
+        errors = sum(recorder.errors[name].values())
+        endpoints[name] = {
+            "count": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4),
+            "error_kinds": dict(recorder.errors[name]),
+            "throughput_rps": round(len(latencies) / elapsed, 3),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1),
+        }
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "config": {
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration_s": args.duration,
+            "ramp_up_s": args.ramp_up,
+            "think_time_s": args.think_time,
+            "mix": weights,
+            "corpus_files": len(corpus),
+        },
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": endpoints,
+        "db_pool": summarize_pool(pool_samples),
+    }
+
+def print_report(results: dict) -> None:
+    print(f"\n{'endpoint':<15}{'count':>7}{'err%':>8}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in results["endpoints"].items():
+        print(
+            f"{name:<15}{stats['count']:>7}{stats['error_rate'] * 100:>7.1f}%{stats['throughput_rps']:>8.2f}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+    pool = results["db_pool"]
+    if pool:
+        print(
+            f"\nDB pool: max {pool['max_checked_out']:.0f}/{pool['capacity']:.0f} checked out, "
+            f"mean {pool['mean_checked_out']}, saturated {pool['saturated_fraction'] * 100:.1f}% of samples"
+        )
+    else:
+        print("\nDB pool: no samples (is /metrics reachable?)")
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Lists regressions: p95 more than `threshold` slower, or a higher error rate (> 1 point)."""
+    regressions = []
+    print(f"\nCompared with {baseline.get('git_revision') or 'baseline'} ({baseline.get('started_at')}):")
+    for name, stats in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        p95_change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        error_change = stats["error_rate"] - before["error_rate"]
+        print(f"  {name:<15} p95 {before['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms ({p95_change:+.0%}), "
+              f"errors {before['error_rate']:.1%} -> {stats['error_rate']:.1%}")
+        if p95_change > threshold:
+            regressions.append(f"{name}: p95 {p95_change:+.0%}")
+        if error_change > 0.01:
+            regressions.append(f"{name}: error rate {error_change:+.1%}")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the voice diary flow end to end")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run after the first user starts")
+    parser.add_argument("--ramp-up", type=float, default=10, help="Seconds over which users are started")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean pause between a user's calls (exponential)")
+    parser.add_argument("--mix", default="process_audio=4,commit=3,history=2,reflect=1", help="Weighted action mix")
+    parser.add_argument("--corpus", default="loadtest_audio", help="Directory of WAV files (see generate_audio.py --corpus)")
+    parser.add_argument("--timeout", type=float, default=180, help="Per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="Makes each user's action sequence reproducible")
+    parser.add_argument("--save", metavar="PATH", help="Write the results JSON here")
+    parser.add_argument("--compare", metavar="PATH", help="Earlier results JSON to compare against")
+    parser.add_argument("--regression-threshold", type=float, default=0.2, help="Allowed relative p95 increase")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.regression_threshold)
+        if regressions:
+            print("\nREGRESSIONS: " + "; ".join(regressions))
+            raise SystemExit(1)
@@ -1,5 +1,6 @@
 # backend/tests/conftest.py
 
+import os
 import pytest
 import asyncio
 from typing import AsyncGenerator
@@ -11,6 +12,22 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncConne
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import create_database, drop_database, database_exists # For utility
 
+# Settings are required at import time; provide test defaults when no .env is present.
+# The placeholder GROQ key keeps ai_service in its offline mock mode.
+for _key, _value in {
+    "SECRET_KEY": "test-secret-key",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "aura_test",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "GROQ_API_KEY": "your_groq_api_key_here",
+    "LLM_MODEL_NAME": "test-llm",
+    "STT_MODEL_NAME": "test-stt",
+    "FRONTEND_URL": "http://localhost:3000",
+}.items():
+    os.environ.setdefault(_key, _value)
+
 # 2. Imports from Application
 from app.main import app # The main FastAPI application instance
 from app.db.database import get_db_async # The production dependency to override
@@ -70,6 +87,52 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
                 await transaction.rollback() 
 
 
+@pytest.fixture(autouse=True)
+def fresh_ai_limits(monkeypatch):
+    """Each test gets its own outbound AI rate limits and circuits, so state doesn't carry over."""
+    from app.services import ai_scheduler, resilience
+    monkeypatch.setattr(ai_service, "scheduler", ai_scheduler.AIScheduler())
+    monkeypatch.setattr(resilience, "breakers", {name: resilience.CircuitBreaker(name) for name in ("stt", "llm")})
+
+
+@pytest.fixture(autouse=True)
+def fresh_transcript_cache(monkeypatch, tmp_path):
+    """The durable transcript tier writes to disk, so each test gets its own directory instead of .cache/."""
+    from app.services import transcript_cache
+    monkeypatch.setattr(transcript_cache, "cache", transcript_cache.TranscriptCache(
+        str(tmp_path / "transcripts"),
+        max_entries=settings.TRANSCRIPT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+    ))
+
+
+@pytest.fixture(autouse=True)
+def fresh_principal_cache():
+    """User ids are reused across rolled-back tests, so cached principals must not carry over."""
+    from app.services import principal_cache
+    principal_cache.cache.clear()
+    yield
+    principal_cache.cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_default_diaries():
+    """Same for the cached default diary ids (the diary rows are rolled back with the test)."""
+    from app.services import diary_service
+    diary_service.default_diary_ids.clear()
+    yield
+    diary_service.default_diary_ids.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_vector_indexes():
+    """And for the cached per-user vector indexes."""
+    from app.services import vector_index
+    vector_index.indexes.clear()
+    yield
+    vector_index.indexes.clear()
+
+
 # --- 5. DEPENDENCY OVERRIDE (The magic) ---
 
 # async def override_get_db_async(session: AsyncSession = Depends(db_session)):
@@ -80,7 +143,7 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
 
 # --- 6. FIXTURE for the Test Client ---
 @pytest.fixture(scope="function")
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def client(db_session: AsyncSession, monkeypatch) -> AsyncGenerator[AsyncClient, None]:
     """
     Configures an HTTPX AsyncClient with the application and overrides the DB dependency.
     """
@@ -101,28 +164,37 @@ async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     app.dependency_overrides[get_db_async] = override_get_db 
 
     # 2. Mock external services (AI Service) for deterministic testing
-
-    original_transcribe = ai_service.get_transcription
-    original_generate = ai_service.generate_initial_entry
-    
+    # (through monkeypatch, so tests that patch these again are unwound in the right order)
     async def mock_transcribe(audio_file):
         return "The presentation was great. I also ate a delicious sandwich for lunch."
 
     async def mock_generate(transcript):
         return f"Refined entry based on: {transcript}"
 
-    ai_service.get_transcription = mock_transcribe
-    ai_service.generate_initial_entry = mock_generate
+    monkeypatch.setattr(ai_service, "get_transcription", mock_transcribe)
+    monkeypatch.setattr(ai_service, "generate_initial_entry", mock_generate)
+
+    # 3. Create the mock user (ID 1) inside the test transaction and authenticate as it
+    from app.core import security
+    from app.db import models
+
+    mock_user = models.User(
+        email="mock@example.com",
+        username="mock_user",
+        hashed_password="not-a-real-hash",
+    )
+    db_session.add(mock_user)
+    await db_session.commit()
+    token = security.create_access_token(subject=mock_user.id)
 
-    # 3. Create the Async Client
+    # 4. Create the Async Client
     
     async with AsyncClient(
         transport=ASGITransport(app=app), 
-        base_url="http://test" # Dummy base URL for internal testing
+        base_url="http://test", # Dummy base URL for internal testing
+        headers={"Authorization": f"Bearer {token}"},
     ) as client:
         yield client
 
-    # 4. Teardown: Clear overrides and restore mocks
-    app.dependency_overrides = {}
-    ai_service.get_transcription = original_transcribe
-    ai_service.generate_initial_entry = original_generate
\ No newline at end of file
+    # 5. Teardown: Clear overrides (the AI mocks are restored by monkeypatch)
+    app.dependency_overrides = {}
\ No newline at end of file
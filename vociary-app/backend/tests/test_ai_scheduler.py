@@ -0,0 +1,119 @@
+# backend/tests/test_ai_scheduler.py
+
+import asyncio
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+from app.core.settings import settings
+from app.services import ai_scheduler, ai_service
+from app.services.ai_scheduler import Priority
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A fresh scheduler, so limits and Retry-After pauses don't leak between tests."""
+    fresh = ai_scheduler.AIScheduler()
+    monkeypatch.setattr(ai_service, "scheduler", fresh)
+    return fresh
+
+
+# ====================================================================
+# A. Token Bucket & Priority Queue
+# ====================================================================
+
+async def test_token_bucket_refills_at_its_rate():
+    bucket = ai_scheduler.TokenBucket(per_minute=60)  # One unit per second
+
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+    assert bucket.wait_time(1000) == pytest.approx(60.0, abs=0.05)  # Capped at a full bucket
+
+
+async def test_interactive_requests_are_served_before_background(scheduler, monkeypatch):
+    """
+    With the only slot taken, a queued interactive request overtakes earlier background ones.
+    """
+    monkeypatch.setattr(settings, "AI_MAX_CONCURRENT_REQUESTS", 1)
+    order = []
+    release = asyncio.Event()
+
+    async def call(name: str, priority: Priority):
+        async with scheduler.slot("llm", requests_per_minute=600, priority=priority):
+            order.append(name)
+            if name == "holder":
+                await release.wait()
+
+    holder = asyncio.create_task(call("holder", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    queued = [
+        asyncio.create_task(call("reflection-1", Priority.BACKGROUND)),
+        asyncio.create_task(call("reflection-2", Priority.BACKGROUND)),
+        asyncio.create_task(call("refine", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert ai_scheduler.QUEUE_DEPTH.value(model="llm", priority="background") == 2
+
+    release.set()
+    await asyncio.gather(holder, *queued)
+
+    assert order == ["holder", "refine", "reflection-1", "reflection-2"]
+    assert ai_scheduler.QUEUE_DEPTH.value(model="llm", priority="background") == 0
+
+
+async def test_requests_wait_for_the_per_minute_budget(scheduler, monkeypatch):
+    """
+    Once the bucket is empty, the next request is delayed rather than sent.
+    """
+    monkeypatch.setattr(settings, "AI_MAX_QUEUE_WAIT_SECONDS", 0.05)
+    async with scheduler.slot("stt", requests_per_minute=1):
+        pass
+
+    with pytest.raises(ai_scheduler.SchedulerTimeoutError) as excinfo:
+        async with scheduler.slot("stt", requests_per_minute=1):
+            pass
+
+    assert excinfo.value.retry_after > 30
+
+
+# ====================================================================
+# B. Provider 429s
+# ====================================================================
+
+async def test_provider_429_becomes_http_429_and_pauses_the_model(client: AsyncClient, scheduler, monkeypatch):
+    """
+    A Groq 429 is surfaced as 429 with Retry-After (not a 500), and later calls to the
+    same model wait out the provider's Retry-After instead of hammering it.
+    """
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(429, headers={"retry-after": "7"}, json={"error": {"message": "rate limited"}})
+
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(
+        ai_service,
+        "_http_client",
+        httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(settings, "AI_MAX_QUEUE_WAIT_SECONDS", 0.05)
+
+    body = {"current_content": "Today.", "selected_text": "Today", "user_instruction": "Expand"}
+    first = await client.post("/api/v1/entries/refine", json=body)
+    assert first.status_code == 429
+    assert first.headers["retry-after"] == "7"
+
+    # The model is paused: the second request is answered without reaching Groq
+    second = await client.post("/api/v1/entries/refine", json=body)
+    assert second.status_code == 429
+    assert len(calls) == 1
+
+    metrics = await client.get("/metrics")
+    assert f'ai_provider_rate_limited_total{{model="{ai_service.LLM_GENERATION_MODEL}"}}' in metrics.text
+    assert "ai_scheduler_wait_seconds_bucket" in metrics.text
@@ -0,0 +1,92 @@
+# backend/tests/test_ai_service.py
+
+import json
+
+import pytest
+import httpx
+
+from app.core.settings import settings
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+# ====================================================================
+# A. Shared HTTP Client
+# ====================================================================
+
+async def test_shared_client_is_reused_and_configured():
+    """
+    The pooled client is created once per worker and configured from Settings.
+    """
+    await ai_service.close_http_client()
+
+    client = ai_service.get_http_client()
+    try:
+        assert ai_service.get_http_client() is client
+        assert str(client.base_url).startswith(ai_service.GROQ_API_BASE_URL)
+        assert client.timeout.connect == settings.GROQ_CONNECT_TIMEOUT
+        assert client.timeout.read == settings.GROQ_READ_TIMEOUT
+    finally:
+        await ai_service.close_http_client()
+
+    # After shutdown a fresh client is created lazily on next use
+    reopened = ai_service.get_http_client()
+    assert reopened is not client
+    await ai_service.close_http_client()
+
+
+async def test_llm_calls_go_through_shared_client(monkeypatch):
+    """
+    _call_llm posts to the chat completions route on the shared client.
+    """
+    seen_paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_paths.append(request.url.path)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(
+        ai_service,
+        "_http_client",
+        httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+
+    assert await ai_service._call_llm("system", "first") == "ok"
+    assert await ai_service._call_llm("system", "second") == "ok"
+    assert seen_paths == ["/openai/v1/chat/completions"] * 2
+
+    await ai_service.close_http_client()
+
+
+# ====================================================================
+# B. Streaming LLM Calls
+# ====================================================================
+
+async def test_stream_llm_yields_deltas_until_done(monkeypatch):
+    """
+    _stream_llm requests `stream: true` and yields each content delta from the SSE body.
+    """
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        chunks = [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "Dear "}}]},
+            {"choices": [{"delta": {"content": "diary"}}]},
+        ]
+        body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(
+        ai_service,
+        "_http_client",
+        httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+
+    deltas = [delta async for delta in ai_service.stream_initial_entry("transcript")]
+    assert deltas == ["Dear ", "diary"]
+
+    await ai_service.close_http_client()
@@ -0,0 +1,165 @@
+# backend/tests/test_auth.py
+
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from jose import jwt
+from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core import security
+from app.core.settings import settings
+from app.db import models
+from app.services import diary_service, principal_cache
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+REFINE_BODY = {"current_content": "Today.", "selected_text": "Today", "user_instruction": "Expand"}
+
+
+def db_lookups() -> float:
+    return principal_cache.LOOKUPS.value(source="db")
+
+
+# ====================================================================
+# A. Cached Principal Resolution
+# ====================================================================
+
+async def test_repeat_requests_skip_the_user_lookup(client: AsyncClient):
+    before = db_lookups()
+
+    for _ in range(3):
+        response = await client.post("/api/v1/entries/refine", json=REFINE_BODY)
+        assert response.status_code == 200
+
+    assert db_lookups() == before + 1
+
+
+async def test_deactivation_invalidates_the_cached_principal(client: AsyncClient, db_session):
+    assert (await client.post("/api/v1/entries/refine", json=REFINE_BODY)).status_code == 200
+
+    user = await db_session.get(models.User, 1)
+    user.is_active = False
+    await db_session.commit()
+
+    response = await client.post("/api/v1/entries/refine", json=REFINE_BODY)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+async def test_cache_changes_wait_for_the_commit():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            user = models.User(email="a@example.com", username="a", hashed_password="x")
+            session.add(user)
+            await session.commit()
+            user_id = user.id
+            principal_cache.cache.set(principal_cache.Principal.from_user(user))
+
+            user.is_active = False
+            await session.flush()
+            assert principal_cache.cache.get(user_id).is_active  # Flushed, not committed
+            await session.rollback()
+            assert principal_cache.cache.get(user_id).is_active
+
+            user = await session.get(models.User, user_id)
+            user.is_active = False
+            await session.commit()
+            assert not principal_cache.cache.get(user_id).is_active
+    finally:
+        await engine.dispose()
+
+
+async def test_signed_claims_resolve_without_the_db(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = security.create_access_token(subject=42, claims={"usr": "claims_user"})
+    assert jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])["usr"] == "claims_user"
+    before = db_lookups()
+
+    response = await client.post(
+        "/api/v1/entries/refine", json=REFINE_BODY, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert db_lookups() == before
+    assert principal_cache.cache.get(42).username == "claims_user"
+
+
+# ====================================================================
+# B. Password Hashing Off the Event Loop
+# ====================================================================
+
+async def test_hashing_does_not_block_the_event_loop():
+    """
+    While a full-cost argon2 hash runs, other coroutines keep getting scheduled.
+    """
+    hashing = asyncio.ensure_future(security.get_password_hash_async("correct horse battery staple"))
+    ticks = 0
+    while not hashing.done():
+        await asyncio.sleep(0.001)
+        ticks += 1
+
+    assert security.verify_password("correct horse battery staple", hashing.result())
+    assert ticks >= 5
+
+
+async def test_login_rehashes_when_argon2_costs_change(client: AsyncClient, db_session, monkeypatch):
+    old_context = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1)
+    new_context = CryptContext(
+        schemes=["argon2"], deprecated="auto", argon2__time_cost=2, argon2__memory_cost=1024, argon2__parallelism=1
+    )
+    user = models.User(email="old@example.com", username="old_hash", hashed_password=old_context.hash("secret"))
+    db_session.add(user)
+    await db_session.commit()
+    monkeypatch.setattr(security, "pwd_context", new_context)
+
+    response = await client.post("/api/v1/auth/login", data={"username": "old_hash", "password": "secret"})
+
+    assert response.status_code == 200
+    await db_session.refresh(user)
+    assert "t=2" in user.hashed_password
+    assert new_context.verify("secret", user.hashed_password)
+
+
+async def test_saturated_hasher_sheds_load_with_503(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    response = await client.post(
+        "/api/v1/auth/signup", json={"email": "busy@example.com", "username": "busy", "password": "secret"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+
+
+# ====================================================================
+# C. Signup Provisioning
+# ====================================================================
+
+async def test_signup_provisions_the_default_diary(client: AsyncClient, db_session, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", CryptContext(
+        schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1
+    ))
+    response = await client.post(
+        "/api/v1/auth/signup", json={"email": "new@example.com", "username": "new_user", "password": "secret"}
+    )
+    assert response.status_code == 200
+
+    diaries = await diary_service.get_diaries_for_user(db_session, response.json()["id"])
+    assert [diary.name for diary in diaries] == ["My Daily Reflections"]
+
+
+async def test_lazily_created_default_diary_matches_signup(db_session):
+    lazy = await diary_service.get_or_create_default_diary(db_session, user_id=4242)
+    at_signup = diary_service.new_default_diary(models.User(email="x@example.com", username="x", hashed_password="x"))
+
+    assert lazy.owner_id == 4242
+    assert (lazy.name, lazy.description) == (at_signup.name, at_signup.description)
+
+    with pytest.raises(TypeError):
+        diary_service.new_default_diary(None)
@@ -0,0 +1,172 @@
+# backend/tests/test_db_sessions.py
+
+import asyncio
+from datetime import date
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.main import app
+from app.core import security
+from app.core.settings import settings
+from app.db import database
+from app.db import models
+from app.db.database import get_db_async
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_REQUESTS = 6
+
+
+# ====================================================================
+# A. Pool occupancy while the AI provider is slow
+# ====================================================================
+
+async def test_slow_ai_calls_do_not_hold_pool_connections(tmp_path, monkeypatch):
+    """
+    Runs more concurrent AI-bound requests than the pool has connections, blocks them
+    inside the (stubbed) STT and LLM calls, and checks that no connection is checked out meanwhile.
+    """
+    # A real pooled engine (the shared test engine is bound to a single connection)
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with SessionLocal() as session:
+        user = models.User(email="pool@example.com", username="pool_user", hashed_password="x")
+        session.add(user)
+        await session.flush()
+        diary = models.Diary(owner_id=user.id, name="Pool Diary")
+        session.add(diary)
+        await session.flush()
+        entry = models.Entry(user_id=user.id, diary_id=diary.id, entry_date=date(2024, 1, 1), content="Past day.")
+        session.add(entry)
+        await session.commit()
+        user_id, entry_id = user.id, entry.id
+
+    async def override_get_db():
+        async with SessionLocal() as session:
+            yield session
+
+    # --- Slow AI stubs: every STT/LLM call parks on its gate until released ---
+    stt_gate, llm_gate = asyncio.Event(), asyncio.Event()
+    parked = {"stt": 0, "llm": 0}
+
+    async def slow_transcribe(audio_file):
+        parked["stt"] += 1
+        await stt_gate.wait()
+        return "A transcript."
+
+    async def slow_llm(*args, **kwargs):
+        parked["llm"] += 1
+        await llm_gate.wait()
+        return "Generated entry."
+
+    async def slow_reflection(entry_text):
+        await slow_llm()
+        return {"mood_score": 7, "mood_emoji": "🙂", "takeaways": ["a", "b", "c"], "action_item": "Rest."}
+
+    async def wait_for_parked(stt: int, llm: int):
+        for _ in range(500):
+            if parked == {"stt": stt, "llm": llm}:
+                return
+            await asyncio.sleep(0.01)
+        assert parked == {"stt": stt, "llm": llm}
+
+    monkeypatch.setattr(ai_service, "get_transcription", slow_transcribe)
+    monkeypatch.setattr(ai_service, "generate_initial_entry", slow_llm)
+    monkeypatch.setattr(ai_service, "integrate_new_content", slow_llm)
+    monkeypatch.setattr(ai_service, "refine_entry", slow_llm)
+    monkeypatch.setattr(ai_service, "generate_daily_reflection", slow_reflection)
+    app.dependency_overrides[get_db_async] = override_get_db
+
+    token = security.create_access_token(subject=user_id)
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as client:
+            refine_body = {"current_content": "Text.", "selected_text": "Text", "user_instruction": "Expand"}
+            requests = []
+            for i in range(CONCURRENT_REQUESTS // 3):
+                requests.append(client.post(
+                    "/api/v1/entries/process_audio",
+                    files={"audio_file": (f"clip{i}.mp3", b"audio bytes", "audio/mp3")},
+                ))
+                requests.append(client.post("/api/v1/entries/refine", json=refine_body))
+                requests.append(client.post(f"/api/v1/entries/reflect/{entry_id}"))
+            in_flight = [asyncio.ensure_future(r) for r in requests]
+
+            uploads = CONCURRENT_REQUESTS // 3
+
+            # 1. Uploads parked in STT, refine/reflect parked in the LLM: nothing is held
+            await wait_for_parked(stt=uploads, llm=CONCURRENT_REQUESTS - uploads)
+            assert engine.pool.checkedout() == 0
+
+            # 2. Uploads move on through their DB unit of work into the LLM: still nothing held
+            stt_gate.set()
+            await wait_for_parked(stt=uploads, llm=CONCURRENT_REQUESTS)
+            assert engine.pool.checkedout() == 0
+
+            # 3. Cheap reads are still served even though the pool only has 2 connections
+            history = await client.get("/api/v1/entries/history")
+            assert history.status_code == 200
+
+            llm_gate.set()
+            responses = await asyncio.gather(*in_flight)
+            assert [r.status_code for r in responses] == [200] * CONCURRENT_REQUESTS
+    finally:
+        stt_gate.set()
+        llm_gate.set()
+        app.dependency_overrides.pop(get_db_async, None)
+        await engine.dispose()
+
+
+# ====================================================================
+# B. Pool configuration and checkout telemetry
+# ====================================================================
+
+async def test_pool_checkout_wait_and_timeouts_are_recorded(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'wait.db'}",
+        poolclass=database.TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    checkouts = database.POOL_WAIT.count()
+    timeouts = database.POOL_TIMEOUTS.value()
+    try:
+        async with engine.connect() as held:
+            await held.execute(text("SELECT 1"))
+            # The only connection is taken, so this checkout waits out the pool timeout
+            with pytest.raises(SQLAlchemyTimeoutError):
+                async with engine.connect():
+                    pass
+        assert database.POOL_WAIT.count() == checkouts + 2
+        assert database.POOL_TIMEOUTS.value() == timeouts + 1
+    finally:
+        await engine.dispose()
+
+def test_pgbouncer_mode_disables_statement_caches(monkeypatch):
+    assert database._connect_args() == {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER_MODE", True)
+    args = database._connect_args()
+    assert args["statement_cache_size"] == 0
+    assert args["prepared_statement_cache_size"] == 0
+    assert args["prepared_statement_name_func"]() != args["prepared_statement_name_func"]()
@@ -3,6 +3,7 @@
 import pytest
 from httpx import AsyncClient
 from datetime import date
+import asyncio
 import io
 import json
 
@@ -110,6 +111,32 @@ async def test_commit_existing_entry_updates(client: AsyncClient):
     assert read_response.status_code == 200
     assert len(read_response.json()) == 1 
 
+async def test_commit_is_a_single_upsert(client: AsyncClient, db_session):
+    """
+    Test that create and update both go through one INSERT ... ON CONFLICT statement
+    and keep the same row.
+    """
+    from sqlalchemy import event
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "entries" in statement:
+            statements.append(statement)
+
+    connection = db_session.get_bind()
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        body = {"content": "v1", "entry_date": "2024-02-01", "diary_id": MOCK_DIARY_ID}
+        first = (await client.post("/api/v1/entries/commit", json=body)).json()
+        second = (await client.post("/api/v1/entries/commit", json={**body, "content": "v2"})).json()
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+    assert second["id"] == first["id"]
+    assert second["content"] == "v2"
+    assert len(statements) == 2
+    assert all("ON CONFLICT" in statement and "RETURNING" in statement for statement in statements)
+
 # ====================================================================
 # D. Test Read Entries Endpoint
 # ====================================================================
@@ -135,4 +162,245 @@ async def test_read_entries_by_date(client: AsyncClient):
     
     # Assert that one entry was returned (the one created in the setup of this test)
     assert len(entries) == 1
-    assert entries[0]["content"] == "Test Entry 1"
\ No newline at end of file
+    assert entries[0]["content"] == "Test Entry 1"
+
+async def test_summary_view_returns_excerpts_and_compresses(client: AsyncClient):
+    """
+    Test that ?view=summary lists excerpts and lengths instead of full content, and
+    that large listings are gzip-compressed.
+    """
+    from app.core.settings import settings
+
+    long_content = "A long day. " * 500
+    for day in (1, 2, 3):
+        await client.post(
+            "/api/v1/entries/commit",
+            json={"content": long_content, "entry_date": f"2024-03-0{day}", "diary_id": MOCK_DIARY_ID}
+        )
+
+    summary = await client.get("/api/v1/entries/history", params={"view": "summary"})
+    assert summary.status_code == 200
+    rows = summary.json()
+    assert [row["entry_date"] for row in rows] == ["2024-03-03", "2024-03-02", "2024-03-01"]
+    assert "content" not in rows[0]
+    assert rows[0]["excerpt"] == long_content[:settings.ENTRY_SUMMARY_EXCERPT_CHARS]
+    assert rows[0]["length"] == len(long_content)
+
+    page = (await client.get("/api/v1/entries/history/page", params={"view": "summary", "limit": 2})).json()
+    assert [row["length"] for row in page["items"]] == [len(long_content)] * 2
+    assert page["next_cursor"] is not None
+
+    by_date = (await client.get("/api/v1/entries/2024-03-01", params={"view": "summary"})).json()
+    assert by_date[0]["excerpt"].startswith("A long day.")
+
+    full = await client.get("/api/v1/entries/history", headers={"Accept-Encoding": "gzip"})
+    assert full.headers["content-encoding"] == "gzip"
+    assert full.json()[0]["content"] == long_content  # httpx decompresses transparently
+    assert int(full.headers["content-length"]) < len(summary.content)
+
+async def test_listings_answer_if_none_match_with_304(client: AsyncClient, db_session):
+    """
+    Test that unchanged listings are revalidated with 304 without querying entries,
+    and that a commit changes the ETag.
+    """
+    from sqlalchemy import event
+
+    body = {"content": "Version one.", "entry_date": "2024-04-01", "diary_id": MOCK_DIARY_ID}
+    await client.post("/api/v1/entries/commit", json=body)
+
+    first = await client.get("/api/v1/entries/history")
+    etag = first.headers["etag"]
+    summary = await client.get("/api/v1/entries/history", params={"view": "summary"})
+    assert summary.headers["etag"] != etag  # Each representation has its own validator
+
+    entry_queries = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM entries" in statement:
+            entry_queries.append(statement)
+
+    connection = db_session.get_bind()
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        revalidated = await client.get("/api/v1/entries/history", headers={"If-None-Match": etag})
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert entry_queries == []
+
+    await client.post("/api/v1/entries/commit", json={**body, "content": "Version two."})
+    changed = await client.get("/api/v1/entries/history", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()[0]["content"] == "Version two."
+
+    by_date = await client.get("/api/v1/entries/2024-04-01")
+    assert (await client.get(
+        "/api/v1/entries/2024-04-01", headers={"If-None-Match": by_date.headers["etag"]}
+    )).status_code == 304
+
+async def test_history_pages_follow_the_cursor(client: AsyncClient):
+    """
+    Test that /history/page walks the whole history newest first, without gaps or repeats.
+    """
+    days = [date(2024, 1, day) for day in (3, 1, 5, 2, 4)]
+    for day in days:
+        await client.post(
+            "/api/v1/entries/commit",
+            json={"content": f"Entry {day}", "entry_date": day.isoformat(), "diary_id": MOCK_DIARY_ID}
+        )
+
+    seen, pages, cursor = [], 0, None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = await client.get("/api/v1/entries/history/page", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen += [item["entry_date"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert seen == [day.isoformat() for day in sorted(days, reverse=True)]
+
+    # The offset endpoint is still served for older clients
+    legacy = (await client.get("/api/v1/entries/history", params={"skip": 1, "limit": 2})).json()
+    assert [item["entry_date"] for item in legacy] == seen[1:3]
+
+    bad = await client.get("/api/v1/entries/history/page", params={"cursor": "not-a-cursor"})
+    assert bad.status_code == 400
+
+# ====================================================================
+# E. Test Streaming (SSE) Variants
+# ====================================================================
+
+def parse_sse(body: str):
+    """Splits an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+async def test_refine_streams_tokens_when_requested(client: AsyncClient):
+    """
+    `?stream=true` relays LLM deltas as `token` events followed by a `done` event.
+    """
+    body = {"current_content": "I had a day.", "selected_text": "a day", "user_instruction": "Be specific"}
+    
+    response = await client.post("/api/v1/entries/refine?stream=true", json=body)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    
+    tokens = [data["delta"] for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert events[-1][0] == "done"
+    assert events[-1][1]["updated_content"] == "".join(tokens)
+
+async def test_process_audio_streams_preview(client: AsyncClient):
+    """
+    The streamed preview starts with its metadata and ends with the full preview body.
+    """
+    files = {'audio_file': ('test_audio.mp3', io.BytesIO(b"mock audio content"), 'audio/mp3')}
+    
+    response = await client.post(
+        "/api/v1/entries/process_audio",
+        files=files,
+        headers={"Accept": "text/event-stream"},
+    )
+    
+    assert response.status_code == 200
+    events = parse_sse(response.text)
+    
+    assert events[0] == ("preview", {"original_content": "", "entry_date": date.today().isoformat(), "diary_id": MOCK_DIARY_ID})
+    assert events[-1][0] == "done"
+    assert events[-1][1]["updated_preview_content"] == "".join(d["delta"] for e, d in events if e == "token")
+
+
+# ====================================================================
+# F. Test Stored Reflections
+# ====================================================================
+
+async def test_reflection_is_stored_and_reused_until_content_changes(client: AsyncClient, monkeypatch):
+    """
+    The first POST generates and stores insights; later calls reuse them until the entry is updated.
+    """
+    from app.services import ai_service
+
+    calls = []
+
+    async def mock_reflection(entry_text):
+        calls.append(entry_text)
+        return {"mood_score": 8, "mood_emoji": "😊", "takeaways": ["a", "b", "c"], "action_item": "Sleep early."}
+
+    monkeypatch.setattr(ai_service, "generate_daily_reflection", mock_reflection)
+
+    today = date.today().isoformat()
+    entry = (await client.post(
+        "/api/v1/entries/commit",
+        json={"content": "Good day.", "entry_date": today, "diary_id": MOCK_DIARY_ID}
+    )).json()
+    url = f"/api/v1/entries/reflect/{entry['id']}"
+
+    # 1. Nothing stored yet
+    assert (await client.get(url)).status_code == 404
+
+    # 2. Generated once, then served from storage
+    first = await client.post(url)
+    assert first.status_code == 200
+    assert (await client.post(url)).json() == first.json()
+    assert (await client.get(url)).json() == first.json()
+    assert calls == ["Good day."]
+
+    # 3. New content invalidates the stored reflection
+    await client.post(
+        "/api/v1/entries/commit",
+        json={"content": "Actually a great day.", "entry_date": today, "diary_id": MOCK_DIARY_ID}
+    )
+    assert (await client.get(url)).status_code == 404
+    assert (await client.post(url)).status_code == 200
+    assert calls == ["Good day.", "Actually a great day."]
+
+
+# ====================================================================
+# F. Test DB Lookups Overlapping Transcription
+# ====================================================================
+
+async def test_process_audio_resolves_the_diary_during_stt(client: AsyncClient, db_session, monkeypatch):
+    """
+    The existing-entry and default-diary lookups run while STT is in flight, and the
+    default diary id is cached for the next recording.
+    """
+    from sqlalchemy import event
+    from app.services import ai_service, diary_service
+
+    async def transcribe_after_lookup(audio_file):
+        # Would time out if the lookup only started after STT returned
+        while MOCK_USER_ID not in diary_service.default_diary_ids:
+            await asyncio.sleep(0.01)
+        return "A day with overlapping work."
+
+    monkeypatch.setattr(ai_service, "get_transcription", transcribe_after_lookup)
+    files = {'audio_file': ('test_audio.mp3', b"mock audio content", 'audio/mp3')}
+
+    response = await asyncio.wait_for(client.post("/api/v1/entries/process_audio", files=files), timeout=5)
+    assert response.status_code == 200
+    assert response.json()["diary_id"] == diary_service.default_diary_ids[MOCK_USER_ID]
+
+    diary_queries = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM diaries" in statement:
+            diary_queries.append(statement)
+
+    connection = db_session.get_bind()
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        response = await client.post("/api/v1/entries/process_audio", files=files)
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert diary_queries == []
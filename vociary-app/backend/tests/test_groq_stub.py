@@ -0,0 +1,59 @@
+# backend/tests/test_groq_stub.py
+
+import io
+
+import httpx
+import pytest
+from fastapi import UploadFile
+
+import groq_stub
+from app.core.settings import settings
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def use_stub(monkeypatch):
+    """Points ai_service at an in-process stub (same routes and payloads as over the network)."""
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "stub")
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_ATTEMPTS", 1)
+
+    def use(**overrides):
+        config = groq_stub.StubConfig(latency_ms=1, latency_sigma=0, ttft_ms=0, tokens_per_second=1e6, seed=7, **overrides)
+        monkeypatch.setattr(
+            ai_service,
+            "_http_client",
+            httpx.AsyncClient(
+                base_url="http://groq-stub/openai/v1",
+                transport=httpx.ASGITransport(app=groq_stub.create_app(config)),
+            ),
+        )
+    return use
+
+
+async def test_stub_speaks_the_groq_routes(use_stub):
+    use_stub()
+    upload = UploadFile(file=io.BytesIO(b"\x00" * 20000), filename="day.webm", size=20000)
+
+    transcript = await ai_service.get_transcription(upload)
+    assert len(transcript.split()) == 10  # Scales with the upload size
+
+    assert await ai_service.generate_initial_entry(transcript)
+    deltas = [delta async for delta in ai_service.stream_initial_entry(transcript)]
+    assert len(deltas) == groq_stub.StubConfig.completion_tokens
+
+    reflection = await ai_service.generate_daily_reflection(transcript)
+    assert set(reflection) == {"mood_score", "mood_emoji", "takeaways", "action_item"}
+
+
+async def test_stub_injects_rate_limits_and_errors(use_stub):
+    use_stub(rate_limit_rate=1.0, retry_after=0.05)
+    with pytest.raises(ai_service.AIRateLimitError) as excinfo:
+        await ai_service.generate_initial_entry("hello")
+    assert excinfo.value.retry_after == 0.05
+
+    use_stub(error_rate=1.0)
+    with pytest.raises(Exception, match="Groq LLM call failed"):
+        await ai_service.generate_initial_entry("hello")
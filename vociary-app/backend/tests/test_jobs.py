@@ -0,0 +1,127 @@
+# backend/tests/test_jobs.py
+
+import asyncio
+import io
+from contextlib import asynccontextmanager
+from datetime import date
+
+import pytest
+from fastapi import UploadFile
+from httpx import AsyncClient
+
+from app.services import job_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def runner(db_session, monkeypatch):
+    """A job runner bound to this test's event loop and transactional session."""
+    @asynccontextmanager
+    async def test_session():
+        yield db_session
+
+    test_runner = job_service.JobRunner(job_service.store, workers=1, queue_size=1, session_factory=test_session)
+    monkeypatch.setattr(job_service, "runner", test_runner)
+    yield test_runner
+    await test_runner.stop()
+
+
+def audio_upload():
+    return {'audio_file': ('test_audio.mp3', io.BytesIO(b"mock audio content"), 'audio/mp3')}
+
+
+# ====================================================================
+# A. Async Job Mode for /process_audio
+# ====================================================================
+
+async def test_async_upload_returns_job_and_result(client: AsyncClient, runner):
+    """
+    `?async=true` answers 202 right away; the preview is fetched from the status endpoint.
+    """
+    response = await client.post("/api/v1/entries/process_audio?async=true", files=audio_upload())
+
+    assert response.status_code == 202
+    accepted = response.json()
+    assert response.headers["location"] == accepted["status_url"]
+
+    for _ in range(200):
+        job = (await client.get(accepted["status_url"])).json()
+        if job["status"] in ("succeeded", "failed"):
+            break
+        await asyncio.sleep(0.01)
+
+    assert job["status"] == "succeeded"
+    assert job["result"]["entry_date"] == date.today().isoformat()
+    assert job["result"]["updated_preview_content"] == (
+        "Refined entry based on: The presentation was great. I also ate a delicious sandwich for lunch."
+    )
+
+    # The event stream of a finished job ends with its `done` event
+    events = await client.get(accepted["events_url"])
+    assert events.text.startswith("event: done")
+
+
+async def test_full_queue_is_rejected_with_503(client: AsyncClient, runner):
+    """
+    With every worker busy and the queue full, new jobs are refused instead of piling up.
+    """
+    release = asyncio.Event()
+
+    async def blocked(db):
+        await release.wait()
+        return {}
+
+    await runner.submit(1, "blocker", blocked)   # Taken by the single worker
+    await asyncio.sleep(0)
+    await runner.submit(1, "blocker", blocked)   # Fills the queue (size 1)
+
+    response = await client.post("/api/v1/entries/process_audio?async=true", files=audio_upload())
+    release.set()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+
+
+async def test_jobs_are_private_to_their_owner(client: AsyncClient, runner):
+    job = await runner.submit(999, "process_audio", lambda db: asyncio.sleep(0, result={}))
+
+    response = await client.get(f"/api/v1/entries/jobs/{job.id}")
+    assert response.status_code == 404
+
+
+# ====================================================================
+# B. Shutdown and Detached Uploads
+# ====================================================================
+
+async def test_stop_fails_queued_jobs_and_runs_their_cleanup(runner):
+    release, closed = asyncio.Event(), []
+
+    async def blocked(db):
+        await release.wait()
+        return {}
+
+    async def close(name):
+        closed.append(name)
+
+    running = await runner.submit(1, "blocker", blocked, cleanup=lambda: close("running"))
+    await asyncio.sleep(0)
+    queued = await runner.submit(1, "blocker", blocked, cleanup=lambda: close("queued"))
+
+    await runner.stop()
+
+    assert sorted(closed) == ["queued", "running"]
+    assert queued.status == running.status == job_service.JobStatus.FAILED
+    assert queued.error == job_service.SHUTDOWN_ERROR
+
+
+async def test_detached_upload_keeps_its_size():
+    original = UploadFile(file=io.BytesIO(b"mock audio content"), filename="day.mp3", size=18)
+
+    detached = await job_service.detach_upload(original)
+    try:
+        assert detached.size == 18
+        assert await detached.read() == b"mock audio content"
+    finally:
+        await detached.close()
@@ -0,0 +1,58 @@
+# backend/tests/test_loadtest.py
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+import generate_audio
+import loadtest
+from app.main import app
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+async def test_load_run_covers_the_journey_and_compares(client: AsyncClient, tmp_path):
+    """
+    A short in-process run exercises every endpoint of the journey and produces
+    results that can be compared with a previous run.
+    """
+    corpus = tmp_path / "corpus"
+    generate_audio.generate_corpus(str(corpus), count=2, min_seconds=1, max_seconds=2, seed=1)
+    args = loadtest.parse_args([
+        "--base-url", "http://test", "--users", "1", "--duration", "0.5", "--ramp-up", "0",
+        "--think-time", "0", "--corpus", str(corpus), "--seed", "7",
+    ])
+
+    results = await loadtest.run(args, transport=httpx.ASGITransport(app=app))
+
+    endpoints = results["endpoints"]
+    assert set(endpoints) == {"signup", "login", "process_audio", "commit", "history", "reflect"}
+    assert all(stats["error_rate"] == 0 for stats in endpoints.values()), endpoints
+    assert endpoints["process_audio"]["p50_ms"] <= endpoints["process_audio"]["p99_ms"]
+
+    slower = {"endpoints": {name: dict(stats, p95_ms=stats["p95_ms"] / 2) for name, stats in endpoints.items()}}
+    assert loadtest.compare(results, results, threshold=0.2) == []
+    assert loadtest.compare(results, slower, threshold=0.2)
+
+
+def test_seeded_users_repeat_their_action_sequence():
+    args = loadtest.parse_args(["--corpus", "unused"])
+    weights = loadtest.parse_mix(args.mix)
+
+    def sequence(seed: int):
+        user = loadtest.VirtualUser(None, loadtest.Recorder(), ["a.wav"], args, loadtest.random.Random(seed))
+        user.pending_preview, user.entry_ids = {}, [1]  # Every action available
+        return [user.next_action(weights) for _ in range(30)]
+
+    first = sequence(7)
+    assert first[:4] == list(loadtest.ACTIONS)  # The journey comes first, in order
+    assert first == sequence(7)
+    assert first != sequence(8)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert loadtest.percentile(values, 0.50) == 50
+    assert loadtest.percentile(values, 0.95) == 95
+    assert loadtest.percentile(values, 0.99) == 99
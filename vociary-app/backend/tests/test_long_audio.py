@@ -0,0 +1,179 @@
+# backend/tests/test_long_audio.py
+
+import asyncio
+import io
+import tracemalloc
+import wave
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import UploadFile
+
+from app.core.settings import settings
+from app.services import ai_service, audio_utils
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+RATE = 8000
+
+
+def tone_with_gaps(seconds: int, gaps_at: list) -> np.ndarray:
+    """A loud tone with 0.5 s of silence starting at each offset in `gaps_at`."""
+    t = np.arange(seconds * RATE) / RATE
+    samples = (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+    for gap in gaps_at:
+        samples[int(gap * RATE): int((gap + 0.5) * RATE)] = 0
+    return samples
+
+
+# ====================================================================
+# A. Segmentation and Stitching
+# ====================================================================
+
+def test_cuts_land_on_silence_and_segments_overlap():
+    samples = tone_with_gaps(seconds=100, gaps_at=[27, 58, 83])
+
+    bounds = audio_utils.split_on_silence(samples, RATE, segment_seconds=30, overlap_seconds=1, search_seconds=5)
+
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(samples)
+    for (_, end), (next_start, _) in zip(bounds, bounds[1:]):
+        cut = (end + next_start) / 2
+        assert end - next_start == pytest.approx(RATE, abs=2)  # 1 s shared around the cut
+        assert np.abs(samples[int(cut)]) == 0                   # Cut is inside a silent gap
+
+
+def test_merge_transcripts_drops_overlapping_words():
+    parts = [
+        "I went to the market and bought",
+        "and bought some fresh bread. Then I",
+        "then I walked home.",
+    ]
+    assert audio_utils.merge_transcripts(parts) == (
+        "I went to the market and bought some fresh bread. Then I walked home."
+    )
+
+
+# ====================================================================
+# B. Parallel Transcription of a Long Recording
+# ====================================================================
+
+async def test_long_wav_is_transcribed_in_bounded_parallel_segments(monkeypatch):
+    samples = tone_with_gaps(seconds=200, gaps_at=[58, 118, 178])
+    upload = UploadFile(file=io.BytesIO(audio_utils.encode_wav(samples, RATE)), filename="long.wav")
+
+    in_flight, peak, order = 0, 0, []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        index = int(request.content.split(b'filename="segment-')[1][:3])
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05 * (4 - index))  # Later segments finish first
+        in_flight -= 1
+        order.append(index)
+        return httpx.Response(200, json={"text": f"part {index} end{index}"})
+
+    monkeypatch.setattr(settings, "STT_LONG_AUDIO_THRESHOLD_SECONDS", 120)
+    monkeypatch.setattr(settings, "STT_SEGMENT_SECONDS", 60)
+    monkeypatch.setattr(settings, "STT_MAX_PARALLEL_SEGMENTS", 2)
+    monkeypatch.setattr(ai_service, "is_configured", lambda: True)
+    monkeypatch.setattr(
+        ai_service, "_http_client",
+        httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=httpx.MockTransport(handler)),
+    )
+
+    try:
+        transcript = await ai_service.get_transcription(upload)
+    finally:
+        await ai_service.close_http_client()
+
+    assert peak == 2
+    assert order != sorted(order)  # Completed out of order...
+    assert transcript == "part 0 end0 part 1 end1 part 2 end2 part 3 end3"  # ...stitched in order
+
+
+# ====================================================================
+# C. Compressed Uploads (probed before any decode)
+# ====================================================================
+
+@pytest.mark.parametrize("format_info, decoded", [
+    ({"duration": "100.0"}, False),                    # Header duration under the threshold
+    ({"duration": "N/A", "bit_rate": "128000"}, False),  # 2 MB at 128 kbps is about 131 s
+    ({"duration": "300.0"}, True),
+    (None, True),                                      # No duration metadata: only decoding can tell
+])
+async def test_compressed_uploads_are_only_decoded_when_long(monkeypatch, format_info, decoded):
+    upload = UploadFile(file=io.BytesIO(b"\xff\xfb" * (1024 * 1024)), filename="day.mp3")
+    decodes = []
+
+    async def fake_probe(audio_file):
+        return format_info
+
+    async def fake_decode(audio_file):
+        decodes.append(audio_file.filename)
+        return None
+
+    monkeypatch.setattr(settings, "STT_LONG_AUDIO_THRESHOLD_SECONDS", 180)
+    monkeypatch.setattr(audio_utils, "_ffprobe_format", fake_probe)
+    monkeypatch.setattr(audio_utils, "decode_to_pcm", fake_decode)
+
+    assert await audio_utils.split_long_audio(upload) is None
+    assert bool(decodes) == decoded
+
+
+
+# ====================================================================
+# D. Bounded Memory and Duration Cap
+# ====================================================================
+
+async def test_long_stereo_wav_is_split_in_bounded_memory(monkeypatch):
+    seconds, rate = 400, 16000
+    mono = (8000 * np.sin(2 * np.pi * 220 * np.arange(seconds * rate) / rate)).astype(np.int16)
+    for gap in (115, 235, 355):
+        mono[gap * rate: int((gap + 0.5) * rate)] = 0
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(mono, 2).tobytes())
+    upload = UploadFile(file=buffer, filename="long.wav")
+    upload_bytes = len(buffer.getvalue())
+    del mono
+
+    monkeypatch.setattr(settings, "STT_SEGMENT_SECONDS", 120)
+    tracemalloc.start()
+    try:
+        recording = await audio_utils.split_long_audio(upload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    try:
+        assert peak < upload_bytes / 10, f"peak {peak} bytes for a {upload_bytes} byte recording"
+        assert recording.duration == seconds and len(recording) == 4
+        for (_, end), (next_start, _) in zip(recording.bounds, recording.bounds[1:]):
+            assert abs((end + next_start) / 2 / rate - round((end + next_start) / 2 / rate)) < 0.6  # In a gap
+
+        segment = await recording.segment_wav(1)
+        with wave.open(io.BytesIO(segment), "rb") as wav:
+            assert wav.getnchannels() == 1
+            assert wav.getnframes() == recording.bounds[1][1] - recording.bounds[1][0]
+    finally:
+        recording.close()
+
+
+async def test_recordings_over_the_duration_limit_are_rejected(monkeypatch):
+    upload = UploadFile(file=io.BytesIO(audio_utils.encode_wav(np.zeros(200 * RATE, np.int16), RATE)), filename="a.wav")
+    monkeypatch.setattr(settings, "MAX_AUDIO_DURATION_SECONDS", 150)
+    with pytest.raises(audio_utils.AudioLimitError):
+        await audio_utils.split_long_audio(upload)
+
+    # Formats without duration metadata hit the same cap while decoding
+    writer = audio_utils._PcmWriter(RATE)
+    writer.write(np.zeros(100 * RATE, np.int16))
+    with pytest.raises(audio_utils.AudioLimitError):
+        writer.write(np.zeros(60 * RATE, np.int16))
+    writer.abort()
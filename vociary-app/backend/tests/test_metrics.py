@@ -0,0 +1,101 @@
+# backend/tests/test_metrics.py
+
+import httpx
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import groq_stub
+from app.core.request_metrics import REQUEST_SECONDS, RequestMetricsMiddleware
+from app.db import database
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+# ====================================================================
+# A. Request latency per route
+# ====================================================================
+
+async def test_requests_are_labelled_by_route_template(client: AsyncClient):
+    await client.get("/api/v1/entries/2024-01-01")
+    await client.get("/api/v1/entries/2024-01-02")
+    await client.get("/no/such/route")
+
+    # One series for both dates (the template is all that is kept of the path)
+    routes = {key[1]: REQUEST_SECONDS.count(method="GET", route=key[1], status="200")
+              for key in REQUEST_SECONDS._counts if key[0] == "GET" and key[2] == "200"}
+    by_date = [route for route in routes if route.endswith("/entries/{entry_date}")]
+    assert len(by_date) == 1 and routes[by_date[0]] >= 2
+    assert REQUEST_SECONDS.count(method="GET", route="unmatched", status="404") >= 1
+
+    body = (await client.get("/metrics")).text
+    assert "http_request_duration_seconds_bucket{" in body
+    assert "db_pool_connections" in body
+
+
+def test_request_metrics_wrap_every_other_middleware():
+    from app.main import app
+    assert app.user_middleware[0].cls is RequestMetricsMiddleware  # First in the list = outermost
+
+
+# ====================================================================
+# B. AI stages (STT upload/response, LLM per task, tokens)
+# ====================================================================
+
+async def test_llm_latency_and_tokens_are_recorded_per_task(monkeypatch):
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "stub")
+    config = groq_stub.StubConfig(latency_ms=1, latency_sigma=0, ttft_ms=0, tokens_per_second=1e6, seed=3)
+    monkeypatch.setattr(
+        ai_service,
+        "_http_client",
+        httpx.AsyncClient(
+            base_url="http://groq-stub/openai/v1",
+            transport=httpx.ASGITransport(app=groq_stub.create_app(config)),
+        ),
+    )
+    calls = ai_service.LLM_SECONDS.count(task="refine_entry")
+    completion = ai_service.AI_TOKENS.value(task="refine_entry", kind="completion")
+
+    await ai_service.refine_entry("Entry.", "Entry", "Make it longer")
+    _ = [delta async for delta in ai_service.stream_refined_entry("Entry.", "Entry", "Make it longer")]
+
+    assert ai_service.LLM_SECONDS.count(task="refine_entry") == calls + 2
+    assert ai_service.AI_TOKENS.value(task="refine_entry", kind="completion") == completion + 2 * config.completion_tokens
+    assert ai_service.AI_TOKENS.value(task="refine_entry", kind="prompt") > 0
+    await ai_service.close_http_client()
+
+def test_stt_trace_splits_upload_and_response_time():
+    uploads = ai_service.STT_SECONDS.count(stage="upload")
+    responses = ai_service.STT_SECONDS.count(stage="response")
+
+    trace = ai_service._stt_stage_trace()
+    for event in ("send_request_headers.started", "send_request_body.started",
+                  "send_request_body.complete", "receive_response_headers.started",
+                  "receive_response_headers.complete"):
+        trace(f"http11.{event}", {})
+
+    assert ai_service.STT_SECONDS.count(stage="upload") == uploads + 1
+    assert ai_service.STT_SECONDS.count(stage="response") == responses + 1
+
+
+# ====================================================================
+# C. DB query time
+# ====================================================================
+
+async def test_queries_are_timed_by_operation(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'timed.db'}")
+    database.instrument_queries(engine)
+    selects = database.QUERY_SECONDS.count(operation="select")
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(Exception):
+                await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(text("SELECT 2"))
+            assert not conn.sync_connection.info["query_started"]
+        assert database.QUERY_SECONDS.count(operation="select") == selects + 2
+    finally:
+        await engine.dispose()
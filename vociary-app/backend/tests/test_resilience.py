@@ -0,0 +1,176 @@
+# backend/tests/test_resilience.py
+
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+from app.core.settings import settings
+from app.services import ai_service, resilience
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+OK_BODY = {"choices": [{"message": {"content": "ok"}}]}
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    """Routes ai_service through a mock transport driven by the test's handler."""
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "AI_RETRY_BASE_DELAY_SECONDS", 0.01)
+
+    def use(handler):
+        monkeypatch.setattr(
+            ai_service,
+            "_http_client",
+            httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=httpx.MockTransport(handler)),
+        )
+    return use
+
+
+# ====================================================================
+# A. Retries
+# ====================================================================
+
+async def test_transient_5xx_is_retried(groq, caplog):
+    responses = iter([httpx.Response(503), httpx.Response(502), httpx.Response(200, json=OK_BODY)])
+    groq(lambda request: next(responses))
+    before = resilience.RETRIES.value(operation="llm", reason="status_5xx")
+
+    with caplog.at_level(logging.WARNING, logger="app.services.resilience"):
+        assert await ai_service._call_llm("system", "user") == "ok"
+    assert resilience.RETRIES.value(operation="llm", reason="status_5xx") == before + 2
+    assert [(record.operation, record.retry) for record in caplog.records] == [("llm", 1), ("llm", 2)]
+
+
+async def test_client_errors_are_not_retried(groq):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    groq(handler)
+    with pytest.raises(Exception, match="Groq LLM call failed"):
+        await ai_service._call_llm("system", "user")
+    assert len(calls) == 1
+
+
+async def test_slow_attempt_times_out_and_is_retried(groq, monkeypatch):
+    monkeypatch.setattr(settings, "AI_ATTEMPT_TIMEOUT_SECONDS", 0.05)
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json=OK_BODY)
+
+    groq(handler)
+    assert await ai_service._call_llm("system", "user") == "ok"
+    assert len(calls) == 2
+
+
+async def test_stream_is_retried_before_the_first_delta(groq):
+    chunks = 'data: {"choices": [{"delta": {"content": "hi"}}]}\n\ndata: [DONE]\n\n'
+    responses = iter([httpx.Response(500), httpx.Response(200, text=chunks)])
+    groq(lambda request: next(responses))
+
+    assert [delta async for delta in ai_service._stream_llm("system", "user")] == ["hi"]
+
+
+# ====================================================================
+# B. Hedging
+# ====================================================================
+
+async def test_slow_request_is_hedged(groq, monkeypatch):
+    """
+    Once the first request is slower than the hedge delay, a duplicate is sent and
+    the faster answer wins.
+    """
+    monkeypatch.setattr(settings, "AI_HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_HEDGE_MIN_DELAY_SECONDS", 0.05)
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return httpx.Response(200, json=OK_BODY)
+
+    groq(handler)
+    wins = resilience.HEDGE_WINS.value(operation="llm")
+
+    assert await asyncio.wait_for(ai_service._call_llm("system", "user"), timeout=2) == "ok"
+    assert len(calls) == 2
+    assert resilience.HEDGE_WINS.value(operation="llm") == wins + 1
+
+
+# ====================================================================
+# C. Circuit Breaker
+# ====================================================================
+
+async def test_open_circuit_fails_fast_with_503(client, groq, monkeypatch):
+    """
+    After repeated provider failures the circuit opens and requests get an immediate
+    503 with Retry-After instead of waiting on Groq.
+    """
+    monkeypatch.setattr(settings, "AI_RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    groq(handler)
+    body = {"current_content": "Today.", "selected_text": "Today", "user_instruction": "Expand"}
+    for _ in range(2):
+        assert (await client.post("/api/v1/entries/refine", json=body)).status_code == 500
+
+    response = await client.post("/api/v1/entries/refine", json=body)
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert len(calls) == 2
+    assert resilience.breakers["llm"].state == resilience.CircuitState.OPEN
+
+
+async def test_half_open_probe_closes_the_circuit(groq, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT_SECONDS", 0.05)
+    breaker = resilience.breakers["llm"]
+    groq(lambda request: httpx.Response(200, json=OK_BODY))
+
+    with caplog.at_level(logging.INFO, logger="app.services.resilience"):
+        breaker._transition(resilience.CircuitState.OPEN)
+        with pytest.raises(ai_service.AIUnavailableError):
+            await ai_service._call_llm("system", "user")
+
+        await asyncio.sleep(0.06)
+        assert await ai_service._call_llm("system", "user") == "ok"
+    assert breaker.state == resilience.CircuitState.CLOSED
+    assert [record.state for record in caplog.records if record.circuit == "llm"][0] == "OPEN"
+    assert caplog.records[-1].state == "CLOSED" and caplog.records[-1].levelname == "INFO"
+
+
+async def test_degraded_mode_returns_raw_transcript_draft(client, groq, monkeypatch):
+    """
+    With the LLM circuit open, /process_audio still returns a savable preview: the raw
+    transcript, flagged as degraded.
+    """
+    async def generate_via_llm(transcript):
+        return await ai_service._call_llm("system", transcript)
+
+    monkeypatch.setattr(ai_service, "generate_initial_entry", generate_via_llm)
+    resilience.breakers["llm"]._transition(resilience.CircuitState.OPEN)
+
+    files = {'audio_file': ('test_audio.mp3', b"mock audio content", 'audio/mp3')}
+    response = await client.post("/api/v1/entries/process_audio", files=files)
+
+    assert response.status_code == 200
+    preview = response.json()
+    assert preview["degraded"] is True
+    assert preview["updated_preview_content"] == (
+        "The presentation was great. I also ate a delicious sandwich for lunch."
+    )
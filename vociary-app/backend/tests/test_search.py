@@ -0,0 +1,95 @@
+# backend/tests/test_search.py
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+
+from app.db import models
+from app.services import diary_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+MOCK_DIARY_ID = 1
+
+ENTRIES = {
+    "2024-05-01": "A quiet morning. I went for a walk by the river.",
+    "2024-05-02": "Work was busy; no time to walk today.",
+    "2024-05-03": "Walk, then another walk after dinner. Walking helps me think.",
+    "2024-05-04": "Cooked pasta and called my sister.",
+}
+
+
+async def commit_entries(client: AsyncClient):
+    for entry_date, content in ENTRIES.items():
+        await client.post(
+            "/api/v1/entries/commit",
+            json={"content": content, "entry_date": entry_date, "diary_id": MOCK_DIARY_ID}
+        )
+
+
+# ====================================================================
+# A. Search Endpoint (portable path on SQLite)
+# ====================================================================
+
+async def test_search_ranks_and_highlights_matches(client: AsyncClient):
+    await commit_entries(client)
+
+    response = await client.get("/api/v1/entries/search", params={"q": "walk"})
+    assert response.status_code == 200
+    hits = response.json()["items"]
+
+    assert [hit["entry_date"] for hit in hits] == ["2024-05-03", "2024-05-02", "2024-05-01"]
+    assert hits[0]["rank"] > hits[1]["rank"]
+    assert "<mark>walk</mark>" in hits[1]["snippet"]
+    assert "<mark>Walk</mark>" in hits[0]["snippet"]
+
+    nothing = (await client.get("/api/v1/entries/search", params={"q": "volcano"})).json()
+    assert nothing == {"items": [], "next_cursor": None}
+
+
+async def test_search_pages_follow_the_cursor(client: AsyncClient):
+    await commit_entries(client)
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "walk", "limit": 1} if cursor is None else {"q": "walk", "limit": 1, "cursor": cursor}
+        page = (await client.get("/api/v1/entries/search", params=params)).json()
+        seen += [hit["entry_date"] for hit in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ["2024-05-03", "2024-05-02", "2024-05-01"]
+    bad = await client.get("/api/v1/entries/search", params={"q": "walk", "cursor": "bm9wZQ"})
+    assert bad.status_code == 400
+
+
+# ====================================================================
+# B. PostgreSQL Path
+# ====================================================================
+
+def test_postgres_search_uses_the_indexed_tsvector():
+    sql = str(diary_service._ranked_matches(1, "river walk", postgres=True).compile(dialect=postgresql.dialect()))
+    assert "entries.content_tsv @@ websearch_to_tsquery" in sql
+    assert "ts_rank_cd(entries.content_tsv" in sql
+
+    ddl = models.postgres_search_ddl("english")
+    assert "GENERATED ALWAYS AS (to_tsvector('english'" in ddl[0]
+    assert "USING GIN (content_tsv)" in ddl[1]
+
+
+def test_snippets_are_cut_around_the_first_match():
+    content = "Nothing here. " * 30 + "Finally a long walk home."
+    snippet = diary_service.highlight_snippet(content, ["walk"], max_chars=60)
+    assert snippet.startswith("...")
+    assert "<mark>walk</mark>" in snippet
+
+
+def test_snippets_escape_the_entry_text():
+    content = '<img src=x onerror="alert(1)"> walk & talk; amp'
+    snippet = diary_service.highlight_snippet(content, ["walk", "amp"], max_chars=200)
+    assert snippet == "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>walk</mark> &amp; talk; <mark>amp</mark>"
+
+    headline = "<b>a</b> \ue000walk\ue001 & talk"
+    assert diary_service.escape_headline(headline) == "&lt;b&gt;a&lt;/b&gt; <mark>walk</mark> &amp; talk"
@@ -0,0 +1,158 @@
+# backend/tests/test_similar.py
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.db import models
+from app.services import diary_service, vector_index
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+MOCK_DIARY_ID = 1
+
+ENTRIES = {
+    "2024-05-01": "A quiet morning. I went for a walk by the river.",
+    "2024-05-02": "Work was busy; no time to walk today.",
+    "2024-05-03": "Walk, then another walk after dinner. Walking helps me think.",
+    "2024-05-04": "Cooked pasta and called my sister.",
+}
+
+
+async def commit_entries(client: AsyncClient):
+    for entry_date, content in ENTRIES.items():
+        await client.post(
+            "/api/v1/entries/commit",
+            json={"content": content, "entry_date": entry_date, "diary_id": MOCK_DIARY_ID}
+        )
+
+
+# ====================================================================
+# A. Similar Entries Endpoint
+# ====================================================================
+
+async def test_similar_days_rank_related_entries_first(client: AsyncClient):
+    await commit_entries(client)
+
+    response = await client.get("/api/v1/entries/2024-05-01/similar", params={"k": 2})
+    assert response.status_code == 200
+    similar = response.json()
+    assert [item["entry_date"] for item in similar] == ["2024-05-03", "2024-05-02"]
+    assert 0 < similar[1]["score"] < similar[0]["score"] <= 1
+    assert similar[0]["excerpt"].startswith("Walk, then")
+
+    missing = await client.get("/api/v1/entries/2023-01-01/similar")
+    assert missing.status_code == 404
+
+
+async def test_commits_update_the_cached_index_incrementally(client: AsyncClient, db_session):
+    await commit_entries(client)
+    await client.get("/api/v1/entries/2024-05-01/similar")
+    user_id = (await db_session.execute(select(models.Entry.user_id))).scalars().first()
+    index = vector_index.indexes.get(user_id)
+    assert index.size == len(ENTRIES)
+
+    await client.post(
+        "/api/v1/entries/commit",
+        json={"content": "Long walk along the river at dusk.", "entry_date": "2024-05-05", "diary_id": MOCK_DIARY_ID}
+    )
+    assert vector_index.indexes.get(user_id) is index  # Updated in place, not rebuilt
+    assert index.size == len(ENTRIES) + 1
+    assert index.version == await diary_service.get_data_version(db_session, user_id)
+
+    similar = (await client.get("/api/v1/entries/2024-05-01/similar", params={"k": 1})).json()
+    assert similar[0]["entry_date"] == "2024-05-05"
+    stored = (await db_session.execute(select(models.EntryEmbedding))).scalars().all()
+    assert len(stored) == len(ENTRIES) + 1
+    assert all(len(row.vector) == 512 for row in stored)
+
+
+async def test_missing_vectors_are_backfilled_on_load(client: AsyncClient, db_session):
+    await commit_entries(client)
+    await db_session.execute(models.EntryEmbedding.__table__.delete())
+    vector_index.indexes.clear()
+
+    similar = (await client.get("/api/v1/entries/2024-05-01/similar", params={"k": 1})).json()
+    assert similar[0]["entry_date"] == "2024-05-03"
+    stored = (await db_session.execute(select(models.EntryEmbedding))).scalars().all()
+    assert len(stored) == len(ENTRIES)
+
+
+async def test_the_starting_entry_is_chosen_deterministically(client: AsyncClient, db_session):
+    await commit_entries(client)
+    user_id = (await db_session.execute(select(models.Entry.user_id))).scalars().first()
+    assert (await diary_service.get_or_create_default_diary(db_session, user_id)).id == MOCK_DIARY_ID
+    other = models.Diary(owner_id=user_id, name="Dinners")
+    db_session.add(other)
+    await db_session.commit()
+    await client.post(
+        "/api/v1/entries/commit",
+        json={"content": "Cooked pasta for my sister again.", "entry_date": "2024-05-01", "diary_id": other.id}
+    )
+
+    default = (await client.get("/api/v1/entries/2024-05-01/similar", params={"k": 1})).json()
+    chosen = (await client.get("/api/v1/entries/2024-05-01/similar", params={"k": 1, "diary_id": other.id})).json()
+    assert default[0]["entry_date"] == "2024-05-03"  # From the walk by the river, in the oldest diary
+    assert chosen[0]["entry_date"] == "2024-05-04"  # From the pasta entry in the other diary
+    missing = await client.get("/api/v1/entries/2024-05-01/similar", params={"diary_id": other.id + 1})
+    assert missing.status_code == 404
+
+
+# ====================================================================
+# B. Vectors, Index and Cache
+# ====================================================================
+
+def test_vectors_survive_int8_storage():
+    vector = vector_index.embed("A walk by the river, then tea.")
+    assert vector.dtype == np.float32 and np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, vector_index.embed("a WALK by the river then tea"))
+
+    data, scale = vector_index.quantize(vector)
+    assert len(data) == len(vector)
+    assert np.abs(vector_index.dequantize(data, scale) - vector).max() <= scale / 2 + 1e-6
+
+
+def test_index_search_excludes_and_upserts():
+    texts = ["river walk", "walk to work", "pasta dinner", "river swim"]
+    index = vector_index.UserVectorIndex(dim=64)
+    for entry_id, text in enumerate(texts, start=1):
+        index.upsert(entry_id, vector_index.embed(text, 64))
+    query = vector_index.embed("river walk", 64)
+
+    assert index.search(query, k=1)[0][0] == 1
+    assert 1 not in [entry_id for entry_id, _ in index.search(query, k=3, exclude=[1])]
+
+    index.upsert(3, vector_index.embed("river walk again", 64))
+    assert index.size == 4
+    assert [entry_id for entry_id, _ in index.search(query, k=2)] == [1, 3]
+
+
+def test_cache_drops_an_index_that_missed_a_write():
+    cache = vector_index.VectorIndexCache(max_rows=10)
+    cache.put(7, vector_index.UserVectorIndex(dim=8, version=3))
+    cache.apply(7, 4, entry_id=1, vector=np.ones(8, dtype=np.float32))
+    assert cache.get(7).version == 4 and cache.get(7).size == 1
+
+    cache.apply(7, 6, entry_id=2, vector=np.ones(8, dtype=np.float32))  # Version 5 happened elsewhere
+    assert cache.get(7) is None
+
+
+# ====================================================================
+# C. Benchmark
+# ====================================================================
+
+async def test_benchmark_run_reports_every_stage(monkeypatch):
+    import bench_similar
+    from app.core.settings import settings
+
+    monkeypatch.setattr(settings, "SIMILARITY_EMBEDDING_DIM", settings.SIMILARITY_EMBEDDING_DIM)
+    monkeypatch.setattr(vector_index, "indexes", vector_index.indexes)
+    args = bench_similar.parse_args(["--entries", "150", "--queries", "3", "--commits", "2", "--dim", "128"])
+
+    results = await bench_similar.run(args)
+
+    assert results["stored_bytes_per_vector"] == 136
+    assert results["stages"]["index_search"]["count"] == 3
+    assert results["stages"]["first_search_after_commit"]["count"] == 2
@@ -0,0 +1,148 @@
+# backend/tests/test_tracing.py
+
+import io
+import json
+import logging
+
+import httpx
+import pytest
+from httpx import AsyncClient
+
+import groq_stub
+from app.core import log, tracing
+from app.core.settings import settings
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def server_timing(response: httpx.Response) -> dict:
+    stages = {}
+    for part in response.headers["server-timing"].split(","):
+        name, duration = part.strip().split(";dur=")
+        stages[name] = float(duration)
+    return stages
+
+
+# ====================================================================
+# A. Server-Timing on process_audio
+# ====================================================================
+
+async def test_process_audio_reports_its_stages(client: AsyncClient):
+    response = await client.post(
+        "/api/v1/entries/process_audio",
+        files={"audio_file": ("day.webm", io.BytesIO(b"\x00" * 4096), "audio/webm")},
+    )
+    assert response.status_code == 200
+
+    stages = server_timing(response)
+    # STT and the LLM are mocked in this fixture; upload and the DB unit are real
+    assert {"upload", "db.lookup", "db.provision", "total"} <= set(stages)
+    assert stages["total"] >= stages["db.lookup"]
+
+
+async def test_slow_requests_are_logged_as_structured_records(client: AsyncClient, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "TRACE_LOG_MIN_DURATION_MS", 0)
+    with caplog.at_level(logging.INFO, logger="app.core.tracing"):
+        await client.get("/api/v1/entries/history", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    record = [record for record in caplog.records if record.getMessage() == "trace"][-1]
+    assert record.trace["trace_id"] == TRACE_ID
+    assert record.trace["name"].endswith("/history")
+    assert record.trace["attributes"]["http.status_code"] == 200
+
+    line = json.loads(log.JsonFormatter().format(record))
+    assert line["level"] == "INFO" and line["logger"] == "app.core.tracing"
+    assert line["trace"]["trace_id"] == TRACE_ID
+
+
+# ====================================================================
+# B. AI stages
+# ====================================================================
+
+async def test_llm_calls_are_recorded_as_stages(monkeypatch):
+    monkeypatch.setattr(ai_service, "GROQ_API_KEY", "stub")
+    config = groq_stub.StubConfig(latency_ms=1, latency_sigma=0, ttft_ms=0, tokens_per_second=1e6, seed=5)
+    monkeypatch.setattr(
+        ai_service,
+        "_http_client",
+        httpx.AsyncClient(
+            base_url="http://groq-stub/openai/v1",
+            transport=httpx.ASGITransport(app=groq_stub.create_app(config)),
+        ),
+    )
+    monkeypatch.setattr(settings, "TRACE_LOG_MIN_DURATION_MS", -1)
+
+    with tracing.start_trace("test") as trace:
+        await ai_service.generate_initial_entry("A calm day.")
+        _ = [delta async for delta in ai_service.stream_initial_entry("A calm day.")]
+
+    llm_spans = [span for span in trace.spans if span.name == "llm"]
+    assert [span.attributes.get("streamed", False) for span in llm_spans] == [False, True]
+    assert all(span.parent_id == trace.root.span_id for span in llm_spans)
+    assert all(span.attributes["task"] == "generate_initial_entry" for span in llm_spans)
+    await ai_service.close_http_client()
+
+def test_spans_are_no_ops_outside_a_trace():
+    with tracing.span("db.lookup") as span:
+        assert span is None
+    assert tracing.current_trace() is None
+
+
+# ====================================================================
+# C. OTLP export
+# ====================================================================
+
+async def test_traces_are_exported_as_otlp_json(monkeypatch):
+    received = []
+
+    def collector(request: httpx.Request) -> httpx.Response:
+        received.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    exporter = tracing.OTLPExporter(
+        "http://collector:4318/v1/traces", "vociary-test", transport=httpx.MockTransport(collector)
+    )
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    monkeypatch.setattr(settings, "TRACE_LOG_MIN_DURATION_MS", -1)
+
+    with tracing.start_trace("POST /entries/process_audio", f"00-{TRACE_ID}-{PARENT_ID}-01"):
+        with tracing.span("stt", bytes=10):
+            pass
+    await exporter.aclose()
+
+    resource_spans = received[0]["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"][0]["value"]["stringValue"] == "vociary-test"
+    root, stt = resource_spans["scopeSpans"][0]["spans"]
+    assert root["traceId"] == stt["traceId"] == TRACE_ID
+    assert root["parentSpanId"] == PARENT_ID
+    assert stt["parentSpanId"] == root["spanId"]
+    assert stt["attributes"] == [{"key": "bytes", "value": {"intValue": "10"}}]
+
+
+async def test_exports_are_batched_and_bounded(monkeypatch):
+    received = []
+
+    def collector(request: httpx.Request) -> httpx.Response:
+        received.append(len(json.loads(request.content)["resourceSpans"][0]["scopeSpans"][0]["spans"]))
+        return httpx.Response(200, json={})
+
+    exporter = tracing.OTLPExporter(
+        "http://collector:4318/v1/traces", "vociary-test",
+        transport=httpx.MockTransport(collector), max_queue=3, batch_size=2,
+    )
+    monkeypatch.setattr(tracing, "exporter", exporter)
+    monkeypatch.setattr(settings, "TRACE_LOG_MIN_DURATION_MS", -1)
+    dropped = tracing.EXPORTS_DROPPED.value(reason="queue_full")
+
+    for _ in range(5):  # Submitted without yielding, so the sender hasn't drained anything yet
+        with tracing.start_trace("GET /health"):
+            pass
+    await exporter.aclose()
+
+    assert tracing.EXPORTS_DROPPED.value(reason="queue_full") == dropped + 2
+    assert received == [2, 1]  # One root span per trace, at most two traces per request
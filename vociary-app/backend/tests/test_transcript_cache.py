@@ -0,0 +1,121 @@
+# backend/tests/test_transcript_cache.py
+
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.services import ai_service, diary_service, transcript_cache
+from app.services.transcript_cache import TranscriptCache
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+
+def make_upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="clip.webm")
+
+
+# ====================================================================
+# A. Cache Tiers
+# ====================================================================
+
+async def test_memory_tier_is_bounded_lru(tmp_path):
+    cache = TranscriptCache(directory=str(tmp_path), max_entries=2, ttl_seconds=60)
+
+    await cache.set("a", "first")
+    await cache.set("b", "second")
+    assert await cache.get("a") == "first"  # "a" is now most recently used
+    await cache.set("c", "third")
+
+    assert list(cache._memory) == ["a", "c"]
+    # Evicted from memory, but still served from the durable tier
+    assert await cache.get("b") == "second"
+
+
+async def test_durable_tier_survives_restart_and_expires(tmp_path, monkeypatch):
+    cache = TranscriptCache(directory=str(tmp_path), max_entries=8, ttl_seconds=60)
+    await cache.set("key", "hello")
+
+    restarted = TranscriptCache(directory=str(tmp_path), max_entries=8, ttl_seconds=60)
+    assert await restarted.get("key") == "hello"
+
+    now = transcript_cache.time.time()
+    monkeypatch.setattr(transcript_cache.time, "time", lambda: now + 61)
+    assert await restarted.get("key") is None
+    assert await cache.evict_expired() == 0  # The expired file was already removed on read
+    assert not any(tmp_path.rglob("*.json"))
+
+
+async def test_concurrent_sets_of_one_key_all_succeed(tmp_path):
+    cache = TranscriptCache(directory=str(tmp_path), max_entries=8, ttl_seconds=60)
+
+    await asyncio.gather(*(cache.set("same", f"take {n}") for n in range(8)))
+
+    assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == ["same.json"]
+    assert (await TranscriptCache(str(tmp_path), max_entries=8, ttl_seconds=60).get("same")).startswith("take ")
+
+
+async def test_sweep_spares_temp_files_being_written(tmp_path, monkeypatch):
+    cache = TranscriptCache(directory=str(tmp_path), max_entries=8, ttl_seconds=60)
+    await cache.set("key", "hello")
+    in_progress = tmp_path / "ke" / "tmpwriter.tmp"
+    in_progress.write_text("")
+    assert await cache.evict_expired() == 0
+    assert in_progress.exists()
+
+    stale = os.path.getmtime(in_progress) - 120  # Left behind by a crashed writer
+    os.utime(in_progress, (stale, stale))
+    assert await cache.evict_expired() == 1
+    assert not in_progress.exists()
+
+
+async def test_cache_key_covers_audio_and_model_and_rewinds():
+    upload = make_upload(b"same audio")
+
+    key = await transcript_cache.audio_cache_key(upload, "whisper-a")
+    assert await upload.read() == b"same audio"  # Still readable for the STT call
+
+    assert key == await transcript_cache.audio_cache_key(make_upload(b"same audio"), "whisper-a")
+    assert key != await transcript_cache.audio_cache_key(make_upload(b"same audio"), "whisper-b")
+    assert key != await transcript_cache.audio_cache_key(make_upload(b"other audio"), "whisper-a")
+
+
+# ====================================================================
+# B. STT Pipeline Integration
+# ====================================================================
+
+async def test_repeated_upload_skips_stt(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_transcribe(audio_file):
+        calls.append(await audio_file.read())
+        return "Transcribed once."
+
+    monkeypatch.setattr(ai_service, "is_configured", lambda: True)
+    monkeypatch.setattr(ai_service, "get_transcription", fake_transcribe)
+    monkeypatch.setattr(transcript_cache, "cache", TranscriptCache(str(tmp_path), max_entries=8, ttl_seconds=60))
+
+    first = await diary_service.get_transcription(make_upload(b"retry me"))
+    retry = await diary_service.get_transcription(make_upload(b"retry me"))
+
+    assert first == retry == "Transcribed once."
+    assert calls == [b"retry me"]
+
+
+async def test_failed_cache_write_still_returns_the_transcript(tmp_path, monkeypatch):
+    async def fake_transcribe(audio_file):
+        return "Transcribed."
+
+    async def disk_full(key, transcript):
+        raise OSError(28, "No space left on device")
+
+    cache = TranscriptCache(str(tmp_path), max_entries=8, ttl_seconds=60)
+    monkeypatch.setattr(cache, "set", disk_full)
+    monkeypatch.setattr(ai_service, "is_configured", lambda: True)
+    monkeypatch.setattr(ai_service, "get_transcription", fake_transcribe)
+    monkeypatch.setattr(transcript_cache, "cache", cache)
+
+    assert await diary_service.get_transcription(make_upload(b"audio")) == "Transcribed."
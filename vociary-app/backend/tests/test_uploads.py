@@ -0,0 +1,142 @@
+# backend/tests/test_uploads.py
+
+import io
+import tempfile
+import threading
+import tracemalloc
+import wave
+
+import httpx
+import pytest
+from fastapi import UploadFile
+from httpx import AsyncClient
+
+import groq_stub
+from app.core.settings import settings
+from app.services import ai_service
+
+# Mark all tests as asynchronous
+pytestmark = pytest.mark.anyio
+
+UPLOAD_SIZE = 8 * 1024 * 1024
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Consumes the request body chunk by chunk, like a real socket would, without keeping it."""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async for chunk in request.stream:
+            self.received += len(chunk)
+        return httpx.Response(200, json={"text": "streamed"})
+
+
+def wav_bytes(seconds: float, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+# ====================================================================
+# A. Streaming the Upload to STT
+# ====================================================================
+
+async def test_transcription_streams_upload_without_buffering(monkeypatch):
+    """
+    Peak Python memory while sending an 8 MB upload stays far below the upload size.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)  # Same spooling as Starlette
+    chunk = b"\x01" * (1024 * 1024)
+    for _ in range(UPLOAD_SIZE // len(chunk)):
+        spooled.write(chunk)
+    spooled.seek(0)
+    upload = UploadFile(file=spooled, filename="long.webm", size=UPLOAD_SIZE)
+
+    transport = CountingTransport()
+    monkeypatch.setattr(ai_service, "is_configured", lambda: True)
+    monkeypatch.setattr(
+        ai_service, "_http_client", httpx.AsyncClient(base_url=ai_service.GROQ_API_BASE_URL, transport=transport)
+    )
+
+    tracemalloc.start()
+    try:
+        transcript = await ai_service.get_transcription(upload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        await ai_service.close_http_client()
+
+    assert transcript == "streamed"
+    assert transport.received > UPLOAD_SIZE
+    assert peak < UPLOAD_SIZE / 8, f"peak {peak} bytes for an {UPLOAD_SIZE} byte upload"
+
+
+async def test_spooled_reads_stay_off_the_event_loop(monkeypatch):
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(b"\x02" * (256 * 1024))  # Rolled over to disk
+    spooled.seek(0)
+    upload = UploadFile(file=spooled, filename="day.webm", size=256 * 1024, headers={"content-type": "audio/webm"})
+
+    read_on = set()
+    original_read = spooled.read
+    monkeypatch.setattr(spooled, "read", lambda *args: read_on.add(threading.current_thread()) or original_read(*args))
+    monkeypatch.setattr(ai_service, "is_configured", lambda: True)
+    config = groq_stub.StubConfig(latency_ms=0, latency_sigma=0, stt_bytes_per_word=1024, seed=2)
+    monkeypatch.setattr(ai_service, "_http_client", httpx.AsyncClient(
+        base_url="http://groq-stub/openai/v1", transport=httpx.ASGITransport(app=groq_stub.create_app(config)),
+    ))
+
+    try:
+        transcript = await ai_service.get_transcription(upload)
+    finally:
+        await ai_service.close_http_client()
+
+    assert len(transcript.split()) == 256  # The stub parsed the streamed multipart file at full size
+    assert read_on and threading.main_thread() not in read_on
+
+
+async def test_part_headers_cannot_be_injected():
+    content, _ = ai_service._multipart_upload(
+        {}, 'x"\r\nContent-Type: text/html\r\n\r\n../day.webm', "audio/webm\r\nX-Injected: 1", ai_service._single_chunk(b""), 0
+    )
+    head = await content.__anext__()
+
+    assert b'filename="day.webm"' in head  # Everything up to the last "/" is dropped with the path
+    assert head.count(b"\r\n") == 4  # Boundary, Content-Disposition, Content-Type, blank line
+    assert b"Content-Type: application/octet-stream" in head
+    assert ai_service._part_filename("segment-001.wav") == "segment-001.wav"
+    assert ai_service._part_filename("\u00e9t\u00e9 \u2014 notes.m4a") == "t_notes.m4a"
+    assert ai_service._part_filename('a"b\r\n.wav') == "a_b.wav"
+    assert ai_service._part_filename(None) == "audio"
+
+
+# ====================================================================
+# B. Upload Limits
+# ====================================================================
+
+async def test_oversized_upload_is_rejected_before_parsing(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+
+    files = {'audio_file': ('big.webm', io.BytesIO(b"\x00" * (256 * 1024)), 'audio/webm')}
+    response = await client.post(
+        "/api/v1/entries/process_audio", files=files, headers={"Origin": settings.FRONTEND_URL}
+    )
+
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == settings.FRONTEND_URL  # Readable by the frontend
+
+
+async def test_overlong_wav_is_rejected(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_AUDIO_DURATION_SECONDS", 1)
+
+    files = {'audio_file': ('long.wav', io.BytesIO(wav_bytes(seconds=2)), 'audio/wav')}
+    response = await client.post("/api/v1/entries/process_audio", files=files)
+
+    assert response.status_code == 413
+    assert "seconds" in response.json()["detail"]